@@ -1,14 +1,27 @@
 # backend/admin.py
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any, Dict, Optional
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, Cookie
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, Cookie
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 
-from db import get_db_connection
+from psycopg.rows import dict_row
+
+from async_db import connection, get_async_db
+from cache import dashboard_cache, identity_cache
+from hashing import hasher, HashingOverloaded, InvalidPassword, overloaded_error, invalid_password_error
+import rate_limit
+import data_version
+import complaint_counters
+from pagination import Filter, Listing, Sort, decode_cursor, fetch_page, page_headers
+import export
+import student_import
+from streaming import Section, section_response, document_response, wants_ndjson
+from fast_json import ORJSONResponse, FastJSONRoute
 from auth import (
     create_access_token, create_refresh_token, verify_jwt_token,
     set_auth_cookies, clear_auth_cookies, log_auth_debug,
@@ -18,7 +31,7 @@ import os
 
 load_dotenv()
 
-router = APIRouter(tags=["Admin"])
+router = APIRouter(tags=["Admin"], default_response_class=ORJSONResponse, route_class=FastJSONRoute)
 
 # ─────────────────────── PYDANTIC MODELS ───────────────────────
 
@@ -53,32 +66,43 @@ class WardenUpdate(BaseModel):
 # ─────────────────────── AUTH ROUTES ───────────────────────
 
 @router.post("/auth/admin/login")
-def admin_login(
+async def admin_login(
     credentials: AdminLogin,
     response: Response,
     request: Request,
-    conn=Depends(get_db_connection)
+    background_tasks: BackgroundTasks,
 ):
     """
     Verify the supplied e‑mail / password against the Admin table.
     On success set JWT tokens in HttpOnly cookies; otherwise 401.
     """
     log_auth_debug("Admin login attempt started", request)
+    rate_limit.limit_login(request, UserRole.ADMIN, credentials.email)
     
-    with conn.cursor() as cur:
-        cur.execute(
+    # The connection goes back to the pool before the slow verify
+    async with connection() as conn:
+        cur = await conn.execute(
             """
-            SELECT name, email
+            SELECT name, email, password
             FROM   Admin
-            WHERE  email    = %s
-              AND  password = %s
+            WHERE  email = %s
             """,
-            (credentials.email, credentials.password),
+            (credentials.email,),
         )
-        admin = cur.fetchone()
+        admin = await cur.fetchone()
 
     if admin:
-        admin_name, admin_email = admin  # Unpack tuple (name, email)
+        try:
+            password_ok = await hasher.verify_password(credentials.password, admin[2], UserRole.ADMIN)
+        except HashingOverloaded:
+            raise overloaded_error()
+        if not password_ok:
+            admin = None
+        elif hasher.needs_rehash(admin[2]):
+            background_tasks.add_task(hasher.rehash, UserRole.ADMIN, admin[1], credentials.password, admin[2])
+
+    if admin:
+        admin_name, admin_email, _ = admin  # Unpack tuple (name, email, password)
         log_auth_debug(f"Login successful for {admin_email}")
         
         # Create JWT tokens with admin data
@@ -187,531 +211,587 @@ def get_admin_profile(request: Request):
     admin_data = get_current_admin(request)
     return {"admin": admin_data}
 
+# ─────────────────────── ANALYTICS ───────────────────────
+# Each section streams from a server-side cursor (see streaming.py) in the same
+# order the combined document has always used; meta is a handful of counts.
+
+ANALYTICS_SECTIONS = {
+    "hostels": Section(
+        "SELECT hid, name, location, numberofrooms FROM Hostel",
+        ("hid", "name", "location", "numberOfRooms"), "name", "hid", (1, 0)),
+    "rooms": Section(
+        "SELECT rid, roomnumber, capacity, hid FROM Room",
+        ("rid", "roomNumber", "capacity", "hid"), "roomnumber", "rid", (1, 0)),
+    "wardens": Section(
+        "SELECT wid, name, mail, phone, hid FROM Warden",
+        ("wid", "name", "email", "phone", "hid"), "name", "wid", (1, 0)),
+    "students": Section(
+        "SELECT sid, name, mail, phone, hid, shid FROM Student",
+        ("sid", "name", "email", "phone", "hid", "shid"), "name", "sid", (1, 0)),
+    "complaints": Section(
+        """
+        SELECT c.cid, c.type, c.status, c.description, c.created_at,
+               s.name as student_name, s.shid
+        FROM Complaint c
+        JOIN Student s ON c.sid = s.sid
+        """,
+        ("cid", "type", "status", "description", "created_at", "student_name", "shid"),
+        "c.created_at", "c.cid", (4, 0), descending=True),
+}
+
+ANALYTICS_MAX_PAGE = int(os.getenv("ANALYTICS_MAX_PAGE", "10000"))
+
+
+async def analytics_meta(conn) -> Dict[str, int]:
+    """Table sizes, with complaint totals from the trigger-maintained counters."""
+    cur = await conn.execute("""
+        SELECT (SELECT COUNT(*) FROM Hostel), (SELECT COUNT(*) FROM Room),
+               (SELECT COUNT(*) FROM Warden), (SELECT COUNT(*) FROM Student)
+    """)
+    total_hostels, total_rooms, total_wardens, total_students = await cur.fetchone()
+    counts = await complaint_counters.type_status_counts(conn)
+    return {
+        "total_hostels": total_hostels,
+        "total_rooms": total_rooms,
+        "total_wardens": total_wardens,
+        "total_students": total_students,
+        "total_complaints": sum(counts.values()),
+        "pending_complaints": sum(n for (_, status), n in counts.items() if status == "Pending")
+    }
+
+
 @router.get("/admin/analytics")
-def get_admin_analytics(request: Request):
-    """Get analytics data for admin dashboard."""
+async def get_admin_analytics(request: Request):
+    """
+    Every analytics section in one JSON document, streamed section by section.
+    New clients should load /admin/analytics/meta first and the sections
+    they show from /admin/analytics/{section}.
+    """
+    current_admin = get_current_admin(request)
+
+    async def head(conn):
+        return {"meta": await analytics_meta(conn)}
+
+    return document_response(head, list(ANALYTICS_SECTIONS.items()))
+
+@router.get("/admin/analytics/meta")
+async def get_admin_analytics_meta(request: Request):
+    """Summary counts only, cheap enough to render before any section loads."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            # Get hostels data
-            cur.execute("SELECT hid, name, location, numberofrooms FROM Hostel ORDER BY name")
-            hostels_data = cur.fetchall()
-            hostels = [
-                {
-                    "hid": h[0],
-                    "name": h[1], 
-                    "location": h[2],
-                    "numberOfRooms": h[3]
-                }
-                for h in hostels_data
-            ]
-            
-            # Get rooms data
-            cur.execute("SELECT rid, roomnumber, capacity, hid FROM Room ORDER BY roomnumber")
-            rooms_data = cur.fetchall()
-            rooms = [
-                {
-                    "rid": r[0],
-                    "roomNumber": r[1],
-                    "capacity": r[2], 
-                    "hid": r[3]
-                }
-                for r in rooms_data
-            ]
-            
-            # Get wardens data
-            cur.execute("SELECT wid, name, mail, phone, hid FROM Warden ORDER BY name")
-            wardens_data = cur.fetchall()
-            wardens = [
-                {
-                    "wid": w[0],
-                    "name": w[1],
-                    "email": w[2],
-                    "phone": w[3],
-                    "hid": w[4]
-                }
-                for w in wardens_data
-            ]
-            
-            # Get students data
-            cur.execute("SELECT sid, name, mail, phone, hid, shid FROM Student ORDER BY name")
-            students_data = cur.fetchall()
-            students = [
-                {
-                    "sid": s[0],
-                    "name": s[1],
-                    "email": s[2],
-                    "phone": s[3],
-                    "hid": s[4],
-                    "shid": s[5]
-                }
-                for s in students_data
-            ]
-            
-            # Get complaints data
-            cur.execute("""
-                SELECT c.cid, c.type, c.status, c.description, c.created_at,
-                       s.name as student_name, s.shid
-                FROM Complaint c
-                JOIN Student s ON c.sid = s.sid
-                ORDER BY c.created_at DESC
-            """)
-            complaints_data = cur.fetchall()
-            complaints = [
-                {
-                    "cid": c[0],
-                    "type": c[1],
-                    "status": c[2],
-                    "description": c[3],
-                    "created_at": c[4].isoformat() if c[4] else None,
-                    "student_name": c[5],
-                    "shid": c[6]
-                }
-                for c in complaints_data
-            ]
-            
-            # Get summary statistics
-            cur.execute("SELECT COUNT(*) FROM Hostel")
-            total_hostels = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Room")
-            total_rooms = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Warden")
-            total_wardens = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Student")
-            total_students = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Complaint")
-            total_complaints = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Complaint WHERE status = 'Pending'")
-            pending_complaints = cur.fetchone()[0]
-            
-            conn.close()
-            
-            return {
-                "meta": {
-                    "total_hostels": total_hostels,
-                    "total_rooms": total_rooms,
-                    "total_wardens": total_wardens,
-                    "total_students": total_students,
-                    "total_complaints": total_complaints,
-                    "pending_complaints": pending_complaints
-                },
-                "hostels": hostels,
-                "rooms": rooms,
-                "wardens": wardens,
-                "students": students,
-                "complaints": complaints
-            }
-            
+        async with connection() as conn:
+            return {"meta": await analytics_meta(conn)}
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Analytics fetch error: {str(e)}")
 
+@router.get("/admin/analytics/{section}")
+async def get_admin_analytics_section(section: str, request: Request, format: Optional[str] = None,
+                                      cursor: Optional[str] = None, limit: Optional[int] = None):
+    """
+    One section (hostels, rooms, wardens, students or complaints), streamed.
+    ?format=ndjson (or Accept: application/x-ndjson) for one row per line.
+    ?limit=N pages through it; pass the returned `next` back as ?cursor=.
+    """
+    current_admin = get_current_admin(request)
+    if section not in ANALYTICS_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section, expected one of {list(ANALYTICS_SECTIONS)}")
+    if format not in (None, "json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if limit is not None and not 1 <= limit <= ANALYTICS_MAX_PAGE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {ANALYTICS_MAX_PAGE}")
+
+    return section_response(ANALYTICS_SECTIONS[section], f"analytics_{section}",
+                            wants_ndjson(request, format), decode_cursor(cursor), limit)
+
+# ─────────────────────── COMPLAINTS ───────────────────────
+# List routes here and below return keyset pages (see pagination.py):
+# ?limit=&cursor=&sort=, plus the filters each listing whitelists. Indexes
+# from migration 0010 back every sort.
+
+COMPLAINT_SOURCE = """Complaint c
+    JOIN Student s ON c.sid = s.sid
+    JOIN Hostel h ON s.hid = h.hid"""
+
+COMPLAINT_SORTS = {
+    "created_at": Sort("c.created_at"),
+    "cid": Sort("c.cid", nullable=False),
+}
+
+ADMIN_COMPLAINTS = Listing(
+    "c.cid, c.type, c.status, c.description, c.created_at, s.name, s.shid, s.hid, h.name",
+    COMPLAINT_SOURCE, "c.cid", COMPLAINT_SORTS, "-created_at",
+    filters={
+        "hostel": Filter("s.hid = %s", int),
+        "status": Filter("c.status = %s"),
+        "type": Filter("c.type = %s"),
+        "shid": Filter("s.shid = %s"),
+        "start": Filter("c.created_at >= %s", date.fromisoformat),
+        "end": Filter("c.created_at < %s", date.fromisoformat),
+    },
+)
+
+ADMIN_OVERDUE = Listing(
+    "c.cid, c.type, c.status, c.description, c.created_at, s.name, s.shid, h.name,"
+    " EXTRACT(DAY FROM NOW() - c.created_at)",
+    COMPLAINT_SOURCE, "c.cid",
+    # The WHERE rules out NULL created_at
+    {"created_at": Sort("c.created_at", nullable=False), "cid": Sort("c.cid", nullable=False)},
+    "created_at",
+    filters={"hostel": Filter("s.hid = %s", int), "type": Filter("c.type = %s")},
+    where="c.status = 'Pending' AND c.created_at < NOW() - INTERVAL '7 days'",
+)
+
 @router.get("/admin/complaints")
-def get_admin_complaints(request: Request):
-    """Get all complaints for admin."""
+async def get_admin_complaints(request: Request, response: Response, cursor: Optional[str] = None,
+                               limit: Optional[int] = None, sort: Optional[str] = None):
+    """
+    One page of complaints for admin, newest first. Filters: hostel, status,
+    type, shid, start (inclusive) and end (exclusive) dates.
+    """
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT c.cid, c.type, c.status, c.description, c.created_at,
-                       s.name as student_name, s.shid, s.hid,
-                       h.name as hostel_name
-                FROM Complaint c
-                JOIN Student s ON c.sid = s.sid
-                JOIN Hostel h ON s.hid = h.hid
-                ORDER BY c.created_at DESC
-            """)
-            complaints_data = cur.fetchall()
-            
-            complaints = [
-                {
-                    "cid": c[0],
-                    "type": c[1],
-                    "status": c[2],
-                    "description": c[3],
-                    "created_at": c[4].isoformat() if c[4] else None,
-                    "student_name": c[5],
-                    "shid": c[6],
-                    "hid": c[7],
-                    "hostel_name": c[8]
-                }
-                for c in complaints_data
-            ]
-            
-            conn.close()
-            return {"complaints": complaints}
-            
+        async with connection() as conn:
+            page = await fetch_page(conn, ADMIN_COMPLAINTS, request, cursor=cursor, limit=limit, sort=sort)
+    except HTTPException:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error fetching complaints: {str(e)}")
 
+    page_headers(response, page)
+    complaints = [
+        {
+            "cid": c[0],
+            "type": c[1],
+            "status": c[2],
+            "description": c[3],
+            "created_at": c[4].isoformat() if c[4] else None,
+            "student_name": c[5],
+            "shid": c[6],
+            "hid": c[7],
+            "hostel_name": c[8]
+        }
+        for c in page.rows
+    ]
+    return {"complaints": complaints, "next": page.next, "estimated_total": page.estimated_total}
+
+@router.get("/admin/complaints/export")
+async def export_admin_complaints(request: Request, format: str = "csv", hostel: Optional[int] = None,
+                                  status: Optional[str] = None, type: Optional[str] = None,
+                                  start: Optional[date] = None, end: Optional[date] = None):
+    """
+    Complaints as a CSV, Parquet or Arrow IPC download, streamed with constant
+    memory. Filters: hostel (HID), status, type, start (inclusive) and end
+    (exclusive) dates of Created_at.
+    """
+    current_admin = get_current_admin(request)
+    filters = export.ExportFilters(hostel, status, type, start, end)
+    try:
+        chunks = export.iter_export(format, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        chunks,
+        media_type=export.FORMATS[format][0],
+        headers={"Content-Disposition": f'attachment; filename="{export.filename(format, filters)}"'},
+    )
+
+RECENT_COMPLAINTS_SQL = """
+    SELECT COUNT(*) FROM Complaint
+    WHERE created_at >= NOW() - INTERVAL '30 days'
+"""
+
 @router.get("/admin/complaints/summary")
-def get_admin_complaints_summary(request: Request):
-    """Get complaints summary statistics for admin."""
+async def get_admin_complaints_summary(request: Request, response: Response):
+    """Get complaints summary statistics for admin; 304 while no complaint has changed."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            # Get total counts
-            cur.execute("SELECT COUNT(*) FROM Complaint")
-            total = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Complaint WHERE status = 'Pending'")
-            pending = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Complaint WHERE status = 'Resolved'")
-            resolved = cur.fetchone()[0]
-            
-            cur.execute("SELECT COUNT(*) FROM Complaint WHERE status = 'Withdrawn'")
-            withdrawn = cur.fetchone()[0]
-            
-            # Get complaints by type
-            cur.execute("""
-                SELECT type, COUNT(*) as count
-                FROM Complaint
-                GROUP BY type
-                ORDER BY count DESC
-            """)
-            by_type = [{"type": row[0], "count": row[1]} for row in cur.fetchall()]
-            
-            # Get recent complaints (last 30 days)
-            cur.execute("""
-                SELECT COUNT(*) FROM Complaint 
-                WHERE created_at >= NOW() - INTERVAL '30 days'
-            """)
-            recent = cur.fetchone()[0]
-            
-            conn.close()
-            return {
-                "summary": {
-                    "total": total,
-                    "pending": pending,
-                    "resolved": resolved,
-                    "withdrawn": withdrawn,
-                    "recent_30_days": recent
-                },
-                "by_type": by_type
-            }
+        async with connection() as conn:
+            tag = data_version.make_tag("summary", await data_version.summary_token(conn))
+            unchanged = data_version.conditional(request, response, tag)
+            if unchanged is not None:
+                return unchanged
+
+            async with conn.cursor() as cur:
+                # Totals and per-type counts from the trigger-maintained counters
+                counts = await complaint_counters.type_status_counts(conn)
+                by_status, type_totals = {}, {}
+                for (type_, status), n in counts.items():
+                    by_status[status] = by_status.get(status, 0) + n
+                    type_totals[type_] = type_totals.get(type_, 0) + n
+                by_type = [
+                    {"type": type_ or None, "count": n}
+                    for type_, n in sorted(type_totals.items(), key=lambda t: (-t[1], t[0]))
+                    if n
+                ]
+            
+                # Get recent complaints (last 30 days)
+                await cur.execute(RECENT_COMPLAINTS_SQL)
+                recent = (await cur.fetchone())[0]
+            
+                return {
+                    "summary": {
+                        "total": sum(by_status.values()),
+                        "pending": by_status.get("Pending", 0),
+                        "resolved": by_status.get("Resolved", 0),
+                        "withdrawn": by_status.get("Withdrawn", 0),
+                        "recent_30_days": recent
+                    },
+                    "by_type": by_type
+                }
             
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error fetching complaints summary: {str(e)}")
 
 @router.get("/admin/complaints/overdue")
-def get_admin_overdue_complaints(request: Request):
-    """Get overdue complaints (pending for more than 7 days)."""
+async def get_admin_overdue_complaints(request: Request, response: Response, cursor: Optional[str] = None,
+                                       limit: Optional[int] = None, sort: Optional[str] = None):
+    """One page of overdue complaints (pending for more than 7 days), oldest first."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT c.cid, c.type, c.status, c.description, c.created_at,
-                       s.name as student_name, s.shid,
-                       h.name as hostel_name,
-                       EXTRACT(DAY FROM NOW() - c.created_at) as days_pending
-                FROM Complaint c
-                JOIN Student s ON c.sid = s.sid
-                JOIN Hostel h ON s.hid = h.hid
-                WHERE c.status = 'Pending' 
-                AND c.created_at < NOW() - INTERVAL '7 days'
-                ORDER BY c.created_at ASC
-            """)
-            overdue_data = cur.fetchall()
-            
-            overdue = [
-                {
-                    "cid": c[0],
-                    "type": c[1],
-                    "status": c[2],
-                    "description": c[3],
-                    "created_at": c[4].isoformat() if c[4] else None,
-                    "student_name": c[5],
-                    "shid": c[6],
-                    "hostel_name": c[7],
-                    "days_pending": int(c[8]) if c[8] else 0
-                }
-                for c in overdue_data
-            ]
-            
-            conn.close()
-            return {"overdue_complaints": overdue}
-            
+        async with connection() as conn:
+            page = await fetch_page(conn, ADMIN_OVERDUE, request, cursor=cursor, limit=limit, sort=sort)
+    except HTTPException:
+        raise
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error fetching overdue complaints: {str(e)}")
 
+    page_headers(response, page)
+    overdue = [
+        {
+            "cid": c[0],
+            "type": c[1],
+            "status": c[2],
+            "description": c[3],
+            "created_at": c[4].isoformat() if c[4] else None,
+            "student_name": c[5],
+            "shid": c[6],
+            "hostel_name": c[7],
+            "days_pending": int(c[8]) if c[8] else 0
+        }
+        for c in page.rows
+    ]
+    return {"overdue_complaints": overdue, "next": page.next, "estimated_total": page.estimated_total}
+
 @router.put("/admin/admins/me")
-def update_current_admin(request: Request, admin_update: dict):
+async def update_current_admin(request: Request, admin_update: dict):
     """Update current admin's profile."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            # Build dynamic update query
-            update_fields = []
-            values = []
-            
-            if "name" in admin_update:
-                update_fields.append("name = %s")
-                values.append(admin_update["name"])
-            
-            if "email" in admin_update:
-                update_fields.append("email = %s") 
-                values.append(admin_update["email"])
+        if "password" in admin_update:
+            # Hash before taking a pooled connection
+            admin_update["password"] = await hasher.hash_password(admin_update["password"])
+
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                # Build dynamic update query
+                update_fields = []
+                values = []
+            
+                if "name" in admin_update:
+                    update_fields.append("name = %s")
+                    values.append(admin_update["name"])
+            
+                if "email" in admin_update:
+                    update_fields.append("email = %s") 
+                    values.append(admin_update["email"])
                 
-            if "password" in admin_update:
-                update_fields.append("password = %s")
-                values.append(admin_update["password"])
+                if "password" in admin_update:
+                    update_fields.append("password = %s")
+                    values.append(admin_update["password"])
             
-            if not update_fields:
-                raise HTTPException(status_code=400, detail="No fields to update")
+                if not update_fields:
+                    raise HTTPException(status_code=400, detail="No fields to update")
             
-            values.append(current_admin["email"])  # for WHERE clause
+                values.append(current_admin["email"])  # for WHERE clause
             
-            query = f"UPDATE Admin SET {', '.join(update_fields)} WHERE email = %s RETURNING *"
-            cur.execute(query, values)
-            updated_admin = cur.fetchone()
+                query = f"UPDATE Admin SET {', '.join(update_fields)} WHERE email = %s RETURNING *"
+                await cur.execute(query, values)
+                updated_admin = await cur.fetchone()
             
-            if not updated_admin:
-                raise HTTPException(status_code=404, detail="Admin not found")
+                if not updated_admin:
+                    raise HTTPException(status_code=404, detail="Admin not found")
             
-            conn.commit()
-            conn.close()
+                await conn.commit()
             
-            return {
-                "status": "success",
-                "message": "Admin profile updated successfully",
-                "admin": {
-                    "email": updated_admin[1],
-                    "name": updated_admin[2]
+                return {
+                    "status": "success",
+                    "message": "Admin profile updated successfully",
+                    "admin": {
+                        "email": updated_admin[1],
+                        "name": updated_admin[2]
+                    }
                 }
-            }
             
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error updating admin: {str(e)}")
 
 @router.post("/admin/admins")
-def create_new_admin(request: Request, admin_data: dict):
+async def create_new_admin(request: Request, admin_data: dict):
     """Create a new admin (only existing admins can do this)."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            # Check if email already exists
-            cur.execute("SELECT email FROM Admin WHERE email = %s", (admin_data["email"],))
-            if cur.fetchone():
-                raise HTTPException(status_code=400, detail="Email already exists")
-            
-            # Create new admin
-            cur.execute(
-                "INSERT INTO Admin (email, password, name) VALUES (%s, %s, %s) RETURNING *",
-                (admin_data["email"], admin_data["password"], admin_data["name"])
-            )
-            new_admin = cur.fetchone()
-            
-            conn.commit()
-            conn.close()
-            
-            return {
-                "status": "success",
-                "message": "New admin created successfully",
-                "admin": {
-                    "aid": new_admin[0],
-                    "email": new_admin[1],
-                    "name": new_admin[2]
+        # Hash before taking a pooled connection
+        hashed_pw = await hasher.hash_password(admin_data["password"])
+
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                # Check if email already exists
+                await cur.execute("SELECT email FROM Admin WHERE email = %s", (admin_data["email"],))
+                if await cur.fetchone():
+                    raise HTTPException(status_code=400, detail="Email already exists")
+            
+                # Create new admin
+                await cur.execute(
+                    "INSERT INTO Admin (email, password, name) VALUES (%s, %s, %s) RETURNING *",
+                    (admin_data["email"], hashed_pw, admin_data["name"])
+                )
+                new_admin = await cur.fetchone()
+            
+                await conn.commit()
+            
+                return {
+                    "status": "success",
+                    "message": "New admin created successfully",
+                    "admin": {
+                        "aid": new_admin[0],
+                        "email": new_admin[1],
+                        "name": new_admin[2]
+                    }
                 }
-            }
             
+    except HTTPException:
+        raise
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error creating admin: {str(e)}")
 
 @router.post("/admin/warden")
-def create_warden(request: Request, warden_data: dict):
+async def create_warden(request: Request, warden_data: dict):
     """Create a new warden."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO Warden (name, mail, phone, password, hid) 
-                VALUES (%s, %s, %s, %s, %s) 
-                RETURNING *
-            """, (
-                warden_data["name"],
-                warden_data["mail"], 
-                warden_data["phone"],
-                warden_data["password"],
-                warden_data["hid"]
-            ))
-            new_warden = cur.fetchone()
-            
-            conn.commit()
-            conn.close()
-            
-            return {
-                "status": "success",
-                "message": "Warden created successfully",
-                "warden": {
-                    "wid": new_warden[0],
-                    "name": new_warden[1],
-                    "mail": new_warden[2],
-                    "phone": new_warden[3],
-                    "hid": new_warden[5]
+        hashed_pw = await hasher.hash_password(warden_data["password"])
+
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("""
+                    INSERT INTO Warden (name, mail, phone, password, hid) 
+                    VALUES (%s, %s, %s, %s, %s) 
+                    RETURNING *
+                """, (
+                    warden_data["name"],
+                    warden_data["mail"], 
+                    warden_data["phone"],
+                    hashed_pw,
+                    warden_data["hid"]
+                ))
+                new_warden = await cur.fetchone()
+            
+                await conn.commit()
+            
+                return {
+                    "status": "success",
+                    "message": "Warden created successfully",
+                    "warden": {
+                        "wid": new_warden[0],
+                        "name": new_warden[1],
+                        "mail": new_warden[2],
+                        "phone": new_warden[3],
+                        "hid": new_warden[5]
+                    }
                 }
-            }
             
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error creating warden: {str(e)}")
 
 @router.put("/admin/warden/{warden_id}")
-def update_warden_by_admin(warden_id: int, warden_update: dict, request: Request):
+async def update_warden_by_admin(warden_id: int, warden_update: dict, request: Request):
     """Update warden details by admin."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            # Build dynamic update query
-            update_fields = []
-            values = []
-            
-            for field in ["name", "mail", "phone", "password", "hid"]:
-                if field in warden_update:
-                    update_fields.append(f"{field} = %s")
-                    values.append(warden_update[field])
-            
-            if not update_fields:
-                raise HTTPException(status_code=400, detail="No fields to update")
-            
-            values.append(warden_id)  # for WHERE clause
-            
-            query = f"UPDATE Warden SET {', '.join(update_fields)} WHERE wid = %s RETURNING *"
-            cur.execute(query, values)
-            updated_warden = cur.fetchone()
-            
-            if not updated_warden:
-                raise HTTPException(status_code=404, detail="Warden not found")
-            
-            conn.commit()
-            conn.close()
-            
-            return {
-                "status": "success",
-                "message": "Warden updated successfully",
-                "warden": {
-                    "wid": updated_warden[0],
-                    "name": updated_warden[1],
-                    "mail": updated_warden[2],
-                    "phone": updated_warden[3],
-                    "hid": updated_warden[5]
+        if "password" in warden_update:
+            warden_update["password"] = await hasher.hash_password(warden_update["password"])
+
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                # Build dynamic update query
+                update_fields = []
+                values = []
+            
+                for field in ["name", "mail", "phone", "password", "hid"]:
+                    if field in warden_update:
+                        update_fields.append(f"{field} = %s")
+                        values.append(warden_update[field])
+            
+                if not update_fields:
+                    raise HTTPException(status_code=400, detail="No fields to update")
+            
+                values.append(warden_id)  # for WHERE clause
+            
+                query = f"UPDATE Warden SET {', '.join(update_fields)} WHERE wid = %s RETURNING *"
+                await cur.execute(query, values)
+                updated_warden = await cur.fetchone()
+            
+                if not updated_warden:
+                    raise HTTPException(status_code=404, detail="Warden not found")
+            
+                await conn.commit()
+            
+                return {
+                    "status": "success",
+                    "message": "Warden updated successfully",
+                    "warden": {
+                        "wid": updated_warden[0],
+                        "name": updated_warden[1],
+                        "mail": updated_warden[2],
+                        "phone": updated_warden[3],
+                        "hid": updated_warden[5]
+                    }
                 }
-            }
             
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error updating warden: {str(e)}")
 
 @router.delete("/admin/warden/{warden_id}")
-def delete_warden_by_admin(warden_id: int, request: Request):
+async def delete_warden_by_admin(warden_id: int, request: Request):
     """Delete a warden by admin."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM Warden WHERE wid = %s", (warden_id,))
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("DELETE FROM Warden WHERE wid = %s", (warden_id,))
             
-            if cur.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Warden not found")
+                if cur.rowcount == 0:
+                    raise HTTPException(status_code=404, detail="Warden not found")
             
-            conn.commit()
-            conn.close()
+                await conn.commit()
             
-            return {
-                "status": "success",
-                "message": "Warden deleted successfully"
-            }
+                return {
+                    "status": "success",
+                    "message": "Warden deleted successfully"
+                }
             
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error deleting warden: {str(e)}")
 
 @router.put("/admin/student/{student_id}")
-def update_student_by_admin(student_id: int, student_update: dict, request: Request):
+async def update_student_by_admin(student_id: int, student_update: dict, request: Request):
     """Update student details by admin."""
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    
     try:
-        with conn.cursor() as cur:
-            # Build dynamic update query
-            update_fields = []
-            values = []
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                # Build dynamic update query
+                update_fields = []
+                values = []
             
-            for field in ["name", "mail", "phone", "hid", "shid"]:
-                if field in student_update:
-                    update_fields.append(f"{field} = %s")
-                    values.append(student_update[field])
+                for field in ["name", "mail", "phone", "hid", "shid"]:
+                    if field in student_update:
+                        update_fields.append(f"{field} = %s")
+                        values.append(student_update[field])
             
-            if not update_fields:
-                raise HTTPException(status_code=400, detail="No fields to update")
+                if not update_fields:
+                    raise HTTPException(status_code=400, detail="No fields to update")
             
-            values.append(student_id)  # for WHERE clause
+                values.append(student_id)  # for WHERE clause
+
+                # Old SHID too: the update may rename it
+                await cur.execute("SELECT shid FROM Student WHERE sid = %s FOR UPDATE", (student_id,))
+                old = await cur.fetchone()
             
-            query = f"UPDATE Student SET {', '.join(update_fields)} WHERE sid = %s RETURNING *"
-            cur.execute(query, values)
-            updated_student = cur.fetchone()
+                query = f"UPDATE Student SET {', '.join(update_fields)} WHERE sid = %s RETURNING shid"
+                await cur.execute(query, values)
+                updated_student = await cur.fetchone()
             
-            if not updated_student:
-                raise HTTPException(status_code=404, detail="Student not found")
+                if not updated_student:
+                    raise HTTPException(status_code=404, detail="Student not found")
             
-            conn.commit()
-            conn.close()
+                await conn.commit()
+                dashboard_cache.invalidate(old[0], updated_student[0])
+                identity_cache.invalidate(old[0], updated_student[0])
             
-            return {
-                "status": "success",
-                "message": "Student updated successfully"
-            }
+                return {
+                    "status": "success",
+                    "message": "Student updated successfully"
+                }
             
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Error updating student: {str(e)}")
 
+@router.post("/admin/students/import")
+async def import_students(request: Request, reset_passwords: bool = False, dry_run: bool = False):
+    """
+    Bulk-create or update students from a CSV request body (text/csv; see
+    student_import.py for the columns). All rows or none: problems come back
+    as 422 with the offending lines. Passwords are hashed inside the request,
+    so large files (thousands of new logins) should go through the
+    student_import.py CLI instead, or be sent in parts.
+    """
+    current_admin = get_current_admin(request)
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > student_import.IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="CSV file is too large")
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+
+    try:
+        report, shids = await student_import.import_students(text, reset_passwords, dry_run)
+    except student_import.ImportRejected as e:
+        raise HTTPException(status_code=422, detail={"message": str(e), "errors": e.errors})
+    # New SHIDs too: a lookup just before the import may have cached "not found"
+    dashboard_cache.invalidate(*shids)
+    identity_cache.invalidate(*shids)
+    print(f"📥 Student import by {current_admin['email']}: {report['rows']} rows"
+          f"{' (dry run)' if dry_run else ''}")
+    return report
+
 # ─────────────────────── PROTECTED ADMIN ROUTES ───────────────────────
 
+ADMIN_STUDENTS = Listing(
+    "s.sid, s.name, s.mail, s.phone, s.dob, s.shid, s.hid", "Student s", "s.sid",
+    {"name": Sort("COALESCE(s.name, '')", nullable=False), "sid": Sort("s.sid", nullable=False)},
+    "name",
+    filters={"hostel": Filter("s.hid = %s", int), "shid": Filter("s.shid = %s")},
+)
+
+ADMIN_WARDENS = Listing(
+    "wid, name, mail, phone, password, hid", "Warden", "wid",
+    {"name": Sort("COALESCE(name, '')", nullable=False), "wid": Sort("wid", nullable=False)},
+    "name",
+    filters={"hostel": Filter("hid = %s", int)},
+)
+
 @router.get("/admin/students")
-def get_all_students(request: Request):
+async def get_all_students(request: Request, response: Response, cursor: Optional[str] = None,
+                           limit: Optional[int] = None, sort: Optional[str] = None,
+                           conn=Depends(get_async_db)):
     """
-    Get all students. (Protected admin endpoint)
+    One page of students, by name. (Protected admin endpoint)
+    The next cursor and estimated total are in the X-Next-Cursor and
+    X-Estimated-Total headers.
     """
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT 
-                s.sid, s.name, s.mail, s.phone, s.dob, s.shid,
-                s.hid
-            FROM Student s
-            ORDER BY s.name
-        """)
-        students = cur.fetchall()
+    page = await fetch_page(conn, ADMIN_STUDENTS, request, cursor=cursor, limit=limit, sort=sort)
+    page_headers(response, page)
 
     return [
         {
@@ -723,19 +803,20 @@ def get_all_students(request: Request):
             "shid": student[5],
             "hid": student[6]
         }
-        for student in students
+        for student in page.rows
     ]
 
 @router.get("/admin/wardens")
-def get_all_wardens(request: Request):
+async def get_all_wardens(request: Request, response: Response, cursor: Optional[str] = None,
+                          limit: Optional[int] = None, sort: Optional[str] = None,
+                          conn=Depends(get_async_db)):
     """
-    Get all wardens. (Protected admin endpoint)
+    One page of wardens, by name. (Protected admin endpoint)
+    Paging headers as for /admin/students.
     """
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("SELECT wid, name, mail, phone, password, hid FROM Warden ORDER BY name")
-        wardens = cur.fetchall()
+    page = await fetch_page(conn, ADMIN_WARDENS, request, cursor=cursor, limit=limit, sort=sort)
+    page_headers(response, page)
 
     return [
         {
@@ -746,20 +827,20 @@ def get_all_wardens(request: Request):
             "password": warden[4],
             "hid": warden[5]
         }
-        for warden in wardens
+        for warden in page.rows
     ]
 
 @router.put("/admin/wardens/{warden_id}")
-def update_warden(
+async def update_warden(
     warden_id: int,
     warden_update: WardenUpdate,
-    request: Request
+    request: Request,
+    conn=Depends(get_async_db)
 ):
     """
     Update warden details. (Protected admin endpoint)
     """
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
     # Build dynamic update query
     update_fields = []
     values = []
@@ -785,15 +866,15 @@ def update_warden(
     
     values.append(warden_id)  # for WHERE clause
     
-    with conn.cursor() as cur:
+    async with conn.cursor(row_factory=dict_row) as cur:
         query = f"UPDATE Warden SET {', '.join(update_fields)} WHERE wid = %s RETURNING *"
-        cur.execute(query, values)
-        updated_warden = cur.fetchone()
+        await cur.execute(query, values)
+        updated_warden = await cur.fetchone()
         
         if not updated_warden:
             raise HTTPException(status_code=404, detail="Warden not found")
         
-        conn.commit()
+        await conn.commit()
     
     return {
         "status": "success",
@@ -809,22 +890,22 @@ def update_warden(
     }
 
 @router.delete("/admin/wardens/{warden_id}")
-def delete_warden(
+async def delete_warden(
     warden_id: int,
-    request: Request
+    request: Request,
+    conn=Depends(get_async_db)
 ):
     """
     Delete a warden. (Protected admin endpoint)
     """
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    with conn.cursor() as cur:
-        cur.execute("DELETE FROM Warden WHERE wid = %s", (warden_id,))
+    async with conn.cursor() as cur:
+        await cur.execute("DELETE FROM Warden WHERE wid = %s", (warden_id,))
         
         if cur.rowcount == 0:
             raise HTTPException(status_code=404, detail="Warden not found")
         
-        conn.commit()
+        await conn.commit()
     
     return {
         "status": "success",
@@ -832,26 +913,29 @@ def delete_warden(
     }
 
 @router.delete("/admin/students/{student_id}")
-def delete_student(
+async def delete_student(
     student_id: int,
-    request: Request
+    request: Request,
+    conn=Depends(get_async_db)
 ):
     """
     Delete a student. (Protected admin endpoint)
     """
     current_admin = get_current_admin(request)
-    conn = get_db_connection()
-    with conn.cursor() as cur:
+    async with conn.cursor() as cur:
         # First delete from StudentRoom if exists
-        cur.execute("DELETE FROM StudentRoom WHERE sid = %s", (student_id,))
+        await cur.execute("DELETE FROM StudentRoom WHERE sid = %s", (student_id,))
         
         # Then delete from Student
-        cur.execute("DELETE FROM Student WHERE sid = %s", (student_id,))
+        await cur.execute("DELETE FROM Student WHERE sid = %s RETURNING shid", (student_id,))
+        deleted = await cur.fetchone()
         
-        if cur.rowcount == 0:
+        if not deleted:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        conn.commit()
+        await conn.commit()
+    dashboard_cache.invalidate(deleted[0])
+    identity_cache.invalidate(deleted[0])
     
     return {
         "status": "success",
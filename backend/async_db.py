@@ -0,0 +1,75 @@
+# backend/async_db.py - psycopg 3 async data-access layer used by all routers
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from psycopg import AsyncConnection
+from psycopg_pool import AsyncConnectionPool
+
+from db import (
+    conninfo, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_CHECK_AFTER
+)
+
+_pool: AsyncConnectionPool = None
+
+
+def get_pool() -> AsyncConnectionPool:
+    """Return the process-wide async pool, creating it (unopened) on first use."""
+    global _pool
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            conninfo(),
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            timeout=DB_POOL_TIMEOUT,
+            max_idle=max(DB_POOL_CHECK_AFTER, 60),
+            check=AsyncConnectionPool.check_connection,
+            name="hostel",
+            open=False,
+        )
+    return _pool
+
+
+async def open_pool():
+    await get_pool().open(wait=False)
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def pool_stats() -> dict:
+    """Pool size, in-use/waiting counts and average checkout latency."""
+    pool = get_pool()
+    stats = pool.get_stats()
+    served = stats.get("requests_num", 0)
+    return {
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "size": stats.get("pool_size", 0),
+        "idle": stats.get("pool_available", 0),
+        "in_use": stats.get("pool_size", 0) - stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "checkouts": served,
+        "timeouts": stats.get("requests_errors", 0),
+        "checkout_ms_avg": round(stats.get("requests_wait_ms", 0) / served, 3) if served else 0.0,
+        "connections_lost": stats.get("connections_lost", 0),
+    }
+
+
+@asynccontextmanager
+async def connection() -> AsyncIterator[AsyncConnection]:
+    """
+    Borrow a connection for the duration of the block.
+    The transaction is committed on normal exit and rolled back on error.
+    """
+    async with get_pool().connection() as conn:
+        yield conn
+
+
+async def get_async_db() -> AsyncIterator[AsyncConnection]:
+    """Request-scoped FastAPI dependency yielding a pooled async connection."""
+    async with connection() as conn:
+        yield conn
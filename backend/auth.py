@@ -3,9 +3,12 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 import jwt
 import os
+import time
 from fastapi import HTTPException, Request, Response, Depends
 from dotenv import load_dotenv
 
+from cache import jwt_cache, MISSING
+
 load_dotenv()
 
 # JWT Configuration
@@ -56,15 +59,34 @@ def create_refresh_token(data: Dict[str, Any]) -> str:
     return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 def verify_jwt_token(token: str) -> Dict[str, Any]:
-    """Verify and decode a JWT token."""
+    """
+    Verify and decode a JWT token.
+    Verified payloads are cached by the token's signature segment, already an
+    HMAC of the rest, so polling dashboards skip decoding and the HMAC check;
+    `exp` is still enforced on every hit.
+    """
+    key = token.rpartition(".")[2]
+    cached = jwt_cache.get(key)
+    # Same signature on another header/payload is not the token we verified
+    if cached is not MISSING and cached[0] == token:
+        payload = cached[1]
+        if payload["exp"] <= time.time():
+            jwt_cache.invalidate(key)
+            raise HTTPException(status_code=401, detail="Token has expired")
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        jwt_cache.set(key, (token, dict(payload)), ttl=min(remaining, jwt_cache.ttl))
+    return payload
+
 def set_auth_cookies(response: Response, access_token: str, refresh_token: str, role: str):
     """Set HttpOnly authentication cookies with production subdomain support."""
     log_auth_debug(f"Setting cookies for role: {role}, domain: {COOKIE_DOMAIN}, secure: {COOKIE_SECURE}, samesite: {COOKIE_SAMESITE}")
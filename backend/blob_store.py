@@ -0,0 +1,245 @@
+# backend/blob_store.py - content-addressed on-disk storage for complaint proofs
+#
+# Blobs live at <BLOB_STORE_DIR>/<sha[0:2]>/<sha[2:4]>/<sha>, keyed by the
+# SHA-256 of their bytes, so identical uploads are stored once. The database
+# only keeps the hex digest (plus MIME type and size) in Complaint.ProofHash.
+import os
+import re
+import base64
+import binascii
+import hashlib
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BLOB_STORE_DIR = os.getenv(
+    "BLOB_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "blobs"),
+)
+BLOB_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_PROOF_MIME = "image/png"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_RE = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(;[\w=.-]+)*;base64,", re.IGNORECASE)
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class InvalidProofData(ValueError):
+    pass
+
+
+class BlobTooLarge(ValueError):
+    pass
+
+
+# ───────────────────────── PATHS ──────────────────────────
+
+def blob_path(digest: str) -> str:
+    """Sharded path for a digest. Rejects anything that isn't a SHA-256 hex string."""
+    if not _DIGEST_RE.match(digest or ""):
+        raise BlobNotFound(f"Invalid blob digest: {digest!r}")
+    return os.path.join(BLOB_STORE_DIR, digest[:2], digest[2:4], digest)
+
+
+def exists(digest: str) -> bool:
+    try:
+        return os.path.isfile(blob_path(digest))
+    except BlobNotFound:
+        return False
+
+
+def blob_size(digest: str) -> int:
+    try:
+        return os.path.getsize(blob_path(digest))
+    except OSError:
+        raise BlobNotFound(digest)
+
+
+# ───────────────────────── WRITING ──────────────────────────
+
+def _commit_temp_file(temp_path: str, digest: str) -> str:
+    """Move a fully written temp file to its content address (no-op if already stored)."""
+    path = blob_path(digest)
+    try:
+        # Already stored: refresh mtime so a concurrent retire() keeps it
+        os.utime(path)
+        os.unlink(temp_path)
+        return digest
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(temp_path, path)
+    return digest
+
+
+class BlobWriter:
+    """
+    Write a blob incrementally: bytes go to a temp file and into a running
+    SHA-256, so nothing is held in memory. commit() moves the file to its
+    content address; leaving the `with` block without committing discards it.
+    Blocking file I/O.
+    """
+
+    HEAD_SIZE = 16
+
+    def __init__(self, max_size: Optional[int] = None):
+        os.makedirs(BLOB_STORE_DIR, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=BLOB_STORE_DIR, prefix=".upload-")
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.max_size = max_size
+        self.size = 0
+        self.head = b""  # first bytes, for sniffing the file type
+        self.digest: Optional[str] = None
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise BlobTooLarge(f"Blob exceeds {self.max_size} bytes")
+        if len(self.head) < self.HEAD_SIZE:
+            self.head += data[:self.HEAD_SIZE - len(self.head)]
+        self._hash.update(data)
+        self._file.write(data)
+
+    def commit(self) -> str:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self.digest = _commit_temp_file(self.temp_path, self._hash.hexdigest())
+        return self.digest
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.digest is None:
+            self.abort()
+
+
+def put_bytes(data: bytes) -> str:
+    """Store `data` and return its SHA-256 hex digest. Blocking file I/O."""
+    digest = hashlib.sha256(data).hexdigest()
+    try:
+        os.utime(blob_path(digest))  # as in _commit_temp_file
+        return digest
+    except FileNotFoundError:
+        pass
+
+    with BlobWriter() as writer:
+        writer.write(data)
+        return writer.commit()
+
+
+# ───────────────────────── REMOVING ──────────────────────────
+# Blobs are shared by content, so one is removed in two steps around a
+# reference check in the database: retire() moves it aside unless it was
+# written or deduplicated onto since `since`, then settle() deletes it or puts
+# it back. An upload racing with this either refreshed the mtime first (and
+# retire() backs off) or finds no blob and stores its own copy.
+
+def retire(digest: str, since: float) -> Optional[str]:
+    """Move a blob aside; the tombstone path, or None if it is missing or in use since `since`."""
+    path = blob_path(digest)
+    tombstone = os.path.join(BLOB_STORE_DIR, f".retired-{digest}")
+    try:
+        os.replace(path, tombstone)
+    except FileNotFoundError:
+        return None
+    if os.stat(tombstone).st_mtime >= since:
+        settle(digest, tombstone, referenced=True)
+        return None
+    return tombstone
+
+
+def settle(digest: str, tombstone: str, referenced: bool):
+    """Finish a retire(): put the blob back if still referenced, else delete it."""
+    path = blob_path(digest)
+    if referenced and not os.path.exists(path):
+        os.replace(tombstone, path)
+    else:
+        os.unlink(tombstone)
+
+
+# ───────────────────────── READING ──────────────────────────
+
+def read_bytes(digest: str) -> bytes:
+    try:
+        with open(blob_path(digest), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        raise BlobNotFound(digest)
+
+
+def iter_blob(digest: str, start: int = 0, end: Optional[int] = None,
+              chunk_size: int = BLOB_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the blob (or the inclusive byte range start..end) in chunks."""
+    try:
+        f = open(blob_path(digest), "rb")
+    except FileNotFoundError:
+        raise BlobNotFound(digest)
+
+    with f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+# ───────────────────────── DATA URLS ──────────────────────────
+
+_MAGIC_NUMBERS = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_mime(data: bytes, default: Optional[str] = DEFAULT_PROOF_MIME) -> Optional[str]:
+    """Image type from the first bytes; `default` if they match no known format."""
+    for magic, mime in _MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return default
+
+
+def decode_data_url(value: str) -> Tuple[bytes, str]:
+    """
+    Decode a `data:<mime>;base64,...` URL, or bare base64 as the student
+    dashboard sends it, into (bytes, mime). Raises InvalidProofData if the
+    payload isn't base64.
+    """
+    value = value.strip()
+    mime = None
+    match = _DATA_URL_RE.match(value)
+    if match:
+        mime = match.group(1) and match.group(1).lower()
+        value = value[match.end():]
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidProofData(f"Proof image is not valid base64: {e}")
+    return data, mime or sniff_mime(data)
+
+
+def to_data_url(data: bytes, mime: Optional[str]) -> str:
+    return f"data:{mime or DEFAULT_PROOF_MIME};base64,{base64.b64encode(data).decode()}"
@@ -0,0 +1,129 @@
+# backend/cache.py - bounded in-process LRU + TTL caches for hot read paths
+#
+# Caches are per process: with several uvicorn workers each keeps its own copy
+# and an invalidation only reaches the worker that made the write, so every
+# entry also carries a TTL that bounds how stale another worker can be.
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DASHBOARD_CACHE_SIZE = int(os.getenv("DASHBOARD_CACHE_SIZE", "10000"))
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "50000"))
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "300"))
+# Unknown SHIDs are cached too, briefly, so a typo or a scan can't hammer the DB
+IDENTITY_NEGATIVE_TTL = float(os.getenv("IDENTITY_NEGATIVE_TTL", "30"))
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWT_CACHE_TTL = float(os.getenv("JWT_CACHE_TTL", "300"))
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU with per-entry expiry and hit/miss counters.
+
+    Reads that race a write are guarded by versions: take `token = version()`
+    before querying the database and pass it to set(). If the key was
+    invalidated after the token was taken, the (possibly stale) value is
+    dropped instead of cached.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._invalidated_floor = 0  # highest version trimmed from _invalidated
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, token: Optional[int] = None, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if token is not None and self._invalidated.get(key, self._invalidated_floor) > token:
+                return False
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, *keys: Hashable):
+        with self._lock:
+            self._version += 1
+            for key in keys:
+                self._data.pop(key, None)
+                self._invalidated[key] = self._version
+                self._invalidated.move_to_end(key)
+                self.invalidations += 1
+            while len(self._invalidated) > self.maxsize:
+                _, version = self._invalidated.popitem(last=False)
+                self._invalidated_floor = max(self._invalidated_floor, version)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+            self._invalidated.clear()
+            self._invalidated_floor = self._version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# ───────────────────────── SHARED CACHES ──────────────────────────
+
+# Student dashboard payloads by SHID; invalidated by every complaint write
+dashboard_cache = TTLCache("dashboard", DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+
+# SHID -> StudentIdentity (None for unknown SHIDs); invalidated by admin student writes
+identity_cache = TTLCache("identity", IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+
+# JWT signature segment -> (token, verified payload); entries never outlive the token's exp
+jwt_cache = TTLCache("jwt", JWT_CACHE_SIZE, JWT_CACHE_TTL)
+
+_caches = [dashboard_cache, identity_cache, jwt_cache]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {c.name: c.stats() for c in _caches}
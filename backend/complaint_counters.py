@@ -0,0 +1,134 @@
+# backend/complaint_counters.py - per-hostel complaint totals and their repair job
+#
+#   python complaint_counters.py              recount every hostel, fix drift
+#   python complaint_counters.py --hostel 3   just one hostel
+#   python complaint_counters.py --dry-run    report drift, change nothing
+#
+# Triggers from migration 0009 keep ComplaintCounter in step with Complaint in
+# the writer's own transaction, so the stats routes read (hostel, type,
+# status) rows instead of counting complaints. Counters only drift if a write
+# bypasses the triggers (disabled triggers, a restore of one table alone);
+# the job recounts one hostel at a time while holding a lock that makes
+# complaint writes wait, so each hostel blocks writers only for its own
+# recount, and a write can't commit between the recount and the fix.
+import sys
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from db import connect
+
+Counts = Dict[Tuple[str, str], int]  # (type, status) -> complaints
+
+
+HOSTEL_STATUS_SQL = """
+    SELECT Status, SUM(Total)::BIGINT FROM ComplaintCounter
+    WHERE HID = %s
+    GROUP BY Status
+"""
+
+
+async def hostel_status_counts(conn, hid: int) -> Dict[str, int]:
+    """Status -> complaints for one hostel."""
+    cur = await conn.execute(HOSTEL_STATUS_SQL, (hid,))
+    return {status: total for status, total in await cur.fetchall()}
+
+
+async def type_status_counts(conn) -> Counts:
+    """(type, status) -> complaints across every hostel."""
+    cur = await conn.execute("""
+        SELECT Type, Status, SUM(Total)::BIGINT FROM ComplaintCounter
+        GROUP BY Type, Status
+    """)
+    return {(type_, status): total for type_, status, total in await cur.fetchall()}
+
+
+# ───────────────────────── RECONCILIATION ──────────────────────────
+
+RECOUNT_SQL = """
+    SELECT COALESCE(c.Type, ''), COALESCE(c.Status, ''), COUNT(*)
+    FROM Complaint c
+    JOIN Student s ON s.SID = c.SID
+    WHERE s.HID = %s
+    GROUP BY 1, 2
+"""
+
+# HID 0: complaints with no student, or a student with no hostel
+# (two branches rather than a LEFT JOIN, so both stay on the SID/HID indexes)
+RECOUNT_UNASSIGNED_SQL = """
+    SELECT COALESCE(Type, ''), COALESCE(Status, ''), COUNT(*)
+    FROM (
+        SELECT c.Type, c.Status FROM Complaint c
+        JOIN Student s ON s.SID = c.SID
+        WHERE s.HID IS NULL
+        UNION ALL
+        SELECT Type, Status FROM Complaint WHERE SID IS NULL
+    ) unassigned
+    GROUP BY 1, 2
+"""
+
+
+def reconcile_hostel(conn, hid: int, dry_run: bool = False) -> int:
+    """Recount one hostel and overwrite counters that differ. Returns how many differed."""
+    with conn.cursor() as cur:
+        # Conflicts with the ROW EXCLUSIVE lock the triggers take, so complaint
+        # writes wait here and the recount sees everything committed before
+        cur.execute("LOCK TABLE ComplaintCounter IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute(RECOUNT_UNASSIGNED_SQL if hid == 0 else RECOUNT_SQL, () if hid == 0 else (hid,))
+        actual: Counts = {(t, s): n for t, s, n in cur.fetchall()}
+        cur.execute("SELECT Type, Status, Total FROM ComplaintCounter WHERE HID = %s", (hid,))
+        stored: Counts = {(t, s): n for t, s, n in cur.fetchall()}
+
+        drift = [(key, stored.get(key, 0), actual.get(key, 0))
+                 for key in actual.keys() | stored.keys()
+                 if stored.get(key, 0) != actual.get(key, 0)]
+        for (type_, status), was, now in sorted(drift):
+            print(f"⚠️ Hostel {hid} {type_ or '-'}/{status or '-'}: counter {was}, actual {now}")
+        if drift and not dry_run:
+            cur.executemany("""
+                INSERT INTO ComplaintCounter (HID, Type, Status, Total) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (HID, Type, Status) DO UPDATE SET Total = EXCLUDED.Total
+            """, [(hid, type_, status, now) for (type_, status), _, now in drift])
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    return len(drift)
+
+
+def reconcile(conn, hids: Optional[List[int]] = None, dry_run: bool = False) -> int:
+    """Reconcile the given hostels (default: every hostel, plus HID 0). Returns counters fixed."""
+    if hids is None:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT HID FROM Hostel
+                UNION SELECT HID FROM ComplaintCounter
+                UNION SELECT 0
+                ORDER BY 1
+            """)
+            hids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    return sum(reconcile_hostel(conn, hid, dry_run) for hid in hids)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Recount complaints per hostel and repair ComplaintCounter.")
+    parser.add_argument("--hostel", type=int, action="append", dest="hostels", help="HID to check (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without fixing it")
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        drifted = reconcile(conn, args.hostels, args.dry_run)
+    finally:
+        conn.close()
+    if not drifted:
+        print("✔ Complaint counters match")
+    elif args.dry_run:
+        print(f"❌ {drifted} counter(s) drifted")
+        sys.exit(1)
+    else:
+        print(f"✔ Repaired {drifted} counter(s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
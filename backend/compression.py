@@ -0,0 +1,243 @@
+# backend/compression.py - negotiated gzip / brotli responses with a cache
+#
+# The admin routes return multi-MB JSON documents that are mostly identical
+# from one load to the next. CompressionMiddleware picks br or gzip from
+# Accept-Encoding for compressible types above COMPRESS_MIN_BYTES. Large
+# bodies are compressed in the threadpool and kept in a byte-bounded LRU keyed
+# by (BLAKE2 digest of the body, encoding), so a repeated response costs a hash
+# instead of a compression. Keying on content means a changed response can
+# never be served from a stale entry. Streamed bodies are compressed chunk by
+# chunk and not cached. Images, ranges and no-transform responses pass as is.
+import os
+import gzip
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+COMPRESS_CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Below this a body is cheaper to compress again than to hash and store
+COMPRESS_CACHE_MIN_BYTES = int(os.getenv("COMPRESS_CACHE_MIN_BYTES", str(256 * 1024)))
+# Above this, compress in the threadpool instead of on the event loop
+COMPRESS_THREAD_MIN_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """'br', 'gzip' or None from an Accept-Encoding header; br wins ties."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().lower().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    candidates = [("br", weights.get("br", wildcard)), ("gzip", weights.get("gzip", wildcard))]
+    if brotli is None:
+        candidates = candidates[1:]
+    coding, q = max(candidates, key=lambda c: c[1])
+    return coding if q > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes per chunk, so streamed rows reach the client as they come."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush()
+
+
+# ───────────────────────── CACHE ──────────────────────────
+
+class CompressedCache:
+    """LRU of compressed bodies bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[bytes, str], value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            self._total += len(value) - (len(old) if old else 0)
+            self._data[key] = value
+            while self._total > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._total -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "brotli": brotli is not None,
+            }
+
+
+cache = CompressedCache(COMPRESS_CACHE_BYTES)
+
+
+def _compress_cached(body: bytes, encoding: str) -> bytes:
+    """Blocking; large bodies come through here in the threadpool."""
+    if len(body) < COMPRESS_CACHE_MIN_BYTES:
+        return compress(body, encoding)
+    key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(body, encoding)
+        cache.put(key, compressed)
+    return compressed
+
+
+# ───────────────────────── MIDDLEWARE ──────────────────────────
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(encoding, self.minimum_size, send))
+
+
+class _CompressingSend:
+    def __init__(self, encoding: str, minimum_size: int, send):
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = send
+        self.start: Optional[dict] = None
+        self.mode = None  # None until the first body message: "pass" | "stream"
+        self.compressor: Optional[_StreamCompressor] = None
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return (200 <= self.start["status"] < 300 and self.start["status"] not in (204, 206)
+                and "content-encoding" not in headers
+                and "content-range" not in headers
+                and "no-transform" not in headers.get("cache-control", "")
+                and content_type.startswith(COMPRESSIBLE_TYPES))
+
+    def _set_encoded_headers(self, headers: MutableHeaders, length: Optional[int]):
+        headers["Content-Encoding"] = self.encoding
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The bytes differ per encoding, so only a weak validator still holds
+            headers["ETag"] = "W/" + etag
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = MutableHeaders(scope=message)
+            if not self._eligible(headers):
+                self.mode = "pass"
+                await self.send(message)
+            else:
+                headers.add_vary_header("Accept-Encoding")
+            return
+
+        if message["type"] != "http.response.body" or self.mode == "pass":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(scope=self.start)
+
+        if self.mode is None and not more_body:
+            # Whole body in one message: the usual JSON response
+            self.mode = "pass"
+            if len(body) < self.minimum_size:
+                await self.send(self.start)
+                await self.send(message)
+                return
+            if len(body) >= COMPRESS_THREAD_MIN_BYTES:
+                compressed = await run_in_threadpool(_compress_cached, body, self.encoding)
+            else:
+                compressed = _compress_cached(body, self.encoding)
+            self._set_encoded_headers(headers, len(compressed))
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.mode is None:
+            self.mode = "stream"
+            self.compressor = _StreamCompressor(self.encoding)
+            self._set_encoded_headers(headers, None)
+            await self.send(self.start)
+
+        data = self.compressor.chunk(body) if body else b""
+        if not more_body:
+            data += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
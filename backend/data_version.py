@@ -0,0 +1,61 @@
+# backend/data_version.py - version tokens and conditional GET for dashboard reads
+#
+# Triggers from migration 0008 bump a DataVersion row whenever a student's
+# complaints, a hostel's complaints or a hostel's rooms/wardens change. A read
+# route fetches the rows it depends on (a primary-key lookup), turns them into
+# an ETag and answers a matching If-None-Match with 304 before running any of
+# its aggregates. Versions are read before the body is built, so a write that
+# lands in between can only make the body newer than its tag, never older:
+# the next request then sees a new tag and gets the full response.
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from proof_http import etag_for, etag_matches, not_modified, REVALIDATE_CACHE_CONTROL
+
+STUDENT = "student"      # SID: the student's row and their complaints
+HOSTEL = "hostel"        # HID: complaints and students of the hostel
+RESIDENCE = "residence"  # HID: the hostel row, its wardens and rooms
+
+VERSIONS_SQL = """
+    SELECT Scope, ScopeID, Version FROM DataVersion
+    WHERE Scope = ANY(%s) AND ScopeID = ANY(%s)
+"""
+
+# Complaints only drop out of "recent_30_days" with time, not with a write,
+# so the oldest complaint still inside the window is part of the tag
+SUMMARY_TOKEN_SQL = """
+    SELECT (SELECT COALESCE(SUM(Version), 0) FROM DataVersion WHERE Scope = 'hostel'),
+           (SELECT EXTRACT(EPOCH FROM MIN(Created_at))::BIGINT FROM Complaint
+            WHERE Created_at >= NOW() - INTERVAL '30 days')
+"""
+
+
+async def versions(conn, *keys: Tuple[str, int]) -> Tuple[int, ...]:
+    """Current version of each (scope, id); 0 for rows nothing has bumped yet."""
+    cur = await conn.execute(VERSIONS_SQL, ([k[0] for k in keys], [k[1] or 0 for k in keys]))
+    found: Dict[Tuple[str, int], int] = {(scope, scope_id): v for scope, scope_id, v in await cur.fetchall()}
+    return tuple(found.get((scope, scope_id or 0), 0) for scope, scope_id in keys)
+
+
+async def summary_token(conn) -> str:
+    """Tag for the admin-wide complaint summary."""
+    cur = await conn.execute(SUMMARY_TOKEN_SQL)
+    total, oldest_recent = await cur.fetchone()
+    return f"{total}.{oldest_recent or 0}"
+
+
+def make_tag(name: str, *parts) -> str:
+    return "-".join(str(p) for p in (name, *parts))
+
+
+def conditional(request: Request, response: Response, tag: str) -> Optional[Response]:
+    """
+    304 if the client already holds `tag`. Otherwise stamp the ETag on the
+    route's response and return None, and the route builds the body.
+    """
+    if etag_matches(request, tag):
+        return not_modified(tag, REVALIDATE_CACHE_CONTROL)
+    response.headers["ETag"] = etag_for(tag)
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return None
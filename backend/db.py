@@ -1,22 +1,26 @@
 # db.py — FINAL VERSION
 import os
+import base64
 import random
 from datetime import datetime, timedelta
 import psycopg2
+import psycopg2.extensions
 import bcrypt
 from dotenv import load_dotenv
 
+import blob_store
+
 # Load environment variables from .env file
 load_dotenv()
 
 
 
-def get_db_connection():
-
+def conninfo() -> str:
+    """Build the libpq connection string shared by the sync (psycopg2) and async (psycopg 3) layers."""
     # Allow a full DATABASE_URL (e.g. from Render, Heroku) or individual components
     database_url = os.getenv("DATABASE_URL")
     if database_url:
-        return psycopg2.connect(database_url)
+        return database_url
 
     dbname = os.getenv("DB_NAME")
     user = os.getenv("DB_USER")
@@ -28,8 +32,8 @@ def get_db_connection():
     if missing:
         raise EnvironmentError(f"Missing required DB environment variables: {', '.join(missing)} (or set DATABASE_URL)")
 
-    return psycopg2.connect(
-        database=dbname,
+    return psycopg2.extensions.make_dsn(
+        dbname=dbname,
         user=user,
         password=password,
         host=host,
@@ -37,101 +41,29 @@ def get_db_connection():
     )
 
 
-TABLE_SQL = [
-    "DROP TABLE IF EXISTS Complaint, UserAuth, Student, Room, Warden, Hostel, Admin  CASCADE",
+def connect():
+    """Open a new psycopg2 connection from the environment."""
+    return psycopg2.connect(conninfo())
 
-    """
-    CREATE TABLE Hostel (
-        HID SERIAL PRIMARY KEY,
-        Name VARCHAR(100),
-        Location VARCHAR(100),
-        NumberOfRooms INT
-    )
-    """,
-
-    """
-    CREATE TABLE Warden (
-        WID SERIAL PRIMARY KEY,
-        Name VARCHAR(100),
-        Mail VARCHAR(100),
-        Phone VARCHAR(20),
-        Password VARCHAR(100),
-        HID INT REFERENCES Hostel(HID) ON DELETE CASCADE
-    )
-    """,
-
-    """
-    CREATE TABLE Room (
-        RID SERIAL PRIMARY KEY,
-        RoomNumber VARCHAR(20),
-        Capacity INT,
-        HID INT REFERENCES Hostel(HID)
-    )
-    """,
-
-    """
-    CREATE TABLE Student (
-        SID SERIAL PRIMARY KEY,
-        Name VARCHAR(100),
-        Phone VARCHAR(20),
-        Mail VARCHAR(100),
-        DOB DATE,
-        HID INT REFERENCES Hostel(HID),
-        SHID VARCHAR(50) UNIQUE
-    )
-    """,
 
-    """
-    CREATE TABLE UserAuth (
-        UID SERIAL PRIMARY KEY,
-        SHID VARCHAR(50) REFERENCES Student(SHID),
-        PSWD VARCHAR(100)
-    )
-    """,
-
-    """
-    CREATE TABLE Complaint (
-        CID SERIAL PRIMARY KEY,
-        SID INT REFERENCES Student(SID),
-        Type VARCHAR(100),
-        Created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        Status VARCHAR(50) DEFAULT 'Pending',
-        Description TEXT,
-        ProofImage TEXT,
-        WithdrawCount INT DEFAULT 0,
-        IsWithdrawn BOOLEAN DEFAULT FALSE
-    )
-    """,
-    """
-    CREATE TABLE Admin (
-        AID         SERIAL PRIMARY KEY,
-        Email       VARCHAR(150) UNIQUE NOT NULL,
-        Password    VARCHAR(100)        NOT NULL,
-        Name        VARCHAR(100),
-        Created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """,
-    """
-    CREATE TABLE Ticket (
-    TID SERIAL PRIMARY KEY,                      -- Unique Ticket ID
-    CID INT REFERENCES Complaint(CID) ON DELETE CASCADE,  -- Linked Complaint
-    RaisedBySID INT REFERENCES Student(SID),    -- Student who raised the ticket
-    WID INT REFERENCES Warden(WID),             -- Assigned Warden (if any)
-    Title VARCHAR(150) NOT NULL,                -- Short title for the ticket
-    Description TEXT,                            -- Additional details or follow-up
-    Status VARCHAR(50) DEFAULT 'Open',          -- Ticket status (Open, In Progress, Resolved, Closed)
-    Priority VARCHAR(50) DEFAULT 'Normal',      -- Priority level (Low, Normal, High)
-    EscalationLevel INT DEFAULT 0,              -- Track escalation steps
-    Created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- Ticket creation time
-    Updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- Last updated timestamp
-);
-
-    """
-]
+# ───────────────────────── CONNECTION POOL SETTINGS ──────────────────────────
+# Read by the psycopg 3 async pool in async_db.py; scripts and CLI tools open
+# their own connection with connect().
+
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+# async_db closes pooled connections idle for longer than max(this, 60) seconds
+DB_POOL_CHECK_AFTER = float(os.getenv("DB_POOL_CHECK_AFTER", 30))
+
+
+# Destructive reset used by `python db.py` for local/demo databases only.
+# The schema itself lives in migrations/ and is applied by migrate.py.
+RESET_SQL = "DROP TABLE IF EXISTS ComplaintCounter, DataVersion, EmailOutbox, Ticket, Complaint, UserAuth, Student, Room, Warden, Hostel, Admin, schema_migrations CASCADE"
 
 # ────────────────────────────────────────────────────────────────
 # helper to create the Admin table *and* seed two default admins
-# call this just after the other TABLE_SQL statements run
+# call this just after the migrations have been applied
 # ────────────────────────────────────────────────────────────────
 def create_admin_table_and_seed(cursor):
     cursor.execute("""
@@ -217,12 +149,9 @@ def seed_boys_hostel_demo_data(cursor):
         students,
     )
 
-    # UserAuth
-    auth_rows = []
-    for s in students:
-        shid = s[5]
-        hashed = bcrypt.hashpw(b"1", bcrypt.gensalt()).decode()
-        auth_rows.append((shid, hashed))
+    # UserAuth (every demo student shares password "1", so hash it once)
+    hashed = bcrypt.hashpw(b"1", bcrypt.gensalt()).decode()
+    auth_rows = [(s[5], hashed) for s in students]
 
     cursor.executemany(
         "INSERT INTO UserAuth (SHID, PSWD) VALUES (%s, %s)",
@@ -236,25 +165,32 @@ def seed_boys_hostel_demo_data(cursor):
     complaint_types = ["Water Leakage", "Electricity Issue", "WiFi Problem", "Cleanliness", "Furniture Broken"]
     complaints = []
 
+    # 1x1 PNG, stored once in the blob store and shared by every demo complaint
+    proof = base64.b64decode(
+        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+    )
+    proof_hash = blob_store.put_bytes(proof)
+
     for sid in selected_sids:
         comp_type = random.choice(complaint_types)
         description = f"{comp_type} needs urgent attention."
-        proof = "data:image/png;base64,sampleproofstring"
-        complaints.append((sid, comp_type, description, proof))
+        complaints.append((sid, comp_type, description, proof_hash, "image/png", len(proof)))
 
     cursor.executemany(
-        "INSERT INTO Complaint (SID, Type, Description, ProofImage) VALUES (%s, %s, %s, %s)",
+        "INSERT INTO Complaint (SID, Type, Description, ProofHash, ProofMime, ProofSize) VALUES (%s, %s, %s, %s, %s, %s)",
         complaints,
     )
 
 
 def main():
-    conn = get_db_connection()
+    from migrate import apply_migrations
+
+    conn = connect()
     conn.autocommit = True
     cursor = conn.cursor()
 
-    for statement in TABLE_SQL:
-        cursor.execute(statement)
+    cursor.execute(RESET_SQL)
+    apply_migrations(conn)
     create_admin_table_and_seed(cursor)
     seed_boys_hostel_demo_data(cursor)
 
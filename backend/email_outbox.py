@@ -0,0 +1,324 @@
+# backend/email_outbox.py - durable outbox and background sender for e-mail
+#
+# Routes insert into EmailOutbox as part of their own transaction and return
+# straight away. A worker task in each app process claims due rows with
+# FOR UPDATE SKIP LOCKED, sends them in batches over one long-lived SMTP
+# session (connect, STARTTLS and login once, not per message) and reschedules
+# failures with exponential backoff. A claim pushes NextAttemptAt out by
+# EMAIL_LEASE_SECONDS, so rows held by a process that died get sent again. A
+# batch stops starting messages while the worst case for one more (a timed-out
+# send, a reconnect and a resend) would outrun the lease, and hands the rest
+# back, so a slow server never gets a message sent twice.
+#
+#   python email_outbox.py      send everything that is due, then exit
+#
+# Locally, point EMAIL_HOST/EMAIL_PORT at a stand-in server and set
+# EMAIL_USE_TLS=false and no EMAIL_PASSWORD, e.g.
+#   python -m smtpd -n -c DebuggingServer localhost:1025    (Python <= 3.11)
+#   python -m aiosmtpd -n -l localhost:1025                 (pip install aiosmtpd)
+import os
+import ssl
+import time
+import random
+import asyncio
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from async_db import connection, open_pool, close_pool
+
+load_dotenv()
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE = float(os.getenv("EMAIL_RETRY_BASE", "30"))  # seconds, doubles per attempt
+EMAIL_RETRY_MAX = float(os.getenv("EMAIL_RETRY_MAX", "3600"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "10"))
+EMAIL_LEASE_SECONDS = int(os.getenv("EMAIL_LEASE_SECONDS", "300"))
+EMAIL_SMTP_IDLE_TIMEOUT = float(os.getenv("EMAIL_SMTP_IDLE_TIMEOUT", "60"))
+EMAIL_SMTP_TIMEOUT = float(os.getenv("EMAIL_SMTP_TIMEOUT", "30"))
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
+EMAIL_MESSAGE_WORST_CASE = 3 * EMAIL_SMTP_TIMEOUT
+
+# ANY(ARRAY(...)) rather than IN (...): the planner can't turn it into a
+# hash join over the whole (ever-growing) table, it looks up the claimed IDs
+CLAIM_SQL = """
+    UPDATE EmailOutbox
+    SET NextAttemptAt = NOW() + make_interval(secs => %s), Attempts = Attempts + 1
+    WHERE ID = ANY(ARRAY(
+        SELECT ID FROM EmailOutbox
+        WHERE Status = 'pending' AND NextAttemptAt <= NOW()
+        ORDER BY NextAttemptAt
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ))
+    RETURNING ID, Recipient, Subject, Body, Attempts
+"""
+
+# Rows a batch ran out of lease for: due again now, and the claim didn't count
+RELEASE_SQL = """
+    UPDATE EmailOutbox SET NextAttemptAt = NOW(), Attempts = Attempts - 1
+    WHERE ID = ANY(%s) AND Status = 'pending'
+"""
+
+Outgoing = Tuple[int, str, str, str, int]  # ID, Recipient, Subject, Body, Attempts
+
+
+async def enqueue(conn, recipient: str, subject: str, body: str) -> int:
+    """Queue a message on the caller's connection; it is sent once they commit. Call outbox.wake() after."""
+    cur = await conn.execute(
+        "INSERT INTO EmailOutbox (Recipient, Subject, Body) VALUES (%s, %s, %s) RETURNING ID",
+        (recipient, subject, body),
+    )
+    return (await cur.fetchone())[0]
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies and refused recipients won't succeed on retry; auth failures are config, so retry."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter so failed rows don't retry in lockstep."""
+    delay = min(EMAIL_RETRY_BASE * 2 ** (attempts - 1), EMAIL_RETRY_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+# ───────────────────────── SMTP SESSION ──────────────────────────
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection reused across messages and batches.
+    Blocking and not thread-safe: only ever used from the outbox's own thread.
+    """
+
+    def __init__(self):
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _connect(self):
+        smtp = smtplib.SMTP(os.getenv("EMAIL_HOST"), int(os.getenv("EMAIL_PORT", "587")),
+                            timeout=EMAIL_SMTP_TIMEOUT)
+        try:
+            smtp.ehlo()
+            if EMAIL_USE_TLS:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if os.getenv("EMAIL_PASSWORD"):
+                smtp.login(os.getenv("EMAIL_SENDER"), os.getenv("EMAIL_PASSWORD"))
+        except BaseException:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connects += 1
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+    def close_if_idle(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > EMAIL_SMTP_IDLE_TIMEOUT:
+            self.close()
+
+    def send(self, msg: EmailMessage):
+        self.close_if_idle()  # servers drop idle sessions; don't find out mid-send
+        if self._smtp is None:
+            self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between batches: one fresh connection, then give up
+            self._smtp = None
+            self._connect()
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+            raise  # message-level failure; smtplib already reset the session
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            self._last_used = time.monotonic()
+
+    def send_batch(self, rows: List[Outgoing],
+                   deadline: Optional[float] = None) -> List[Tuple[int, Optional[Exception]]]:
+        """
+        Send each row, returning (id, error or None). Never raises for a single
+        message. Rows after the first are only started while one more message
+        can finish by `deadline` (time.monotonic()); the rest get no result.
+        """
+        results = []
+        for outbox_id, recipient, subject, body, _ in rows:
+            if results and deadline is not None and time.monotonic() + EMAIL_MESSAGE_WORST_CASE > deadline:
+                break
+            msg = EmailMessage()
+            msg["Subject"] = subject
+            msg["From"] = os.getenv("EMAIL_SENDER")
+            msg["To"] = recipient
+            msg.set_content(body)
+            try:
+                self.send(msg)
+                results.append((outbox_id, None))
+            except Exception as e:
+                results.append((outbox_id, e))
+        return results
+
+
+# ───────────────────────── WORKER ──────────────────────────
+
+class OutboxWorker:
+    def __init__(self):
+        self._session = SMTPSession()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.sent = self.retried = self.failed = self.batches = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()  # bound to the running loop on first use
+            self._task = asyncio.create_task(self._loop())
+
+    async def _in_smtp_thread(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            await self._in_smtp_thread(self._session.close)
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def wake(self):
+        """Start sending now instead of at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _loop(self):
+        while True:
+            self._wake.clear()
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                print("❌ Email outbox error:", e)
+                claimed = 0
+            if claimed == EMAIL_BATCH_SIZE:
+                continue  # probably more due
+            await self._in_smtp_thread(self._session.close_if_idle)
+            try:
+                await asyncio.wait_for(self._wake.wait(), EMAIL_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self) -> int:
+        """Claim one batch of due messages, send it and record the outcome. Returns the batch size."""
+        deadline = time.monotonic() + EMAIL_LEASE_SECONDS  # taken before the lease starts
+        async with connection() as conn:
+            cur = await conn.execute(CLAIM_SQL, (EMAIL_LEASE_SECONDS, EMAIL_BATCH_SIZE))
+            rows = await cur.fetchall()
+            await conn.commit()
+        if not rows:
+            return 0
+
+        results = await self._in_smtp_thread(self._session.send_batch, rows, deadline)
+        attempts = {row[0]: row[4] for row in rows}
+
+        sent_ids = [outbox_id for outbox_id, error in results if error is None]
+        unsent_ids = [row[0] for row in rows[len(results):]]
+        async with connection() as conn:
+            if unsent_ids:
+                await conn.execute(RELEASE_SQL, (unsent_ids,))
+            if sent_ids:
+                await conn.execute("""
+                    UPDATE EmailOutbox SET Status = 'sent', Sent_at = NOW(), LastError = NULL
+                    WHERE ID = ANY(%s)
+                """, (sent_ids,))
+            for outbox_id, error in results:
+                if error is None:
+                    continue
+                give_up = is_permanent(error) or attempts[outbox_id] >= EMAIL_MAX_ATTEMPTS
+                await conn.execute("""
+                    UPDATE EmailOutbox
+                    SET Status = %s, LastError = %s, NextAttemptAt = NOW() + make_interval(secs => %s)
+                    WHERE ID = %s
+                """, ("failed" if give_up else "pending", repr(error)[:1000],
+                      retry_delay(attempts[outbox_id]), outbox_id))
+                self.last_error = repr(error)
+                if give_up:
+                    self.failed += 1
+                    print(f"❌ Gave up on e-mail {outbox_id} after {attempts[outbox_id]} attempt(s):", error)
+                else:
+                    self.retried += 1
+            await conn.commit()
+
+        self.sent += len(sent_ids)
+        self.batches += 1
+        if sent_ids:
+            print(f"📨 Sent {len(sent_ids)}/{len(rows)} queued e-mail(s)")
+        if unsent_ids:
+            print(f"⏳ Handed back {len(unsent_ids)} e-mail(s) the lease had no time left for")
+        return len(rows)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "batches": self.batches,
+            "smtp_connects": self._session.connects,
+            "last_error": self.last_error,
+        }
+
+
+outbox = OutboxWorker()
+
+
+async def pending_stats() -> Dict[str, object]:
+    """Backlog size and the age of its oldest message, for /health/email."""
+    async with connection() as conn:
+        cur = await conn.execute("""
+            SELECT COUNT(*), EXTRACT(EPOCH FROM NOW() - MIN(Created_at))
+            FROM EmailOutbox WHERE Status = 'pending'
+        """)
+        pending, oldest = await cur.fetchone()
+    return {"pending": pending, "oldest_pending_seconds": round(float(oldest), 1) if oldest is not None else None}
+
+
+# ───────────────────────── CLI ──────────────────────────
+
+async def drain() -> int:
+    await open_pool()
+    sent_before = outbox.sent
+    try:
+        while await outbox.run_once():
+            pass
+    finally:
+        await outbox.stop()
+        await close_pool()
+    print(f"✔ Sent {outbox.sent - sent_before} e-mail(s), {outbox.retried} rescheduled, {outbox.failed} failed")
+    return outbox.sent - sent_before
+
+
+if __name__ == "__main__":
+    asyncio.run(drain())
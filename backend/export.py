@@ -0,0 +1,252 @@
+# backend/export.py - complaint exports: CSV straight from COPY, Parquet/Arrow by row group
+#
+#   python export.py -o complaints.csv
+#   python export.py -o september.parquet --start 2026-09-01 --end 2026-10-01
+#   python export.py -o pending.arrow --hostel 3 --status Pending
+#
+# CSV is produced by Postgres itself (COPY (query) TO STDOUT) and passed on in
+# EXPORT_CHUNK_BYTES pieces, so no row is ever turned into Python objects.
+# Parquet and Arrow IPC read EXPORT_ROW_GROUP_ROWS rows at a time from a
+# server-side cursor, convert each batch to columns in the threadpool and
+# write it as one row group / record batch before fetching the next, so
+# memory stays at one batch however many rows are exported.
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import date
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from async_db import connection, open_pool, close_pool
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV only
+    pa = pq = None
+
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(256 * 1024)))
+EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "100000"))
+
+FORMATS = {
+    # format: (media type, file extension)
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+# (column name, SQL expression, Arrow type name)
+COLUMNS = [
+    ("cid", "c.CID", "int32"),
+    ("created_at", "c.Created_at", "timestamp"),
+    ("hid", "s.HID", "int32"),
+    ("hostel", "h.Name", "string"),
+    ("sid", "c.SID", "int32"),
+    ("shid", "s.SHID", "string"),
+    ("student_name", "s.Name", "string"),
+    ("type", "c.Type", "string"),
+    ("status", "c.Status", "string"),
+    ("description", "c.Description", "string"),
+    ("withdraw_count", "c.WithdrawCount", "int32"),
+    ("is_withdrawn", "c.IsWithdrawn", "bool"),
+    ("proof_hash", "c.ProofHash", "string"),
+]
+
+
+class ExportFilters(NamedTuple):
+    hostel: Optional[int] = None
+    status: Optional[str] = None
+    type: Optional[str] = None
+    start: Optional[date] = None  # inclusive
+    end: Optional[date] = None    # exclusive
+
+
+def export_query(filters: ExportFilters) -> Tuple[str, tuple]:
+    conditions, params = [], []
+    if filters.hostel is not None:
+        conditions.append("s.HID = %s")
+        params.append(filters.hostel)
+    if filters.status:
+        conditions.append("c.Status = %s")
+        params.append(filters.status)
+    if filters.type:
+        conditions.append("c.Type = %s")
+        params.append(filters.type)
+    if filters.start:
+        conditions.append("c.Created_at >= %s")
+        params.append(filters.start)
+    if filters.end:
+        conditions.append("c.Created_at < %s")
+        params.append(filters.end)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""
+        SELECT {', '.join(f'{expr} AS {name}' for name, expr, _ in COLUMNS)}
+        FROM Complaint c
+        LEFT JOIN Student s ON s.SID = c.SID
+        LEFT JOIN Hostel h ON h.HID = s.HID
+        {where}
+        ORDER BY c.CID
+    """, tuple(params)
+
+
+def filename(fmt: str, filters: ExportFilters) -> str:
+    parts = ["complaints"]
+    if filters.hostel is not None:
+        parts.append(f"hostel{filters.hostel}")
+    if filters.start or filters.end:
+        parts.append(f"{filters.start or ''}_{filters.end or ''}")
+    return "-".join(parts) + "." + FORMATS[fmt][1]
+
+
+# ───────────────────────── CSV ──────────────────────────
+
+async def iter_csv(filters: ExportFilters) -> AsyncIterator[bytes]:
+    sql, params = export_query(filters)
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            async with cur.copy(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", params) as copy:
+                # COPY hands over one row per message; send them in bigger pieces
+                buffer = bytearray()
+                async for data in copy:
+                    buffer += data
+                    if len(buffer) >= EXPORT_CHUNK_BYTES:
+                        yield bytes(buffer)
+                        buffer.clear()
+                if buffer:
+                    yield bytes(buffer)
+
+
+# ───────────────────────── PARQUET / ARROW ──────────────────────────
+
+class _ChunkSink:
+    """Write-only file object for pyarrow; what it holds is drained after every batch."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _schema():
+    types = {"int32": pa.int32(), "timestamp": pa.timestamp("us"), "string": pa.string(), "bool": pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, _, kind in COLUMNS])
+
+
+class _ColumnarWriter:
+    """Blocking: each call runs in the threadpool and returns the bytes it produced."""
+
+    def __init__(self, fmt: str):
+        self.schema = _schema()
+        self.sink = _ChunkSink()
+        stream = pa.PythonFile(self.sink, mode="w")
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(stream, self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_stream(stream, self.schema)
+        self._parquet = fmt == "parquet"
+
+    def write(self, rows: list) -> bytes:
+        columns = list(zip(*rows))
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(col, type=field.type) for col, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        if self._parquet:
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=len(rows))
+        else:
+            self._writer.write_batch(batch)
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self.sink.drain()
+
+
+async def iter_columnar(fmt: str, filters: ExportFilters) -> AsyncIterator[bytes]:
+    sql, params = export_query(filters)
+    writer = await run_in_threadpool(_ColumnarWriter, fmt)
+    async with connection() as conn:
+        async with conn.cursor(name="complaint_export") as cur:
+            await cur.execute(sql, params)
+            while True:
+                rows = await cur.fetchmany(EXPORT_ROW_GROUP_ROWS)
+                if not rows:
+                    break
+                yield await run_in_threadpool(writer.write, rows)
+    yield await run_in_threadpool(writer.close)
+
+
+def iter_export(fmt: str, filters: ExportFilters) -> AsyncIterator[bytes]:
+    """Raises ValueError for an unknown format, or a columnar one without pyarrow."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {list(FORMATS)}")
+    if fmt == "csv":
+        return iter_csv(filters)
+    if pa is None:
+        raise ValueError(f"{fmt} export needs pyarrow (pip install pyarrow)")
+    return iter_columnar(fmt, filters)
+
+
+# ───────────────────────── CLI ──────────────────────────
+
+async def export_to_file(path: str, fmt: str, filters: ExportFilters) -> int:
+    chunks = iter_export(fmt, filters)
+    await open_pool()
+    started, written = time.perf_counter(), 0
+    try:
+        with open(path, "wb") as out:
+            async for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+    finally:
+        await close_pool()
+    elapsed = time.perf_counter() - started
+    print(f"✔ Wrote {written / 2**20:,.1f} MiB to {path} in {elapsed:.1f}s "
+          f"({written / 2**20 / max(elapsed, 1e-6):,.1f} MiB/s)")
+    return written
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Export complaints as CSV, Parquet or Arrow IPC.")
+    parser.add_argument("-o", "--output", required=True, help="file to write; the extension picks the format")
+    parser.add_argument("--format", choices=list(FORMATS), help="override the format")
+    parser.add_argument("--hostel", type=int)
+    parser.add_argument("--status")
+    parser.add_argument("--type")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day (YYYY-MM-DD), inclusive")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day (YYYY-MM-DD), exclusive")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    filters = ExportFilters(args.hostel, args.status, args.type, args.start, args.end)
+    try:
+        asyncio.run(export_to_file(args.output, fmt, filters))
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
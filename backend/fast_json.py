@@ -0,0 +1,192 @@
+# backend/fast_json.py - orjson responses that skip FastAPI's jsonable_encoder
+#
+# For a route without a response_model, FastAPI passes the return value
+# through jsonable_encoder, a recursive Python walk that rebuilds every dict
+# and list and converts each datetime, before JSONResponse runs json.dumps.
+# orjson serializes dicts, lists, datetimes, dates, UUIDs and enums natively,
+# so routes built with FastJSONRoute hand their plain return value straight
+# to ORJSONResponse. Status codes, headers and cookies set on an injected
+# `response: Response` are carried over as FastAPI itself would.
+#
+#   python fast_json.py      serialization cost of a full page of /admin/complaints and
+#                            /admin/complaints/overdue, jsonable_encoder vs orjson
+import sys
+import time
+import asyncio
+import inspect
+import argparse
+import functools
+from decimal import Decimal
+from typing import Any, Callable, List, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+_RESPONSE_PARAM = "_fast_json_response"
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson leaves to us, converted the way jsonable_encoder does."""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ───────────────────────── ROUTE CLASS ──────────────────────────
+
+def _direct_response(endpoint: Callable, status_code: Optional[int]) -> Callable:
+    """Wrap an endpoint so plain return values come back as an ORJSONResponse."""
+    signature = inspect.signature(endpoint)
+    # FastAPI injects one Response object per request; reuse the endpoint's if it takes one
+    response_param = next((name for name, p in signature.parameters.items()
+                           if inspect.isclass(p.annotation) and issubclass(p.annotation, Response)), None)
+    added = response_param is None
+    if added:
+        response_param = _RESPONSE_PARAM
+        extra = inspect.Parameter(_RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response)
+        signature = signature.replace(parameters=[*signature.parameters.values(), extra])
+
+    def render(content: Any, sub_response: Response) -> Response:
+        if isinstance(content, Response):
+            return content
+        response = ORJSONResponse(content, status_code=sub_response.status_code or status_code or 200)
+        response.raw_headers.extend(sub_response.raw_headers)
+        return response
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            sub_response = kwargs.pop(response_param) if added else kwargs[response_param]
+            return render(await endpoint(*args, **kwargs), sub_response)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):  # still sync, so FastAPI keeps running it in the threadpool
+            sub_response = kwargs.pop(response_param) if added else kwargs[response_param]
+            return render(endpoint(*args, **kwargs), sub_response)
+
+    wrapper.__signature__ = signature
+    wrapper.__fast_json__ = True
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    """
+    APIRoute that skips jsonable_encoder for routes with no response_model and
+    no return annotation. Routes that declare a model, or a response_class
+    other than ORJSONResponse, are left to FastAPI.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        response_class = kwargs.get("response_class")
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        status_code = kwargs.get("status_code")
+        if (not getattr(endpoint, "__fast_json__", False)
+                and isinstance(kwargs.get("response_model", DefaultPlaceholder(None)), DefaultPlaceholder)
+                and inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+                and response_class is ORJSONResponse
+                and (status_code is None or 200 <= status_code < 300 and status_code != 204)):
+            endpoint = _direct_response(endpoint, status_code)
+        super().__init__(path, endpoint, **kwargs)
+
+
+# ───────────────────────── BENCHMARK CLI ──────────────────────────
+
+BENCH_PATHS = ["/admin/complaints", "/admin/complaints/overdue"]
+
+
+def _per_call(fn: Callable, budget: float) -> float:
+    """Best-of-3 mean seconds per call, with enough calls per run to fill `budget` seconds."""
+    started = time.perf_counter()
+    fn()
+    repeat = max(1, int(budget / max(time.perf_counter() - started, 1e-6)))
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best
+
+
+def _arguments(endpoint, request) -> dict:
+    """Call arguments for a route: the request, a blank response, a full page, defaults for the rest."""
+    from fastapi import Response
+    from pagination import PAGE_MAX_LIMIT
+
+    arguments = {}
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        if name == "request":
+            arguments[name] = request
+        elif name == "response":
+            arguments[name] = Response()
+        elif name == "limit":
+            arguments[name] = PAGE_MAX_LIMIT
+        elif parameter.default is not inspect.Parameter.empty:
+            arguments[name] = parameter.default
+    return arguments
+
+
+async def _payloads(paths: List[str]) -> dict:
+    """Raw return values of the route functions, before any encoding."""
+    from starlette.requests import Request
+    import main as app_module
+    from async_db import open_pool, close_pool
+    from auth import create_access_token, UserRole
+
+    token = create_access_token({"email": "bench@local", "name": "bench", "role": UserRole.ADMIN})
+    endpoints = {r.path: r.endpoint for r in app_module.app.routes if isinstance(r, APIRoute)}
+    await open_pool()
+    try:
+        payloads = {}
+        for path in paths:
+            request = Request({"type": "http", "method": "GET", "path": path, "query_string": b"",
+                               "headers": [(b"authorization", f"Bearer {token}".encode())]})
+            endpoint = inspect.unwrap(endpoints[path])
+            payloads[path] = await endpoint(**_arguments(endpoint, request))
+        return payloads
+    finally:
+        await close_pool()
+
+
+def benchmark(paths: List[str], budget: float):
+    from fastapi.encoders import jsonable_encoder
+
+    payloads = asyncio.run(_payloads(paths))
+    print(f"{'route':<26} {'bytes':>10} {'encoder+json ms':>16} {'orjson ms':>10} {'speedup':>8}")
+    for path, content in payloads.items():
+        before = _per_call(lambda: JSONResponse(jsonable_encoder(content)), budget)
+        after = _per_call(lambda: ORJSONResponse(content), budget)
+        size = len(ORJSONResponse(content).body)
+        print(f"{path:<26} {size:>10,} {before * 1000:>16.3f} {after * 1000:>10.3f} {before / after:>7.1f}x")
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Per-request JSON serialization cost, before and after orjson.")
+    parser.add_argument("paths", nargs="*", default=BENCH_PATHS, help="GET routes taking the request plus optional query parameters")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds per timing run")
+    args = parser.parse_args(argv)
+    benchmark(args.paths, args.budget)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,340 @@
+# backend/hashing.py - password hashing off the event loop, in a bounded process pool
+#
+# bcrypt is deliberately slow (~250 ms per hash at the default cost). Run in
+# the default threadpool it competes with every other blocking call, and a
+# login burst fills that pool. Here hashing has its own process pool sized to
+# the cores we want to spend on it, plus a cap on queued work: past the cap
+# callers get HashingOverloaded (503 in the routes) instead of an ever-longer
+# wait, so unrelated traffic keeps flowing.
+#
+# All three roles go through here. The bcrypt cost is calibrated at startup so
+# one verify takes about HASH_TARGET_MS on this CPU (or pinned with
+# HASH_ROUNDS). Every stored hash carries its algorithm and cost ("$2b$12$..."),
+# so after a successful login a hash below the current cost, or a legacy
+# plaintext admin/warden password, is re-hashed in the background.
+#
+#   python hashing.py      logins per second per core at each cost
+import os
+import re
+import sys
+import hmac
+import time
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import bcrypt
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from async_db import connection
+from auth import UserRole
+
+load_dotenv()
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))
+# Unset: calibrate at startup. Set it when several app processes share a host,
+# so they don't calibrate against each other and pick different costs.
+HASH_ROUNDS = int(os.getenv("HASH_ROUNDS")) if os.getenv("HASH_ROUNDS") else None
+HASH_TARGET_MS = float(os.getenv("HASH_TARGET_MS", "250"))
+HASH_MIN_ROUNDS = int(os.getenv("HASH_MIN_ROUNDS", "10"))
+HASH_MAX_ROUNDS = int(os.getenv("HASH_MAX_ROUNDS", "16"))
+# Cost used until start() has calibrated (bcrypt's own default)
+HASH_UNCALIBRATED_ROUNDS = min(max(12, HASH_MIN_ROUNDS), HASH_MAX_ROUNDS)
+
+# bcrypt only looks at the first 72 bytes; passlib truncated silently too
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+_BCRYPT_RE = re.compile(r"^\$2[abxy]\$(\d{2})\$[./A-Za-z0-9]{53}$")
+
+# Swap in the new hash only if the row still holds the one we verified
+_REHASH_SQL = {
+    UserRole.USER: "UPDATE UserAuth SET PSWD = %s WHERE SHID = %s AND PSWD = %s",
+    UserRole.WARDEN: "UPDATE Warden SET Password = %s WHERE WID = %s AND Password = %s",
+    UserRole.ADMIN: "UPDATE Admin SET Password = %s WHERE Email = %s AND Password = %s",
+}
+
+# Only these tables held plaintext passwords before bcrypt; a non-bcrypt
+# UserAuth.PSWD is never a password, so it matches nothing
+_PLAINTEXT_ROLES = (UserRole.WARDEN, UserRole.ADMIN)
+
+
+class HashingOverloaded(Exception):
+    pass
+
+
+class InvalidPassword(ValueError):
+    pass
+
+
+def overloaded_error() -> HTTPException:
+    """What routes raise for HashingOverloaded: retryable, unlike a 500."""
+    return HTTPException(status_code=503, detail="Server busy, please retry shortly.", headers={"Retry-After": "2"})
+
+
+def invalid_password_error(error: InvalidPassword) -> HTTPException:
+    """What routes raise for InvalidPassword: the client's input, not a 500."""
+    return HTTPException(status_code=400, detail=str(error))
+
+
+def hash_info(stored: Optional[str]) -> Tuple[str, Optional[int]]:
+    """(scheme, cost) of a stored password: ("bcrypt", 12) or ("plaintext", None)."""
+    match = _BCRYPT_RE.match(stored or "")
+    if match:
+        return "bcrypt", int(match.group(1))
+    return "plaintext", None
+
+
+# ───────────────────────── WORKER FUNCTIONS ──────────────────────────
+# Run in the pool; each returns (result, started_at, hash_seconds) so the
+# parent can split queue wait from CPU time.
+
+def _encode(password: str) -> bytes:
+    try:
+        encoded = password.encode("utf-8")
+    except UnicodeEncodeError:  # lone surrogates from a JSON "\ud800"
+        raise InvalidPassword("Password is not valid Unicode.")
+    if b"\0" in encoded:  # bcrypt refuses NUL bytes
+        raise InvalidPassword("Password may not contain NUL characters.")
+    return encoded[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def _hash(password: str, rounds: int) -> Tuple[str, float, float]:
+    started = time.time()
+    hashed = bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode()
+    return hashed, started, time.time() - started
+
+
+def _verify(password: str, hashed: str) -> Tuple[bool, float, float]:
+    started = time.time()
+    try:
+        ok = bcrypt.checkpw(_encode(password), hashed.encode())
+    except ValueError:  # not a bcrypt hash, or InvalidPassword: matches nothing
+        ok = False
+    return ok, started, time.time() - started
+
+
+def _hash_chunk(passwords: List[str], rounds: int) -> List[str]:
+    return [bcrypt.hashpw(_encode(p), bcrypt.gensalt(rounds)).decode() for p in passwords]
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def time_cost(rounds: int, samples: int = 3) -> float:
+    """Best-of-samples seconds for one bcrypt verify at this cost."""
+    password = b"calibration-password"
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    best = float("inf")
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.checkpw(password, hashed)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def calibrate_rounds(target_ms: float = HASH_TARGET_MS, min_rounds: int = HASH_MIN_ROUNDS,
+                     max_rounds: int = HASH_MAX_ROUNDS) -> int:
+    """
+    Highest cost whose verify fits in target_ms, within [min_rounds, max_rounds].
+    Each extra round doubles the work, so one timing at min_rounds is enough.
+    """
+    seconds = time_cost(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and seconds * 2 <= target_ms / 1000:
+        seconds *= 2
+        rounds += 1
+    return rounds
+
+
+# ───────────────────────── SERVICE ──────────────────────────
+
+class HashingService:
+    def __init__(self, workers: int = HASH_WORKERS, max_queue: int = HASH_MAX_QUEUE,
+                 rounds: Optional[int] = HASH_ROUNDS):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds  # None until calibrated
+        self.calibrated = rounds is None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self._hash_time_total = 0.0
+
+    def start(self):
+        """
+        Blocking: spawn the workers and settle the cost before the first login.
+        Call it from startup (the app lifespan, a CLI), never from a request.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+                for _ in range(self.workers):
+                    self._executor.submit(_warm_up)
+            if self.rounds is None:
+                # In a worker, so it is timed where real hashes will run
+                self.rounds = self._executor.submit(calibrate_rounds).result()
+                print(f"🔐 bcrypt cost {self.rounds} (calibrated to ~{HASH_TARGET_MS:.0f} ms per verify)")
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: a fork would copy locks held by the server's other threads
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        """Non-blocking: the pool is created lazily; workers spawn on first submit."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+            return self._executor
+
+    @property
+    def cost(self) -> int:
+        """bcrypt cost for new hashes: the calibrated one once start() has run."""
+        return self.rounds or HASH_UNCALIBRATED_ROUNDS
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HashingOverloaded(f"{self._in_flight} password hashes already queued")
+            self._in_flight += 1
+        try:
+            executor = self._ensure_executor()
+            submitted = time.time()
+            result, started, hash_seconds = await asyncio.get_running_loop().run_in_executor(
+                executor, fn, *args
+            )
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        queue_wait = max(0.0, started - submitted)
+        with self._lock:
+            self.completed += 1
+            self._queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+            self._hash_time_total += hash_seconds
+        return result
+
+    async def hash_password(self, password: str, rounds: Optional[int] = None) -> str:
+        """Raises InvalidPassword (before taking a pool slot) for passwords bcrypt can't take."""
+        _encode(password)
+        return await self._run(_hash, password, rounds or self.cost)
+
+    async def verify_password(self, password: str, hashed: Optional[str], role: str) -> bool:
+        if hash_info(hashed)[0] == "plaintext":
+            if role not in _PLAINTEXT_ROLES or hashed is None:
+                return False
+            # Legacy admin/warden rows; constant time, and no need for the pool.
+            # The caller rehashes on success (needs_rehash).
+            return hmac.compare_digest(password.encode("utf-8", "surrogatepass"), hashed.encode())
+        return await self._run(_verify, password, hashed)
+
+    def needs_rehash(self, hashed: Optional[str]) -> bool:
+        """True for plaintext and for bcrypt below the current cost (never downgrades)."""
+        scheme, cost = hash_info(hashed)
+        return scheme != "bcrypt" or (self.rounds is not None and cost < self.rounds)
+
+    async def rehash(self, role: str, key, password: str, old_hash: str):
+        """
+        Background task after a successful login: store the password at the
+        current cost. When the pool is busy it is skipped and retried on the
+        next login; a password changed meanwhile is left alone.
+        """
+        try:
+            new_hash = await self.hash_password(password)
+            async with connection() as conn:
+                cur = await conn.execute(_REHASH_SQL[role], (new_hash, key, old_hash))
+                await conn.commit()
+            if cur.rowcount:
+                with self._lock:
+                    self.rehashed += 1
+                scheme, cost = hash_info(old_hash)
+                print(f"🔐 Upgraded {role} password hash: {scheme}{f' cost {cost}' if cost else ''} → bcrypt cost {self.cost}")
+        except HashingOverloaded:
+            pass
+        except Exception as e:
+            print(f"❌ Error upgrading {role} password hash:", e)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "rounds": self.rounds,
+                "calibrated": self.calibrated,
+                "target_ms": HASH_TARGET_MS,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "queue_wait_ms_avg": round(self._queue_wait_total / done * 1000, 2),
+                "queue_wait_ms_max": round(self.queue_wait_max * 1000, 2),
+                "hash_ms_avg": round(self._hash_time_total / done * 1000, 2),
+            }
+
+
+hasher = HashingService()
+
+
+def hash_many(passwords: List[str], rounds: int, workers: int = HASH_WORKERS, chunk_size: int = 16,
+              progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    """
+    Blocking: bcrypt a batch (e.g. a bulk import) on its own process pool, so
+    it neither waits behind logins nor fills the login pool's queue. Hashes
+    come back in input order; progress(done, total) is called per chunk.
+    Workers are spawned, not forked: this runs from a threadpool thread of a
+    server whose other threads may hold locks a fork would copy.
+    """
+    hashes: List[str] = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_hash_chunk, passwords[i:i + chunk_size], rounds)
+                   for i in range(0, len(passwords), chunk_size)]
+        for future in futures:
+            hashes.extend(future.result())
+            if progress:
+                progress(len(hashes), len(passwords))
+    return hashes
+
+
+# ───────────────────────── BENCHMARK CLI ──────────────────────────
+
+def benchmark(min_rounds: int, max_rounds: int, samples: int, target_ms: float):
+    chosen = calibrate_rounds(target_ms, min_rounds, max_rounds)
+    print(f"bcrypt verify cost on this CPU ({HASH_WORKERS} hashing worker(s), target {target_ms:.0f} ms)")
+    print(f"{'cost':>6} {'ms/login':>10} {'logins/s/core':>14} {'logins/s pool':>14}")
+    for rounds in range(min_rounds, max_rounds + 1):
+        seconds = time_cost(rounds, samples)
+        marker = "  ← calibrated" if rounds == chosen else ""
+        print(f"{rounds:>6} {seconds * 1000:>10.1f} {1 / seconds:>14.1f} {HASH_WORKERS / seconds:>14.1f}{marker}")
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Measure bcrypt logins per second per core at each cost.")
+    parser.add_argument("--min-rounds", type=int, default=HASH_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=14)
+    parser.add_argument("--samples", type=int, default=3, help="verifies timed per cost (best is kept)")
+    parser.add_argument("--target-ms", type=float, default=HASH_TARGET_MS)
+    args = parser.parse_args(argv)
+    benchmark(args.min_rounds, args.max_rounds, args.samples, args.target_ms)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
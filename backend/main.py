@@ -1,27 +1,37 @@
 
 import os
-import ssl
 import base64
-import smtplib
 import traceback
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
-from email.message import EmailMessage
+from typing import NamedTuple, Optional
 
 # Third-party Imports
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from passlib.hash import bcrypt
+from psycopg.rows import dict_row
 from dotenv import load_dotenv
 
 # FastAPI Imports
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.sessions import SessionMiddleware
 from pydantic import BaseModel, Field
 
 # Local Imports
-from db import get_db_connection
+from async_db import connection, get_async_db, open_pool, close_pool, pool_stats
+import blob_store
+import email_outbox
+import rate_limit
+from fast_json import ORJSONResponse, FastJSONRoute
+import compression
+import data_version
+from pagination import Filter, Listing, Sort, fetch_page, page_headers
+from proof_upload import receive_proof_upload, decode_proof_data_url
+import proof_pipeline
+import thumbnails
+import proof_http
+from hashing import hasher, HashingOverloaded, InvalidPassword, overloaded_error, invalid_password_error
+from cache import dashboard_cache, identity_cache, cache_stats, MISSING, IDENTITY_NEGATIVE_TTL
 from wardan import router as warden_router
 from admin import router as admin_router
 from auth import (
@@ -69,7 +79,23 @@ class ResetPasswordRequest(BaseModel):
 # ==========================
 
 load_dotenv()
-app = FastAPI(title="GovtHostelCare API", version="1.0.0")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_pool()
+    hasher.start()
+    email_outbox.outbox.start()
+    yield
+    await email_outbox.outbox.stop()
+    hasher.shutdown()
+    proof_pipeline.shutdown_executor()
+    await close_pool()
+
+
+app = FastAPI(title="GovtHostelCare API", version="1.0.0", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
+app.router.route_class = FastJSONRoute  # before any route is declared
 
 # Production environment detection
 ENV = os.getenv("ENV")
@@ -95,6 +121,9 @@ else:
     ]
     print(f"Development CORS origins: {allowed_origins}")
 
+# gzip/br for large JSON, with repeated bodies served from a compressed cache
+app.add_middleware(compression.CompressionMiddleware)
+
 # CORS middleware configuration for subdomain setup
 app.add_middleware(
     CORSMiddleware,
@@ -102,7 +131,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
-    expose_headers=["Set-Cookie"],  
+    expose_headers=["Set-Cookie", "X-Next-Cursor", "X-Estimated-Total"],
 )
 
 # Session middleware only for development (JWT cookies used in production)
@@ -142,77 +171,109 @@ async def health_check():
         "subdomain_setup": ENV == "production"
     }
 
+@app.get("/health/db")
+async def db_health_check():
+    """Connection pool statistics (in-use, waiting, checkout latency) for monitoring."""
+    return {"status": "healthy", "pool": pool_stats()}
+
+
+@app.get("/health/cache")
+async def cache_health_check():
+    """Hit rates and sizes of the in-process caches (per worker)."""
+    return {"status": "healthy", "caches": {**cache_stats(), "compressed_responses": compression.cache.stats()}}
+
+
+@app.get("/health/hashing")
+async def hashing_health_check():
+    """Password hashing pool: queue depth, rejections, queue wait and hash time."""
+    return {"status": "healthy", "hashing": hasher.stats()}
+
+
+@app.get("/health/email")
+async def email_health_check():
+    """Outbox backlog and the sender's delivery counters (per worker)."""
+    return {"status": "healthy", "outbox": {**await email_outbox.pending_stats(), **email_outbox.outbox.stats()}}
+
+
+@app.get("/health/ratelimit")
+async def rate_limit_health_check():
+    """Token-bucket limiters: live keys, allowed and rejected counts (per worker)."""
+    return {"status": "healthy", "limiters": rate_limit.limiter_stats()}
+
 # ==========================
 # USER AUTHENTICATION ENDPOINTS
 # ==========================
 
 @app.post("/userauth")
-def create_user_auth(data: UserAuthInput):
+async def create_user_auth(data: UserAuthInput):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT SHID FROM Student WHERE SHID = %s", (data.shid,))
-        if cursor.fetchone() is None:
-            return {"status": "not_found", "message": "❌ SHID not found in Student table."}
-
-        cursor.execute("SELECT UID FROM UserAuth WHERE SHID = %s", (data.shid,))
-        if cursor.fetchone() is not None:
-            return {"status": "exists", "message": "⚠️ SHID already registered."}
-
-        hashed_password = bcrypt.hash(data.pswd)
-
-        cursor.execute(
-            "INSERT INTO UserAuth (SHID, PSWD) VALUES (%s, %s)",
-            (data.shid, hashed_password)
-        )
-        conn.commit()
+        async with connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT SHID FROM Student WHERE SHID = %s", (data.shid,))
+                if await cursor.fetchone() is None:
+                    return {"status": "not_found", "message": "❌ SHID not found in Student table."}
+
+                await cursor.execute("SELECT UID FROM UserAuth WHERE SHID = %s", (data.shid,))
+                if await cursor.fetchone() is not None:
+                    return {"status": "exists", "message": "⚠️ SHID already registered."}
+
+        # Hash without holding a pooled connection
+        hashed_password = await hasher.hash_password(data.pswd)
+
+        async with connection() as conn:
+            await conn.execute(
+                "INSERT INTO UserAuth (SHID, PSWD) VALUES (%s, %s)",
+                (data.shid, hashed_password)
+            )
+            await conn.commit()
         return {"status": "success", "message": "User registered successfully."}
 
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
     except Exception as e:
         print("Exception occurred:", str(e))
         return {"status": "error", "message": f"Internal Server Error: {str(e)}"}
 
-    finally:
-        cursor.close()
-        conn.close()
+USER_LOGIN_SQL = """
+    SELECT ua.SHID, ua.PSWD, s.SID, s.Name, s.Mail, s.Phone, s.HID
+    FROM UserAuth ua
+    LEFT JOIN Student s ON s.SHID = ua.SHID
+    WHERE ua.SHID = %s
+"""
 
 @app.post("/auth/user/login")
-async def user_login(data: UserLoginInput, request: Request, response: Response):
+async def user_login(data: UserLoginInput, request: Request, response: Response,
+                     background_tasks: BackgroundTasks):
     """
     User JWT-based login endpoint.
     Authenticates user and sets HttpOnly JWT cookies.
     """
     log_auth_debug("User login attempt started", request)
+    rate_limit.limit_login(request, UserRole.USER, data.shid)
     
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT SHID, PSWD FROM UserAuth WHERE SHID = %s", (data.shid,))
-        result = cursor.fetchone()
+        # One round trip, and the connection goes back before the slow verify
+        async with connection() as conn:
+            cur = await conn.execute(USER_LOGIN_SQL, (data.shid,))
+            result = await cur.fetchone()
 
         if result is None:
             log_auth_debug(f"User not found with SHID: {data.shid}")
             raise HTTPException(status_code=401, detail="SHID not registered.")
 
-        db_shid, hashed_pswd = result
+        db_shid, hashed_pswd, sid, name, mail, phone, hid = result
 
-        if not bcrypt.verify(data.pswd, hashed_pswd):
+        if not await hasher.verify_password(data.pswd, hashed_pswd, UserRole.USER):
             log_auth_debug("Password mismatch for user login")
             raise HTTPException(status_code=401, detail="Incorrect password.")
-
-        cursor.execute("""
-            SELECT SID, Name, Mail, Phone, HID 
-            FROM Student 
-            WHERE SHID = %s
-        """, (db_shid,))
-        student = cursor.fetchone()
         
-        if not student:
+        if sid is None:
             raise HTTPException(status_code=401, detail="Student data not found.")
-        
-        sid, name, mail, phone, hid = student
+
+        if hasher.needs_rehash(hashed_pswd):
+            background_tasks.add_task(hasher.rehash, UserRole.USER, db_shid, data.pswd, hashed_pswd)
         
         token_data = {
             "sid": sid,
@@ -231,9 +292,6 @@ async def user_login(data: UserLoginInput, request: Request, response: Response)
         
         log_auth_debug(f"User login successful for {name}")
         
-        cursor.close()
-        conn.close()
-        
         return {
             "status": "success", 
             "message": "Login successful.",
@@ -252,16 +310,12 @@ async def user_login(data: UserLoginInput, request: Request, response: Response)
 
     except HTTPException:
         raise
+    except HashingOverloaded:
+        raise overloaded_error()
     except Exception as e:
         print("Login error:", str(e))
         raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
 
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
-
 @app.post("/auth/user/logout")
 async def user_logout(response: Response):
     """
@@ -358,94 +412,131 @@ async def session_check(request: Request):
 # STUDENT DASHBOARD ENDPOINTS
 # ==========================
 
-@app.get("/dashboard/{shid}")
-def get_student_dashboard(shid: str):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT S.SID, S.Name, S.Phone, S.Mail, S.DOB, S.SHID,
-                   H.HID, H.Name AS HostelName, H.Location,
-                   W.Name AS WardenName, W.Mail AS WardenMail, W.Phone AS WardenPhone,
-                   R.RoomNumber
-            FROM Student S
-            JOIN Hostel H ON S.HID = H.HID
-            LEFT JOIN Warden W ON H.HID = W.HID
-            LEFT JOIN Room R ON H.HID = R.HID AND S.SID IN (
-                SELECT SID FROM Student WHERE HID = H.HID
-            )
-            WHERE S.SHID = %s
-            LIMIT 1
-        """, (shid,))
-        student_row = cursor.fetchone()
+class StudentIdentity(NamedTuple):
+    sid: int
+    hid: int
+    name: str
 
-        if not student_row:
-            raise HTTPException(status_code=404, detail="Student not found")
 
-        student_info = {
-            "sid": student_row[0],
-            "name": student_row[1],
-            "phone": student_row[2],
-            "mail": student_row[3],
-            "dob": student_row[4],
-            "shid": student_row[5],
-            "hostel": {
-                "hid": student_row[6],
-                "name": student_row[7],
-                "location": student_row[8]
-            },
-            "warden": {
-                "name": student_row[9],
-                "mail": student_row[10],
-                "phone": student_row[11]
-            },
-            "room_number": student_row[12]  # Added Room Number
-        }
-
-        # Complaint Stats
-        cursor.execute("SELECT COUNT(*) FROM Complaint WHERE SID = %s", (student_info["sid"],))
-        total_complaints = cursor.fetchone()[0]
+STUDENT_IDENTITY_SQL = "SELECT SID, HID, Name FROM Student WHERE SHID = %s"
 
-        cursor.execute("SELECT COUNT(*) FROM Complaint WHERE SID = %s AND Status = 'Pending'", (student_info["sid"],))
-        pending = cursor.fetchone()[0]
 
-        cursor.execute("SELECT COUNT(*) FROM Complaint WHERE SID = %s AND Status = 'Resolved'", (student_info["sid"],))
-        resolved = cursor.fetchone()[0]
-
-        # Last 5 complaints
-        cursor.execute("""
+async def resolve_student(shid: str, conn) -> StudentIdentity:
+    """
+    SHID -> (SID, HID, name) through identity_cache; `conn` is only used on a
+    miss. Raises 404 for unknown SHIDs, which are cached for a shorter TTL.
+    """
+    identity = identity_cache.get(shid)
+    if identity is MISSING:
+        token = identity_cache.version()
+        cur = await conn.execute(STUDENT_IDENTITY_SQL, (shid,))
+        row = await cur.fetchone()
+        identity = StudentIdentity(*row) if row else None
+        identity_cache.set(shid, identity, token, ttl=None if row else IDENTITY_NEGATIVE_TTL)
+
+    if identity is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return identity
+
+
+DASHBOARD_SQL = """
+    SELECT S.SID, S.Name, S.Phone, S.Mail, S.DOB, S.SHID,
+           H.HID, H.Name, H.Location,
+           W.Name, W.Mail, W.Phone,
+           (SELECT R.RoomNumber FROM Room R WHERE R.HID = H.HID LIMIT 1),
+           C.Total, C.Pending, C.Resolved,
+           COALESCE(RC.Recent, '[]'::json)
+    FROM Student S
+    JOIN Hostel H ON S.HID = H.HID
+    LEFT JOIN LATERAL (
+        SELECT Name, Mail, Phone FROM Warden WHERE HID = H.HID LIMIT 1
+    ) W ON TRUE
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS Total,
+               COUNT(*) FILTER (WHERE Status = 'Pending') AS Pending,
+               COUNT(*) FILTER (WHERE Status = 'Resolved') AS Resolved
+        FROM Complaint WHERE SID = S.SID
+    ) C
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                   'type', Type, 'status', Status,
+                   'description', Description, 'created_at', Created_at
+               ) ORDER BY Created_at DESC) AS Recent
+        FROM (
             SELECT Type, Status, Description, Created_at
-            FROM Complaint
-            WHERE SID = %s
+            FROM Complaint WHERE SID = S.SID
             ORDER BY Created_at DESC
             LIMIT 5
-        """, (student_info["sid"],))
-        recent_complaints = cursor.fetchall()
-
-        recent = [
-            {
-                "type": row[0],
-                "status": row[1],
-                "description": row[2],
-                "created_at": row[3]
-            }
-            for row in recent_complaints
-        ]
+        ) last5
+    ) RC ON TRUE
+    WHERE S.SHID = %s
+"""
 
-        cursor.close()
-        conn.close()
 
-        return {
-            "student": student_info,
+@app.get("/dashboard/{shid}")
+async def get_student_dashboard(shid: str, request: Request, response: Response):
+    """
+    Student landing page, built by one aggregate query and cached per SHID.
+    The ETag follows the student's and their hostel's version rows, so a
+    matching If-None-Match costs one primary-key lookup. Cached entries carry
+    the tag they were built under and are only served while it still holds.
+    """
+    try:
+        async with connection() as conn:
+            identity = await resolve_student(shid, conn)
+            tag = data_version.make_tag("dashboard", identity.sid, *await data_version.versions(
+                conn, (data_version.STUDENT, identity.sid), (data_version.RESIDENCE, identity.hid)))
+            unchanged = data_version.conditional(request, response, tag)
+            if unchanged is not None:
+                return unchanged
+
+            cached = dashboard_cache.get(shid)
+            if cached is not MISSING and cached[0] == tag:
+                return cached[1]
+
+            token = dashboard_cache.version()
+            cur = await conn.execute(DASHBOARD_SQL, (shid,))
+            row = await cur.fetchone()
+
+        if not row:
+            raise HTTPException(status_code=404, detail="Student not found")
+
+        (sid, name, phone, mail, dob, db_shid, hid, hostel_name, location,
+         warden_name, warden_mail, warden_phone, room_number,
+         total, pending, resolved, recent) = row
+
+        dashboard = {
+            "student": {
+                "sid": sid,
+                "name": name,
+                "phone": phone,
+                "mail": mail,
+                "dob": dob,
+                "shid": db_shid,
+                "hostel": {
+                    "hid": hid,
+                    "name": hostel_name,
+                    "location": location
+                },
+                "warden": {
+                    "name": warden_name,
+                    "mail": warden_mail,
+                    "phone": warden_phone
+                },
+                "room_number": room_number
+            },
             "complaints": {
-                "total": total_complaints,
+                "total": total,
                 "pending": pending,
                 "resolved": resolved,
                 "recent": recent
             }
         }
+        dashboard_cache.set(shid, (tag, dashboard), token)
+        return dashboard
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("❌ Dashboard Error:", str(e))
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -455,33 +546,154 @@ def get_student_dashboard(shid: str):
 # ==========================
 
 @app.post("/complaint/add")
-def add_complaint(complaint: ComplaintRequest):
+async def add_complaint(complaint: ComplaintRequest, request: Request, background_tasks: BackgroundTasks):
+    rate_limit.limit_complaint_ip(request)
+    rate_limit.limit_complaint_student(complaint.shid)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        data = proof_mime = None
+        if complaint.proof_image:
+            # Up to PROOF_MAX_BYTES of base64: decode off the event loop, before taking a connection
+            data, proof_mime = await run_in_threadpool(decode_proof_data_url, complaint.proof_image)
+
+        async with connection() as conn:
+            async with conn.cursor() as cursor:
+                sid = (await resolve_student(complaint.shid, conn)).sid
+
+                proof_hash = proof_size = None
+                if data is not None:
+                    proof_hash = await run_in_threadpool(blob_store.put_bytes, data)
+                    proof_size = len(data)
+
+                await cursor.execute("""
+                    INSERT INTO Complaint (SID, Type, Description, Status, ProofHash, ProofMime, ProofSize)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING CID
+                """, (sid, complaint.type, complaint.description, "Pending",
+                      proof_hash, proof_mime, proof_size))
+                cid = (await cursor.fetchone())[0]
+
+                await conn.commit()
+        dashboard_cache.invalidate(complaint.shid)
+
+        if proof_hash:
+            background_tasks.add_task(proof_pipeline.compress_proof, cid)
 
-        cursor.execute("SELECT SID FROM Student WHERE SHID = %s", (complaint.shid,))
-        student = cursor.fetchone()
-
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        sid = student[0]
+        return {"status": "success", "message": "Complaint added successfully"}
 
-        cursor.execute("""
-            INSERT INTO Complaint (SID, Type, Description, Status, ProofImage)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (sid, complaint.type, complaint.description, "Pending", complaint.proof_image))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("❌ Error:", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+@app.post("/complaint/upload")
+async def upload_complaint(request: Request, background_tasks: BackgroundTasks):
+    """
+    multipart/form-data variant of /complaint/add: fields shid, type,
+    description and an optional proof_image file, streamed to the blob store.
+    The complaint row is only written once the upload has completed.
+    """
+    rate_limit.limit_complaint_ip(request)  # before accepting up to PROOF_MAX_BYTES
+    upload = await receive_proof_upload(request)
+    try:
+        shid, type_, description = (upload.fields.get(k, "").strip() for k in ("shid", "type", "description"))
+        if not shid or not type_ or not description:
+            raise HTTPException(status_code=400, detail="shid, type and description are required")
+        rate_limit.limit_complaint_student(shid)
+
+        async with connection() as conn:
+            async with conn.cursor() as cursor:
+                student = await resolve_student(shid, conn)
+                proof_hash = proof_mime = proof_size = None
+                if upload.has_proof:
+                    proof_hash = await run_in_threadpool(upload.writer.commit)
+                    proof_mime, proof_size = upload.mime, upload.writer.size
+
+                await cursor.execute("""
+                    INSERT INTO Complaint (SID, Type, Description, Status, ProofHash, ProofMime, ProofSize)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING CID
+                """, (student.sid, type_, description, "Pending", proof_hash, proof_mime, proof_size))
+                cid = (await cursor.fetchone())[0]
+
+                await conn.commit()
+        dashboard_cache.invalidate(shid)
+
+        if proof_hash:
+            background_tasks.add_task(proof_pipeline.compress_proof, cid)
 
         return {"status": "success", "message": "Complaint added successfully"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("❌ Error:", e)
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        if upload.writer is not None and upload.writer.digest is None:
+            await run_in_threadpool(upload.discard)
+
+@app.get("/complaint/{cid}/proof")
+async def get_complaint_proof(cid: int, request: Request):
+    """Full proof of one of the logged-in student's complaints (binary, ETag + Range)."""
+    user_data = get_current_student(request)
+    async with connection() as conn:
+        cur = await conn.execute(
+            "SELECT ProofHash, ProofMime, ProofImage FROM Complaint WHERE CID = %s AND SID = %s",
+            (cid, user_data["sid"]),
+        )
+        complaint = await cur.fetchone()
+
+    if not complaint or not (complaint[0] or complaint[2]):
+        raise HTTPException(status_code=404, detail="No proof found")
+
+    proof_hash, proof_mime, proof_image = complaint
+    if proof_hash:
+        try:
+            return await proof_http.blob_response(
+                request, proof_hash, proof_mime or blob_store.DEFAULT_PROOF_MIME,
+            )
+        except blob_store.BlobNotFound:
+            raise HTTPException(status_code=404, detail="No proof found")
+
+    # Row not yet moved by migration 0004
+    try:
+        data, mime = blob_store.decode_data_url(proof_image)
+    except blob_store.InvalidProofData:
+        raise HTTPException(status_code=404, detail="No proof found")
+    return Response(content=data, media_type=mime)
+
+
+@app.get("/complaint/{cid}/proof/thumbnail")
+async def get_complaint_proof_thumbnail(cid: int, request: Request, size: int = thumbnails.DEFAULT_THUMBNAIL_SIZE):
+    """Thumbnail of the proof of one of the logged-in student's complaints."""
+    user_data = get_current_student(request)
+    if size not in thumbnails.THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {thumbnails.THUMBNAIL_SIZES}")
+
+    async with connection() as conn:
+        cur = await conn.execute(
+            "SELECT ProofHash FROM Complaint WHERE CID = %s AND SID = %s",
+            (cid, user_data["sid"]),
+        )
+        complaint = await cur.fetchone()
+
+    if not complaint or not complaint[0]:
+        raise HTTPException(status_code=404, detail="No proof found")
+
+    tag = f"{complaint[0]}-{size}"
+    if proof_http.etag_matches(request, tag):
+        return proof_http.not_modified(tag, proof_http.REVALIDATE_CACHE_CONTROL)
+
+    try:
+        data = await thumbnails.get_thumbnail(cid, complaint[0], size)
+    except blob_store.BlobNotFound:
+        raise HTTPException(status_code=404, detail="No proof found")
+    except thumbnails.ThumbnailError as e:
+        print("⚠️", e)
+        raise HTTPException(status_code=422, detail="Proof cannot be previewed")
+    return Response(content=data, media_type=thumbnails.THUMBNAIL_MIME,
+                    headers={"ETag": proof_http.etag_for(tag), "Cache-Control": proof_http.REVALIDATE_CACHE_CONTROL})
 
 # ==========================
 # FEEDBACK ENDPOINTS
@@ -496,59 +708,47 @@ async def add_feedback(feedback: FeedbackModel, request: Request):
     print(f"Logged in user sid: {sid}")
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO Feedback (SID, Title, Description, Rating)
-            VALUES (%s, %s, %s, %s)
-            RETURNING FID;
-            """,
-            (sid, feedback.title, feedback.description, feedback.rating)
-        )
-        fid = cursor.fetchone()[0]
-        conn.commit()
+        async with connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    """
+                    INSERT INTO Feedback (SID, Title, Description, Rating)
+                    VALUES (%s, %s, %s, %s)
+                    RETURNING FID;
+                    """,
+                    (sid, feedback.title, feedback.description, feedback.rating)
+                )
+                fid = (await cursor.fetchone())[0]
+                await conn.commit()
         return {"status": "success", "message": "✅ Feedback submitted successfully.", "feedback_id": fid}
     except Exception as e:
         print("DB error:", e)
         raise HTTPException(status_code=500, detail="Server error while submitting feedback.")
-    finally:
-        cursor.close()
-        conn.close()
 
 # ==========================
 # ANALYTICS ENDPOINTS
 # ==========================
 
 @app.get("/analytics/student/complaint-trend/{shid}")
-def complaint_trend(shid: str, days: int = 7):
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
-    cur.execute("SELECT SID FROM Student WHERE SHID = %s", (shid,))
-    student = cur.fetchone()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-
-    sid = student["sid"]
-
-    cur.execute("""
-        SELECT 
-            TO_CHAR(d::date, 'YYYY-MM-DD') AS day,
-            COUNT(c.cid) AS total,
-            COUNT(CASE WHEN c.iswithdrawn THEN 1 END) AS withdrawn
-        FROM generate_series(
-            CURRENT_DATE - %s + 1,
-            CURRENT_DATE,
-            '1 day'
-        ) AS d
-        LEFT JOIN complaint c ON DATE_TRUNC('day', c.created_at) = d::date AND c.sid = %s
-        GROUP BY day ORDER BY day
-    """, (days, sid))
-
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+async def complaint_trend(shid: str, days: int = 7, conn=Depends(get_async_db)):
+    async with conn.cursor(row_factory=dict_row) as cur:
+        sid = (await resolve_student(shid, conn)).sid
+
+        await cur.execute("""
+            SELECT 
+                TO_CHAR(d::date, 'YYYY-MM-DD') AS day,
+                COUNT(c.cid) AS total,
+                COUNT(CASE WHEN c.iswithdrawn THEN 1 END) AS withdrawn
+            FROM generate_series(
+                CURRENT_DATE - %s::int + 1,
+                CURRENT_DATE,
+                '1 day'
+            ) AS d
+            LEFT JOIN complaint c ON DATE_TRUNC('day', c.created_at) = d::date AND c.sid = %s
+            GROUP BY day ORDER BY day
+        """, (days, sid))
+
+        rows = await cur.fetchall()
 
     return {
         "labels": [r["day"] for r in rows],
@@ -575,34 +775,34 @@ async def session_check(request: Request):
 # COMPLAINT WITHDRAWAL ENDPOINTS
 # ==========================
 
+STUDENT_COMPLAINTS = Listing(
+    # Metadata only: the proof itself is fetched per complaint. The legacy
+    # ProofImage column is only tested for NULL, never read.
+    "CID, Type, Description, Status, Created_at, ProofHash, ProofSize, ProofImage IS NOT NULL,"
+    " COALESCE(WithdrawCount, 0), COALESCE(IsWithdrawn, FALSE)",
+    "Complaint", "CID",
+    {"created_at": Sort("Created_at"), "cid": Sort("CID", nullable=False)},
+    "-created_at",
+    filters={"status": Filter("Status = %s"), "type": Filter("Type = %s")},
+    where="SID = %s",
+)
+
 @app.get("/fetch_complaint/{shid}")
-def fetch_complaints_by_shid(shid: str):
+async def fetch_complaints_by_shid(shid: str, request: Request, response: Response,
+                                   cursor: Optional[str] = None, limit: Optional[int] = None,
+                                   sort: Optional[str] = None):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT SID FROM Student WHERE SHID = %s", (shid,))
-        student = cursor.fetchone()
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        sid = student[0]
-
-        cursor.execute("""
-            SELECT CID, Type, Description, Status, Created_at, ProofImage, 
-                   COALESCE(WithdrawCount, 0), COALESCE(IsWithdrawn, FALSE)
-            FROM Complaint 
-            WHERE SID = %s 
-            ORDER BY Created_at DESC
-        """, (sid,))
+        async with connection() as conn:
+            sid = (await resolve_student(shid, conn)).sid
+            page = await fetch_page(conn, STUDENT_COMPLAINTS, request, (sid,),
+                                    cursor=cursor, limit=limit, sort=sort)
+        page_headers(response, page)
 
         complaints = []
-        for row in cursor.fetchall():
-            cid, type_, desc, status, created_at, proof_image, withdraw_count, is_withdrawn = row
-
-            image_data = None
-            if proof_image:
-                image_data = f"data:image/png;base64,{proof_image.strip()}"
+        for row in page.rows:
+            (cid, type_, desc, status, created_at, proof_hash, proof_size,
+             has_inline_proof, withdraw_count, is_withdrawn) = row
+            has_proof = bool(proof_hash) or has_inline_proof
 
             complaints.append({
                 "cid": cid,
@@ -610,69 +810,73 @@ def fetch_complaints_by_shid(shid: str):
                 "description": desc,
                 "status": status,
                 "created_at": created_at,
-                "proof_image": image_data,
+                "has_proof": has_proof,
+                "proof_size": proof_size,
+                "proof_hash": proof_hash,
+                "proof_url": f"/complaint/{cid}/proof" if has_proof else None,
+                "thumbnail_url": f"/complaint/{cid}/proof/thumbnail" if proof_hash else None,
                 "withdraw_count": withdraw_count,
                 "is_withdrawn": is_withdrawn,
             })
 
-        return {"complaints": complaints}
+        return {"complaints": complaints, "next": page.next, "estimated_total": page.estimated_total}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("Error in fetch_complaints_by_shid:", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    finally:
-        cursor.close()
-        conn.close()
-
 @app.get("/student_analytics/{shid}")
-def get_student_analytics(shid: str):
+async def get_student_analytics(shid: str, request: Request, response: Response):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        async with connection() as conn:
+            async with conn.cursor() as cursor:
+                sid = (await resolve_student(shid, conn)).sid
+                version, = await data_version.versions(conn, (data_version.STUDENT, sid))
+                unchanged = data_version.conditional(
+                    request, response, data_version.make_tag("analytics", sid, version))
+                if unchanged is not None:
+                    return unchanged
+
+                await cursor.execute("""
+                    SELECT Status, COUNT(*) 
+                    FROM Complaint
+                    WHERE SID = %s
+                    GROUP BY Status
+                """, (sid,))
+                complaint_status = {row[0]: row[1] for row in await cursor.fetchall()}
+
+                await cursor.execute("""
+                    SELECT Type, COUNT(*)
+                    FROM Complaint
+                    WHERE SID = %s
+                    GROUP BY Type
+                """, (sid,))
+                complaint_types = [{"type": row[0], "count": row[1]} for row in await cursor.fetchall()]
+
+                await cursor.execute("""
+                    SELECT TO_CHAR(Created_at, 'YYYY-MM') AS month, COUNT(*)
+                    FROM Complaint
+                    WHERE SID = %s
+                    GROUP BY month
+                    ORDER BY month ASC
+                    LIMIT 6
+                """, (sid,))
+                complaints_over_time = [{"month": row[0], "count": row[1]} for row in await cursor.fetchall()]
+
+                await cursor.execute("""
+                    SELECT TO_CHAR(Created_at, 'YYYY-MM') AS month, Status, COUNT(*)
+                    FROM Complaint
+                    WHERE SID = %s
+                    GROUP BY month, Status
+                    ORDER BY month ASC
+                    LIMIT 12
+                """, (sid,))
+                monthly_rows = await cursor.fetchall()
 
-        cursor.execute("SELECT SID FROM Student WHERE SHID = %s", (shid,))
-        student = cursor.fetchone()
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-        sid = student[0]
-
-        cursor.execute("""
-            SELECT Status, COUNT(*) 
-            FROM Complaint
-            WHERE SID = %s
-            GROUP BY Status
-        """, (sid,))
-        complaint_status = {row[0]: row[1] for row in cursor.fetchall()}
-
-        cursor.execute("""
-            SELECT Type, COUNT(*)
-            FROM Complaint
-            WHERE SID = %s
-            GROUP BY Type
-        """, (sid,))
-        complaint_types = [{"type": row[0], "count": row[1]} for row in cursor.fetchall()]
-
-        cursor.execute("""
-            SELECT TO_CHAR(Created_at, 'YYYY-MM') AS month, COUNT(*)
-            FROM Complaint
-            WHERE SID = %s
-            GROUP BY month
-            ORDER BY month ASC
-            LIMIT 6
-        """, (sid,))
-        complaints_over_time = [{"month": row[0], "count": row[1]} for row in cursor.fetchall()]
-
-        cursor.execute("""
-            SELECT TO_CHAR(Created_at, 'YYYY-MM') AS month, Status, COUNT(*)
-            FROM Complaint
-            WHERE SID = %s
-            GROUP BY month, Status
-            ORDER BY month ASC
-            LIMIT 12
-        """, (sid,))
         monthly_status_data = {}
-        for month, status, count in cursor.fetchall():
+        for month, status, count in monthly_rows:
             if month not in monthly_status_data:
                 monthly_status_data[month] = {"Resolved": 0, "Pending": 0}
             monthly_status_data[month][status] = count
@@ -682,9 +886,6 @@ def get_student_analytics(shid: str):
             for m, d in monthly_status_data.items()
         ]
 
-        cursor.close()
-        conn.close()
-
         return {
             "complaint_status": complaint_status,
             "complaint_types": complaint_types,
@@ -692,6 +893,8 @@ def get_student_analytics(shid: str):
             "monthly_status": monthly_status
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print("Analytics Error:", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -707,70 +910,58 @@ async def withdraw_complaint(req: Request):
     except Exception as e:
         raise HTTPException(status_code=400, detail="Invalid input format")
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("SELECT SID FROM Student WHERE SHID = %s", (data.shid,))
-        student = cursor.fetchone()
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
-
-        sid = student[0]
-
-        cursor.execute("""
-            SELECT WithdrawCount, IsWithdrawn 
-            FROM Complaint 
-            WHERE CID = %s AND SID = %s
-        """, (data.cid, sid))
-        complaint = cursor.fetchone()
-        if not complaint:
-            raise HTTPException(status_code=404, detail="Complaint not found")
+    async with connection() as conn:
+        async with conn.cursor() as cursor:
+            sid = (await resolve_student(data.shid, conn)).sid
 
-        withdraw_count, is_withdrawn = complaint
+            await cursor.execute("""
+                SELECT WithdrawCount, IsWithdrawn 
+                FROM Complaint 
+                WHERE CID = %s AND SID = %s
+            """, (data.cid, sid))
+            complaint = await cursor.fetchone()
+            if not complaint:
+                raise HTTPException(status_code=404, detail="Complaint not found")
 
-        if is_withdrawn:
-            raise HTTPException(status_code=400, detail="Complaint already withdrawn")
+            withdraw_count, is_withdrawn = complaint
 
-        if withdraw_count >= 3:
-            raise HTTPException(status_code=400, detail="Withdraw limit exceeded (Max 3 times)")
+            if is_withdrawn:
+                raise HTTPException(status_code=400, detail="Complaint already withdrawn")
 
-        cursor.execute("""
-            UPDATE Complaint
-            SET Status = 'Withdrawn',
-                WithdrawCount = WithdrawCount + 1,
-                IsWithdrawn = TRUE
-            WHERE CID = %s AND SID = %s
-        """, (data.cid, sid))
+            if withdraw_count >= 3:
+                raise HTTPException(status_code=400, detail="Withdraw limit exceeded (Max 3 times)")
 
-        conn.commit()
+            await cursor.execute("""
+                UPDATE Complaint
+                SET Status = 'Withdrawn',
+                    WithdrawCount = WithdrawCount + 1,
+                    IsWithdrawn = TRUE
+                WHERE CID = %s AND SID = %s
+            """, (data.cid, sid))
 
-        return {"status": "success", "message": "Complaint withdrawn successfully"}
+            await conn.commit()
+    dashboard_cache.invalidate(data.shid)
 
-    finally:
-        cursor.close()
-        conn.close()
+    return {"status": "success", "message": "Complaint withdrawn successfully"}
 
 # ==========================
 # PASSWORD RESET ENDPOINTS  
 # ==========================
 
-
 @app.post("/auth/forgot-password")
-def forgot_password(request: ForgetPasswordRequest, preview: bool = False):
+async def forgot_password(request: ForgetPasswordRequest, response: Response, preview: bool = False):
     shid = request.shid
 
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-
-        cur.execute("""
-            SELECT s.name, s.mail
-            FROM student s
-            INNER JOIN userauth u ON s.shid = u.shid
-            WHERE s.shid = %s
-        """, (shid,))
-        result = cur.fetchone()
+        async with connection() as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute("""
+                    SELECT s.name, s.mail
+                    FROM student s
+                    INNER JOIN userauth u ON s.shid = u.shid
+                    WHERE s.shid = %s
+                """, (shid,))
+                result = await cur.fetchone()
 
         if not result:
             raise HTTPException(status_code=404, detail="❌ SHID not found or not registered.")
@@ -785,12 +976,14 @@ def forgot_password(request: ForgetPasswordRequest, preview: bool = False):
             reset_link = f"{os.getenv('FRONTEND_DOMAIN')}/reset-password/{shid}"
         else:
             reset_link = f"{os.getenv('LOCAL_FRONTEND_DOMAIN')}/reset-password/{shid}"
-        msg = EmailMessage()
-        msg["Subject"] = "Password Reset Request – Hostel Management System"
-        msg["From"] = os.getenv("EMAIL_SENDER")
-        msg["To"] = user_email
-        msg.set_content(
-            f"""
+
+        # Queued, not sent: the outbox worker delivers it (and retries) in the background
+        async with connection() as conn:
+            await email_outbox.enqueue(
+                conn,
+                user_email,
+                "Password Reset Request – Hostel Management System",
+                f"""
 Dear {user_name},
 
 We received a request to reset the password for your Hostel Management System account (SHID: {shid}).
@@ -802,21 +995,13 @@ If this wasn't you, ignore this message.
 
 Regards,  
 Hostel Management System Team
-"""
-        )
-
-        context = ssl.create_default_context()
-        with smtplib.SMTP(os.getenv("EMAIL_HOST"), int(os.getenv("EMAIL_PORT"))) as smtp:
-            smtp.ehlo() 
-            smtp.starttls(context=context)
-            smtp.ehlo()
-            smtp.login(
-                os.getenv("EMAIL_SENDER"),
-                os.getenv("EMAIL_PASSWORD")
+""",
             )
-            smtp.send_message(msg)
+            await conn.commit()
+        email_outbox.outbox.wake()
 
-        return {"message": f"Reset link sent to {user_email}"}
+        response.status_code = 202
+        return {"message": f"Reset link will be sent to {user_email}"}
 
     except HTTPException as e:
         raise e
@@ -824,33 +1009,31 @@ Hostel Management System Team
     except Exception as e:
         print("Internal server error:", traceback.format_exc())  
         raise HTTPException(status_code=500, detail="Something went wrong. Please try again.")
-        
-    finally:
-        if conn:
-            conn.close()
 
 
 @app.post("/auth/reset-password")
-def reset_password(request: ResetPasswordRequest):
+async def reset_password(request: ResetPasswordRequest):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-
-        cur.execute("SELECT 1 FROM userauth WHERE shid = %s", (request.shid,))
-        if not cur.fetchone():
-            raise HTTPException(status_code=404, detail="User not found")
+        async with connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1 FROM userauth WHERE shid = %s", (request.shid,))
+                if not await cur.fetchone():
+                    raise HTTPException(status_code=404, detail="User not found")
 
-        hashed_pw = bcrypt.hash(request.new_password)
+        hashed_pw = await hasher.hash_password(request.new_password)
 
-        cur.execute("UPDATE userauth SET pswd = %s WHERE shid = %s", (hashed_pw, request.shid))
-        conn.commit()
+        async with connection() as conn:
+            await conn.execute("UPDATE userauth SET pswd = %s WHERE shid = %s", (hashed_pw, request.shid))
+            await conn.commit()
 
         return {"message": "Password reset successful"}
 
+    except HTTPException:
+        raise
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
     except Exception as e:
         print("Password reset error:", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-
-    finally:
-        if conn:
-            conn.close()
@@ -0,0 +1,314 @@
+# backend/migrate.py - forward-only schema migrations and query-plan checks
+#
+#   python migrate.py            apply pending migrations
+#   python migrate.py status     list applied / pending migrations
+#   python migrate.py check      EXPLAIN the router hot queries, fail on seq scans
+#
+# Migrations are NNNN_name.sql files, or NNNN_name.py files defining
+# upgrade(conn) for data migrations that need Python (e.g. the blob store).
+import os
+import re
+import sys
+import json
+import hashlib
+import importlib.util
+from typing import List, NamedTuple, Optional, Tuple
+
+from db import connect
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Arbitrary constant so concurrent deploys don't run migrations twice
+MIGRATION_LOCK_KEY = 7_420_001
+
+MIGRATION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        Version     INT PRIMARY KEY,
+        Name        VARCHAR(200) NOT NULL,
+        Checksum    CHAR(64)     NOT NULL,
+        Applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    sql: str  # file source; Python source for .py migrations
+    checksum: str
+    transactional: bool
+    path: str = ""
+
+    @property
+    def is_python(self) -> bool:
+        return self.path.endswith(".py")
+
+
+class MigrationError(Exception):
+    pass
+
+
+# ───────────────────────── LOADING ──────────────────────────
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Read NNNN_name.sql / NNNN_name.py files in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = re.match(r"^(\d+)_(\w+)\.(sql|py)$", filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode()).hexdigest(),
+            transactional=NO_TRANSACTION_MARKER not in sql,
+            path=path,
+        ))
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Split a migration into statements on lines ending with ';' (comments
+    dropped). Lines inside a $$-quoted function body never end a statement.
+    """
+    statements, current = [], []
+    in_body = False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        current.append(line)
+        if line.count("$$") % 2:
+            in_body = not in_body
+        if stripped.endswith(";") and not in_body:
+            statements.append("\n".join(current))
+            current = []
+    if current:
+        statements.append("\n".join(current))
+    return statements
+
+
+# ───────────────────────── APPLYING ──────────────────────────
+
+def applied_migrations(cur) -> dict:
+    cur.execute("SELECT Version, Name, Checksum FROM schema_migrations ORDER BY Version")
+    return {version: (name, checksum.strip()) for version, name, checksum in cur.fetchall()}
+
+
+def apply_migrations(conn, migrations: List[Migration] = None, verbose: bool = True) -> List[Migration]:
+    """
+    Apply every migration newer than the database, in order.
+    Already-applied migrations must be unchanged (forward-only): edit history
+    by adding a new migration, never by rewriting an old one.
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+
+    try:
+        cur.execute(MIGRATION_TABLE_SQL)
+        applied = applied_migrations(cur)
+
+        for m in migrations:
+            if m.version in applied and applied[m.version][1] != m.checksum:
+                raise MigrationError(
+                    f"Migration {m.version:04d}_{m.name} was modified after being applied"
+                )
+
+        pending = [m for m in migrations if m.version not in applied]
+        for m in pending:
+            if verbose:
+                print(f"→ Applying {m.version:04d}_{m.name}")
+            if m.is_python:
+                # upgrade() may commit in batches; the record is committed last
+                conn.autocommit = False
+                try:
+                    _load_module(m).upgrade(conn)
+                    with conn.cursor() as record_cur:
+                        _record(record_cur, m)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.autocommit = True
+            elif m.transactional:
+                conn.autocommit = False
+                try:
+                    cur.execute(m.sql)
+                    _record(cur, m)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.autocommit = True
+            else:
+                # e.g. CREATE INDEX CONCURRENTLY, which can't run inside a transaction
+                for statement in split_statements(m.sql):
+                    cur.execute(statement)
+                _record(cur, m)
+        return pending
+
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+        cur.close()
+
+
+def _load_module(m: Migration):
+    spec = importlib.util.spec_from_file_location(f"migration_{m.version:04d}_{m.name}", m.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _record(cur, m: Migration):
+    cur.execute(
+        "INSERT INTO schema_migrations (Version, Name, Checksum) VALUES (%s, %s, %s)",
+        (m.version, m.name, m.checksum),
+    )
+
+
+# ───────────────────────── QUERY PLAN CHECK ──────────────────────────
+# The selective router queries, taken from the modules that run them. Each
+# must be able to use an index: with enable_seqscan off, any remaining Seq
+# Scan (or index scan without an index condition) means no index can serve
+# the predicate. Full-table admin listings are deliberately absent; their
+# keyset pages are not.
+
+SAMPLE_SHID = "SHID001"
+SAMPLE_DAY = "2026-01-01"
+
+
+def plan_checks() -> List[Tuple[str, str, tuple]]:
+    """(name, SQL, sample params) per query. Imports the routers, so only `check` loads the app."""
+    import admin
+    import main
+    import wardan
+    import complaint_counters
+    import data_version
+    import email_outbox
+    import proof_pipeline
+    from pagination import page_query
+
+    return [
+        ("student by shid", main.STUDENT_IDENTITY_SQL, (SAMPLE_SHID,)),
+        ("user login", main.USER_LOGIN_SQL, (SAMPLE_SHID,)),
+        ("warden login", wardan.WARDEN_LOGIN_SQL, ("warden@gmail.com",)),
+        ("student dashboard", main.DASHBOARD_SQL, (SAMPLE_SHID,)),
+        ("student complaints", *page_query(main.STUDENT_COMPLAINTS, (1,))),
+        ("student complaints page", *page_query(main.STUDENT_COMPLAINTS, (1,), after=(SAMPLE_DAY, 1))),
+        ("warden complaints", *page_query(wardan.WARDEN_COMPLAINTS, (1,))),
+        ("warden complaints page", *page_query(wardan.WARDEN_COMPLAINTS, (1,), after=(SAMPLE_DAY, 1))),
+        ("warden complaint stats", complaint_counters.HOSTEL_STATUS_SQL, (1,)),
+        ("warden complaint proof", wardan.WARDEN_PROOF_SQL, (1, 1)),
+        ("warden proof by hash", wardan.WARDEN_PROOF_BY_HASH_SQL, ("0" * 64, 1)),
+        ("admin complaints page", *page_query(admin.ADMIN_COMPLAINTS, after=(SAMPLE_DAY, 1))),
+        ("admin overdue complaints", *page_query(admin.ADMIN_OVERDUE)),
+        ("admin overdue page", *page_query(admin.ADMIN_OVERDUE, after=(SAMPLE_DAY, 1))),
+        ("admin students page", *page_query(admin.ADMIN_STUDENTS, after=("M", 1))),
+        ("admin students of hostel page", *page_query(admin.ADMIN_STUDENTS, (1,), ["hostel"], after=("M", 1))),
+        ("admin wardens page", *page_query(admin.ADMIN_WARDENS, after=("M", 1))),
+        ("admin recent complaints", admin.RECENT_COMPLAINTS_SQL, ()),
+        ("proof pipeline backfill", proof_pipeline.BACKFILL_SQL, (0, proof_pipeline.BACKFILL_BATCH_SIZE)),
+        ("proof blob references", proof_pipeline.PROOF_REFERENCED_SQL, ("0" * 64,)),
+        ("data version lookup", data_version.VERSIONS_SQL,
+         ([data_version.STUDENT, data_version.RESIDENCE], [1, 1])),
+        ("admin summary token", data_version.SUMMARY_TOKEN_SQL, ()),
+        ("counter recount", complaint_counters.RECOUNT_SQL, (1,)),
+        ("counter recount unassigned", complaint_counters.RECOUNT_UNASSIGNED_SQL, ()),
+        ("email outbox claim", email_outbox.CLAIM_SQL,
+         (email_outbox.EMAIL_LEASE_SECONDS, email_outbox.EMAIL_BATCH_SIZE)),
+    ]
+
+
+def _unindexed_scans(plan: dict, partial_indexes: set, limited: bool = False) -> List[str]:
+    """
+    Seq Scans, plus index scans with no Index Cond outside a LIMIT: those walk
+    the whole index and only look indexed because enable_seqscan is off.
+    Partial indexes are exempt, their WHERE clause is the condition.
+    """
+    found = []
+    node = plan.get("Node Type")
+    relation = plan.get("Relation Name", "?")
+    if node == "Seq Scan":
+        found.append(f"Seq Scan on {relation}")
+    elif (node in ("Index Scan", "Index Only Scan") and "Index Cond" not in plan
+          and not limited and plan.get("Index Name") not in partial_indexes):
+        found.append(f"full Index Scan on {relation}")
+    limited = limited or node == "Limit"
+    for child in plan.get("Plans", []):
+        found.extend(_unindexed_scans(child, partial_indexes, limited))
+    return found
+
+
+def check_query_plans(conn, checks: Optional[List[Tuple[str, str, tuple]]] = None,
+                      verbose: bool = True) -> List[str]:
+    """EXPLAIN every check query; return a failure line per query that can't use an index."""
+    checks = plan_checks() if checks is None else checks
+    failures = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT indexrelid::regclass::text FROM pg_index WHERE indpred IS NOT NULL")
+        partial_indexes = {row[0] for row in cur.fetchall()}
+
+        cur.execute("SET enable_seqscan = off")
+        for name, sql, params in checks:
+            cur.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cur.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = _unindexed_scans(plan[0]["Plan"], partial_indexes)
+            if scans:
+                failures.append(f"{name}: {', '.join(sorted(set(scans)))}")
+            if verbose:
+                print(f"{'✘' if scans else '✔'} {name}")
+        cur.execute("RESET enable_seqscan")
+    conn.rollback()
+    return failures
+
+
+# ───────────────────────── CLI ──────────────────────────
+
+def main(argv: List[str]) -> int:
+    command = argv[1] if len(argv) > 1 else "up"
+    conn = connect()
+    try:
+        if command == "up":
+            applied = apply_migrations(conn)
+            print(f"✔ {len(applied)} migration(s) applied" if applied else "✔ Schema is up to date")
+        elif command == "status":
+            with conn.cursor() as cur:
+                cur.execute(MIGRATION_TABLE_SQL)
+                applied = applied_migrations(cur)
+            conn.commit()
+            for m in load_migrations():
+                state = "applied" if m.version in applied else "pending"
+                print(f"{m.version:04d}_{m.name:<40} {state}")
+        elif command == "check":
+            failures = check_query_plans(conn)
+            if failures:
+                print("Unindexed scans found:\n  " + "\n  ".join(failures))
+                return 1
+            print("✔ All router queries can use an index")
+        else:
+            print(f"Unknown command: {command} (expected up, status or check)")
+            return 2
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,76 @@
+-- Baseline schema. Matches the tables db.py used to create, but with
+-- IF NOT EXISTS so it can be recorded against an existing database
+-- without touching its data.
+
+CREATE TABLE IF NOT EXISTS Hostel (
+    HID SERIAL PRIMARY KEY,
+    Name VARCHAR(100),
+    Location VARCHAR(100),
+    NumberOfRooms INT
+);
+
+CREATE TABLE IF NOT EXISTS Warden (
+    WID SERIAL PRIMARY KEY,
+    Name VARCHAR(100),
+    Mail VARCHAR(100),
+    Phone VARCHAR(20),
+    Password VARCHAR(100),
+    HID INT REFERENCES Hostel(HID) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Room (
+    RID SERIAL PRIMARY KEY,
+    RoomNumber VARCHAR(20),
+    Capacity INT,
+    HID INT REFERENCES Hostel(HID)
+);
+
+CREATE TABLE IF NOT EXISTS Student (
+    SID SERIAL PRIMARY KEY,
+    Name VARCHAR(100),
+    Phone VARCHAR(20),
+    Mail VARCHAR(100),
+    DOB DATE,
+    HID INT REFERENCES Hostel(HID),
+    SHID VARCHAR(50) UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS UserAuth (
+    UID SERIAL PRIMARY KEY,
+    SHID VARCHAR(50) REFERENCES Student(SHID),
+    PSWD VARCHAR(100)
+);
+
+CREATE TABLE IF NOT EXISTS Complaint (
+    CID SERIAL PRIMARY KEY,
+    SID INT REFERENCES Student(SID),
+    Type VARCHAR(100),
+    Created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    Status VARCHAR(50) DEFAULT 'Pending',
+    Description TEXT,
+    ProofImage TEXT,
+    WithdrawCount INT DEFAULT 0,
+    IsWithdrawn BOOLEAN DEFAULT FALSE
+);
+
+CREATE TABLE IF NOT EXISTS Admin (
+    AID         SERIAL PRIMARY KEY,
+    Email       VARCHAR(150) UNIQUE NOT NULL,
+    Password    VARCHAR(100)        NOT NULL,
+    Name        VARCHAR(100),
+    Created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Ticket (
+    TID SERIAL PRIMARY KEY,                      -- Unique Ticket ID
+    CID INT REFERENCES Complaint(CID) ON DELETE CASCADE,  -- Linked Complaint
+    RaisedBySID INT REFERENCES Student(SID),    -- Student who raised the ticket
+    WID INT REFERENCES Warden(WID),             -- Assigned Warden (if any)
+    Title VARCHAR(150) NOT NULL,                -- Short title for the ticket
+    Description TEXT,                            -- Additional details or follow-up
+    Status VARCHAR(50) DEFAULT 'Open',          -- Ticket status (Open, In Progress, Resolved, Closed)
+    Priority VARCHAR(50) DEFAULT 'Normal',      -- Priority level (Low, Normal, High)
+    EscalationLevel INT DEFAULT 0,              -- Track escalation steps
+    Created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- Ticket creation time
+    Updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- Last updated timestamp
+);
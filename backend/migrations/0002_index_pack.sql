@@ -0,0 +1,36 @@
+-- migrate: no-transaction
+-- Secondary indexes for the router hot paths. Built CONCURRENTLY so the
+-- migration does not block complaint writes on a live database. If a build
+-- fails, Postgres leaves an INVALID index behind: drop it before re-running.
+
+-- Student complaint lists, dashboard counts and recent-5 (WHERE SID = ? ORDER BY Created_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_sid_created_at
+    ON Complaint (SID, Created_at DESC);
+
+-- Admin complaint listings (ORDER BY created_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_created_at
+    ON Complaint (Created_at DESC);
+
+-- Pending counts and the overdue report
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_pending_created_at
+    ON Complaint (Created_at)
+    WHERE Status = 'Pending';
+
+-- Warden views (WHERE s.HID = ?)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_student_hid
+    ON Student (HID);
+
+-- Warden login
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_warden_mail
+    ON Warden (Mail);
+
+-- Dashboard warden / room joins
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_warden_hid
+    ON Warden (HID);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_room_hid
+    ON Room (HID);
+
+-- Student login, registration and password reset
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_userauth_shid
+    ON UserAuth (SHID);
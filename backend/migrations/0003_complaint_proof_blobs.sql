@@ -0,0 +1,7 @@
+-- Proof images move out of the Complaint heap into the content-addressed
+-- blob store (blob_store.py). The row keeps only the SHA-256 reference.
+-- ProofImage stays for rows written by older code until 0004 empties it.
+
+ALTER TABLE Complaint ADD COLUMN IF NOT EXISTS ProofHash CHAR(64);
+ALTER TABLE Complaint ADD COLUMN IF NOT EXISTS ProofMime VARCHAR(100);
+ALTER TABLE Complaint ADD COLUMN IF NOT EXISTS ProofSize INT;
@@ -0,0 +1,52 @@
+"""
+Move inline base64 proofs out of Complaint.ProofImage into the blob store.
+
+Works in CID order, BATCH_SIZE rows per transaction, so it can run against a
+live database and be resumed: only rows that still have ProofImage set are
+touched. Blobs are written before their row is updated, so a crash leaves at
+worst an unreferenced blob, never a dangling hash. Rows whose ProofImage
+isn't valid base64 are left inline and reported.
+"""
+from psycopg2.extras import execute_batch
+
+from blob_store import put_bytes, decode_data_url, InvalidProofData
+
+BATCH_SIZE = 500
+
+
+def upgrade(conn):
+    last_cid, moved, skipped = 0, 0, 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT CID, ProofImage
+                FROM Complaint
+                WHERE CID > %s AND ProofImage IS NOT NULL
+                ORDER BY CID
+                LIMIT %s
+            """, (last_cid, BATCH_SIZE))
+            rows = cur.fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for cid, proof_image in rows:
+            try:
+                data, mime = decode_data_url(proof_image)
+            except InvalidProofData:
+                skipped += 1
+                continue
+            updates.append((put_bytes(data), mime, len(data), cid))
+
+        with conn.cursor() as cur:
+            execute_batch(cur, """
+                UPDATE Complaint
+                SET ProofHash = %s, ProofMime = %s, ProofSize = %s, ProofImage = NULL
+                WHERE CID = %s
+            """, updates)
+        conn.commit()
+
+        moved += len(updates)
+        last_cid = rows[-1][0]
+
+    print(f"   moved {moved} proof(s) to the blob store, left {skipped} undecodable proof(s) inline")
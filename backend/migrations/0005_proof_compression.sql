@@ -0,0 +1,9 @@
+-- Proofs are re-encoded in the background (proof_pipeline.py).
+-- ProofOriginalSize is the uploaded size; NULL means not processed yet.
+
+ALTER TABLE Complaint ADD COLUMN IF NOT EXISTS ProofOriginalSize INT;
+
+-- The backfill sweep only looks at proofs still waiting for the pipeline
+CREATE INDEX IF NOT EXISTS idx_complaint_proof_unprocessed
+    ON Complaint (CID)
+    WHERE ProofHash IS NOT NULL AND ProofOriginalSize IS NULL;
@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- /warden/proof/{hash} looks complaints up by content hash
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_proof_hash
+    ON Complaint (ProofHash)
+    WHERE ProofHash IS NOT NULL;
@@ -0,0 +1,21 @@
+-- Outgoing e-mail is queued here and delivered by email_outbox.py, so routes
+-- never wait on the SMTP server. Status: pending | sent | failed.
+-- While a row is being sent, NextAttemptAt is pushed out as a lease.
+
+CREATE TABLE IF NOT EXISTS EmailOutbox (
+    ID             BIGSERIAL PRIMARY KEY,
+    Recipient      VARCHAR(150) NOT NULL,
+    Subject        VARCHAR(200) NOT NULL,
+    Body           TEXT         NOT NULL,
+    Status         VARCHAR(10)  NOT NULL DEFAULT 'pending',
+    Attempts       INT          NOT NULL DEFAULT 0,
+    NextAttemptAt  TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
+    LastError      TEXT,
+    Created_at     TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
+    Sent_at        TIMESTAMPTZ
+);
+
+-- The worker only ever looks for pending rows that are due
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+    ON EmailOutbox (NextAttemptAt)
+    WHERE Status = 'pending';
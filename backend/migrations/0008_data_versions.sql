@@ -0,0 +1,147 @@
+-- Version counters behind the ETags of the dashboard and analytics routes
+-- (data_version.py). A route compares one of these rows with If-None-Match
+-- instead of re-running its aggregates. Scopes:
+--   student    SID   the student's row and their complaints
+--   hostel     HID   complaints and students of the hostel (warden views;
+--                    the admin summary sums this scope)
+--   residence  HID   the hostel's own row, its wardens and rooms
+-- Students without a hostel count under HID 0.
+--
+-- Versions come from one sequence and only ever grow, so a token is never
+-- reused, not even after a row is recreated. Triggers are per statement over
+-- transition tables, so a COPY of 50k complaints bumps each row once.
+
+CREATE SEQUENCE IF NOT EXISTS data_version_seq;
+
+CREATE TABLE IF NOT EXISTS DataVersion (
+    Scope    VARCHAR(10) NOT NULL,
+    ScopeID  INT         NOT NULL,
+    Version  BIGINT      NOT NULL,
+    PRIMARY KEY (Scope, ScopeID)
+);
+
+-- Sorted, so concurrent writers lock version rows in the same order
+CREATE OR REPLACE FUNCTION bump_data_version(scope_name TEXT, ids INT[]) RETURNS VOID
+LANGUAGE sql AS $$
+    INSERT INTO DataVersion (Scope, ScopeID, Version)
+    SELECT scope_name, id, nextval('data_version_seq')
+    FROM (SELECT DISTINCT unnest(ids) AS id) changed
+    ORDER BY id
+    ON CONFLICT (Scope, ScopeID)
+    DO UPDATE SET Version = GREATEST(DataVersion.Version + 1, EXCLUDED.Version);
+$$;
+
+CREATE OR REPLACE FUNCTION bump_complaint_versions() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    sids INT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        sids := ARRAY(SELECT DISTINCT SID FROM new_rows WHERE SID IS NOT NULL);
+    ELSIF TG_OP = 'UPDATE' THEN
+        sids := ARRAY(SELECT SID FROM new_rows WHERE SID IS NOT NULL
+                      UNION SELECT SID FROM old_rows WHERE SID IS NOT NULL);
+    ELSE
+        sids := ARRAY(SELECT DISTINCT SID FROM old_rows WHERE SID IS NOT NULL);
+    END IF;
+    PERFORM bump_data_version('student', sids);
+    PERFORM bump_data_version('hostel',
+        ARRAY(SELECT DISTINCT COALESCE(HID, 0) FROM Student WHERE SID = ANY(sids)));
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION bump_student_versions() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_data_version('student', ARRAY(SELECT SID FROM new_rows));
+        PERFORM bump_data_version('hostel', ARRAY(SELECT COALESCE(HID, 0) FROM new_rows));
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_data_version('student', ARRAY(SELECT SID FROM old_rows));
+        PERFORM bump_data_version('hostel', ARRAY(SELECT COALESCE(HID, 0) FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Hostel, Warden and Room all carry HID
+CREATE OR REPLACE FUNCTION bump_residence_versions() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_data_version('residence', ARRAY(SELECT COALESCE(HID, 0) FROM new_rows));
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_data_version('residence', ARRAY(SELECT COALESCE(HID, 0) FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- A trigger with transition tables covers one event, hence three per table
+DROP TRIGGER IF EXISTS complaint_version_ins ON Complaint;
+CREATE TRIGGER complaint_version_ins AFTER INSERT ON Complaint
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_complaint_versions();
+DROP TRIGGER IF EXISTS complaint_version_upd ON Complaint;
+CREATE TRIGGER complaint_version_upd AFTER UPDATE ON Complaint
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_complaint_versions();
+DROP TRIGGER IF EXISTS complaint_version_del ON Complaint;
+CREATE TRIGGER complaint_version_del AFTER DELETE ON Complaint
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_complaint_versions();
+
+DROP TRIGGER IF EXISTS student_version_ins ON Student;
+CREATE TRIGGER student_version_ins AFTER INSERT ON Student
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_student_versions();
+DROP TRIGGER IF EXISTS student_version_upd ON Student;
+CREATE TRIGGER student_version_upd AFTER UPDATE ON Student
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_student_versions();
+DROP TRIGGER IF EXISTS student_version_del ON Student;
+CREATE TRIGGER student_version_del AFTER DELETE ON Student
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_student_versions();
+
+DROP TRIGGER IF EXISTS hostel_version_ins ON Hostel;
+CREATE TRIGGER hostel_version_ins AFTER INSERT ON Hostel
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+DROP TRIGGER IF EXISTS hostel_version_upd ON Hostel;
+CREATE TRIGGER hostel_version_upd AFTER UPDATE ON Hostel
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+DROP TRIGGER IF EXISTS hostel_version_del ON Hostel;
+CREATE TRIGGER hostel_version_del AFTER DELETE ON Hostel
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+
+DROP TRIGGER IF EXISTS warden_version_ins ON Warden;
+CREATE TRIGGER warden_version_ins AFTER INSERT ON Warden
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+DROP TRIGGER IF EXISTS warden_version_upd ON Warden;
+CREATE TRIGGER warden_version_upd AFTER UPDATE ON Warden
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+DROP TRIGGER IF EXISTS warden_version_del ON Warden;
+CREATE TRIGGER warden_version_del AFTER DELETE ON Warden
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+
+DROP TRIGGER IF EXISTS room_version_ins ON Room;
+CREATE TRIGGER room_version_ins AFTER INSERT ON Room
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+DROP TRIGGER IF EXISTS room_version_upd ON Room;
+CREATE TRIGGER room_version_upd AFTER UPDATE ON Room
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
+DROP TRIGGER IF EXISTS room_version_del ON Room;
+CREATE TRIGGER room_version_del AFTER DELETE ON Room
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_residence_versions();
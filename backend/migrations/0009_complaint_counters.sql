@@ -0,0 +1,112 @@
+-- Complaint totals per (hostel, type, status), kept current by triggers so the
+-- warden and admin stats read a few hundred rows instead of scanning
+-- Complaint. NULL types/statuses count as '' and complaints of students
+-- without a hostel under HID 0. complaint_counters.py recounts and repairs.
+--
+-- The triggers are created before the backfill, in the same transaction, so
+-- complaint writes wait for the migration instead of slipping past both.
+
+CREATE TABLE IF NOT EXISTS ComplaintCounter (
+    HID     INT          NOT NULL,
+    Type    VARCHAR(100) NOT NULL,
+    Status  VARCHAR(50)  NOT NULL,
+    Total   BIGINT       NOT NULL DEFAULT 0,
+    PRIMARY KEY (HID, Type, Status)
+);
+
+-- Net change per counter; rows that cancel out (an update that left type and
+-- status alone) are never touched, so they take no row lock
+CREATE OR REPLACE FUNCTION apply_complaint_deltas(hids INT[], types TEXT[], statuses TEXT[], deltas INT[])
+RETURNS VOID
+LANGUAGE sql AS $$
+    INSERT INTO ComplaintCounter (HID, Type, Status, Total)
+    SELECT hid, COALESCE(type, ''), COALESCE(status, ''), SUM(delta)
+    FROM unnest(hids, types, statuses, deltas) AS d(hid, type, status, delta)
+    GROUP BY 1, 2, 3
+    HAVING SUM(delta) <> 0
+    ORDER BY 1, 2, 3
+    ON CONFLICT (HID, Type, Status)
+    DO UPDATE SET Total = ComplaintCounter.Total + EXCLUDED.Total;
+$$;
+
+CREATE OR REPLACE FUNCTION count_complaint_changes() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    hids INT[];
+    types TEXT[];
+    statuses TEXT[];
+    deltas INT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(COALESCE(s.HID, 0)), array_agg(c.Type), array_agg(c.Status), array_agg(1)
+        INTO hids, types, statuses, deltas
+        FROM new_rows c LEFT JOIN Student s ON s.SID = c.SID;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(COALESCE(s.HID, 0)), array_agg(c.Type), array_agg(c.Status), array_agg(c.delta)
+        INTO hids, types, statuses, deltas
+        FROM (SELECT SID, Type, Status, 1 AS delta FROM new_rows
+              UNION ALL
+              SELECT SID, Type, Status, -1 FROM old_rows) c
+        LEFT JOIN Student s ON s.SID = c.SID;
+    ELSE
+        SELECT array_agg(COALESCE(s.HID, 0)), array_agg(c.Type), array_agg(c.Status), array_agg(-1)
+        INTO hids, types, statuses, deltas
+        FROM old_rows c LEFT JOIN Student s ON s.SID = c.SID;
+    END IF;
+    IF hids IS NOT NULL THEN
+        PERFORM apply_complaint_deltas(hids, types, statuses, deltas);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- A student moving hostel takes their complaints along
+CREATE OR REPLACE FUNCTION move_complaint_counts() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    hids INT[];
+    types TEXT[];
+    statuses TEXT[];
+    deltas INT[];
+BEGIN
+    SELECT array_agg(m.hid), array_agg(c.Type), array_agg(c.Status), array_agg(m.delta)
+    INTO hids, types, statuses, deltas
+    FROM (SELECT o.SID, COALESCE(o.HID, 0) AS hid, -1 AS delta
+          FROM old_rows o JOIN new_rows n ON n.SID = o.SID
+          WHERE o.HID IS DISTINCT FROM n.HID
+          UNION ALL
+          SELECT n.SID, COALESCE(n.HID, 0), 1
+          FROM old_rows o JOIN new_rows n ON n.SID = o.SID
+          WHERE o.HID IS DISTINCT FROM n.HID) m
+    JOIN Complaint c ON c.SID = m.SID;
+    IF hids IS NOT NULL THEN
+        PERFORM apply_complaint_deltas(hids, types, statuses, deltas);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS complaint_counter_ins ON Complaint;
+CREATE TRIGGER complaint_counter_ins AFTER INSERT ON Complaint
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_complaint_changes();
+DROP TRIGGER IF EXISTS complaint_counter_upd ON Complaint;
+CREATE TRIGGER complaint_counter_upd AFTER UPDATE ON Complaint
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_complaint_changes();
+DROP TRIGGER IF EXISTS complaint_counter_del ON Complaint;
+CREATE TRIGGER complaint_counter_del AFTER DELETE ON Complaint
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_complaint_changes();
+
+DROP TRIGGER IF EXISTS student_counter_upd ON Student;
+CREATE TRIGGER student_counter_upd AFTER UPDATE ON Student
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION move_complaint_counts();
+
+INSERT INTO ComplaintCounter (HID, Type, Status, Total)
+SELECT COALESCE(s.HID, 0), COALESCE(c.Type, ''), COALESCE(c.Status, ''), COUNT(*)
+FROM Complaint c
+LEFT JOIN Student s ON s.SID = c.SID
+GROUP BY 1, 2, 3
+ON CONFLICT (HID, Type, Status) DO UPDATE SET Total = EXCLUDED.Total;
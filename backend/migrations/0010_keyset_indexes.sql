@@ -0,0 +1,34 @@
+-- migrate: no-transaction
+-- Keyset pagination (pagination.py) orders every list by (sort column, id)
+-- and starts each page with a row comparison on both. These indexes cover
+-- the pair so any page is a range scan of its own rows. The old single-
+-- column complaint indexes are prefixes of the new ones and are dropped.
+
+-- /admin/complaints, /admin/analytics/complaints (Created_at DESC, CID DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_created_at_cid
+    ON Complaint (Created_at, CID);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_complaint_created_at;
+
+-- /fetch_complaint/{shid} and the student dashboard (WHERE SID = ? ORDER BY Created_at DESC)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_sid_created_at_cid
+    ON Complaint (SID, Created_at, CID);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_complaint_sid_created_at;
+
+-- Pending counts and /admin/complaints/overdue
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_complaint_pending_created_at_cid
+    ON Complaint (Created_at, CID)
+    WHERE Status = 'Pending';
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_complaint_pending_created_at;
+
+-- /admin/students and /admin/wardens sort by name; NULL names sort as ''
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_student_name_sid
+    ON Student (COALESCE(Name, ''), SID);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_student_hid_name_sid
+    ON Student (HID, COALESCE(Name, ''), SID);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_warden_name_wid
+    ON Warden (COALESCE(Name, ''), WID);
@@ -0,0 +1,202 @@
+# backend/pagination.py - opaque keyset cursors and paged list endpoints
+#
+# A page ends at some row; the cursor is that row's sort key, so the next page
+# is a WHERE on the key instead of an OFFSET that re-reads everything before
+# it. Keys are (value, id): the value may be NULL and repeat, the id is unique.
+# Cursors are URL-safe base64 of the JSON key; clients pass them back as is.
+#
+# A Listing describes one list endpoint: its columns, the sort keys and
+# filters clients may ask for, and the unique id that breaks ties. With an
+# index on (sort column, id) every page is an index range scan of `limit`
+# rows, however deep it is. Totals are the planner's row estimate for the
+# filtered query (one EXPLAIN, no COUNT(*)), so they are approximate.
+import os
+import base64
+import binascii
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Request, Response
+
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", "1000"))
+
+Key = Tuple[Any, int]
+
+
+def encode_cursor(value: Any, row_id: int, sort: Optional[str] = None) -> str:
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    key = [value, row_id] if sort is None else [value, row_id, sort]
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], sort: Optional[str] = None) -> Optional[Key]:
+    """
+    The (value, id) key in a cursor, None for the first page; 400 if it was
+    tampered with or, when `sort` is given, was issued for another sort.
+    """
+    if not cursor:
+        return None
+    try:
+        value, row_id, *tag = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(row_id, int) or isinstance(value, (list, dict)) or len(tag) > 1:
+            raise ValueError(cursor)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if sort is not None and tag != [sort]:
+        raise HTTPException(status_code=400, detail="Cursor belongs to a different sort order")
+    return value, row_id
+
+
+def keyset_after(column: str, id_column: str, descending: bool, key: Key,
+                 nullable: bool = True) -> Tuple[str, tuple]:
+    """
+    WHERE clause for the rows after `key` in ORDER BY column, id_column (both
+    ASC or both DESC), with Postgres' default NULL placement: last ascending,
+    first descending. Written as a row comparison so an index on
+    (column, id_column) can start at the key instead of filtering its way
+    there; pass nullable=False when `column` can't be NULL to keep it that way
+    ascending too.
+    """
+    value, row_id = key
+    op = "<" if descending else ">"
+    if value is None:
+        if descending:
+            return f"(({column} IS NULL AND {id_column} < %s) OR {column} IS NOT NULL)", (row_id,)
+        return f"({column} IS NULL AND {id_column} > %s)", (row_id,)
+    nulls_after = f" OR {column} IS NULL" if nullable and not descending else ""
+    return f"(({column}, {id_column}) {op} (%s, %s){nulls_after})", (value, row_id)
+
+
+# ───────────────────────── LISTINGS ──────────────────────────
+
+class Sort(NamedTuple):
+    column: str            # SQL expression, with an index on (column, id) behind it
+    nullable: bool = True   # False if the column can't be NULL: ascending pages stay index range scans
+
+
+class Filter(NamedTuple):
+    condition: str                        # SQL with a single %s
+    convert: Callable[[str], Any] = str   # ValueError means a 400
+
+
+class Listing(NamedTuple):
+    select: str                 # "expr, expr, ..." in the order of `fields`
+    source: str                 # FROM ... JOIN ...
+    id_column: str              # unique tie-breaker
+    sorts: Dict[str, Sort]
+    default_sort: str           # a sort name, "-name" for descending
+    filters: Dict[str, Filter] = {}
+    where: str = ""             # fixed conditions; %s values come with each request
+    default_limit: int = PAGE_DEFAULT_LIMIT
+
+
+class Page(NamedTuple):
+    rows: List[tuple]           # the selected columns, key columns stripped
+    next: Optional[str]         # cursor for the following page, None on the last
+    estimated_total: int        # planner estimate of all matching rows
+
+
+def _parse_sort(listing: Listing, sort: Optional[str]) -> Tuple[str, Sort, bool]:
+    sort = sort or listing.default_sort
+    name = sort.lstrip("-")
+    if name not in listing.sorts:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {sorted(listing.sorts)}, optionally prefixed with -")
+    return sort, listing.sorts[name], sort.startswith("-")
+
+
+def _filters(listing: Listing, request: Request) -> Tuple[List[str], list]:
+    """Names and values of the filters in the query string."""
+    # Anything else in the query string (cache-busters, tracking tags) is ignored
+    names, params = [], []
+    for name, spec in listing.filters.items():
+        raw = request.query_params.get(name)
+        if raw is None or raw == "":
+            continue
+        try:
+            params.append(spec.convert(raw))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid value for {name}: {raw!r}")
+        names.append(name)
+    return names, params
+
+
+def _conditions(listing: Listing, filters: Sequence[str]) -> List[str]:
+    conditions = [listing.filters[name].condition for name in filters]
+    return [listing.where, *conditions] if listing.where else conditions
+
+
+def _where(conditions: List[str]) -> str:
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def page_query(listing: Listing, params: tuple = (), filters: Sequence[str] = (),
+               sort: Optional[str] = None, after: Optional[Key] = None,
+               limit: Optional[int] = None) -> Tuple[str, tuple]:
+    """
+    SQL and parameters for one page of `listing`, as fetch_page runs it (and
+    `python migrate.py check` EXPLAINs it). `params` fill listing.where, then
+    the named `filters`; `after` is the key of the previous page's last row.
+    """
+    _, spec, descending = _parse_sort(listing, sort)
+    limit = listing.default_limit if limit is None else limit
+    conditions = _conditions(listing, filters)
+    params = tuple(params)
+    if after is not None:
+        condition, key_params = keyset_after(spec.column, listing.id_column, descending, after, spec.nullable)
+        conditions.append(condition)
+        params += key_params
+    direction = " DESC" if descending else ""
+    # One row past the page tells whether there is a next one
+    sql = (f"SELECT {listing.select}, {spec.column}, {listing.id_column} FROM {listing.source}{_where(conditions)}"
+           f" ORDER BY {spec.column}{direction}, {listing.id_column}{direction} LIMIT %s")
+    return sql, params + (limit + 1,)
+
+
+async def estimate_rows(conn, sql: str, params: tuple) -> int:
+    """The planner's row estimate for a query; costs a plan, not a scan."""
+    cur = await conn.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+    plan = (await cur.fetchone())[0]
+    if isinstance(plan, str):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def fetch_page(conn, listing: Listing, request: Request, params: tuple = (),
+                     cursor: Optional[str] = None, limit: Optional[int] = None,
+                     sort: Optional[str] = None) -> Page:
+    """
+    One page of `listing`. `params` fill the %s in listing.where; filters
+    come from the query string, where parameters that are neither a filter
+    nor cursor/limit/sort are ignored.
+    """
+    limit = listing.default_limit if limit is None else limit
+    if not 1 <= limit <= PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {PAGE_MAX_LIMIT}")
+    sort = _parse_sort(listing, sort)[0]
+    after = decode_cursor(cursor, sort)
+
+    filters, filter_params = _filters(listing, request)
+    params = tuple(params) + tuple(filter_params)
+    where = _where(_conditions(listing, filters))
+    estimated = await estimate_rows(conn, f"SELECT 1 FROM {listing.source}{where}", params)
+
+    cur = await conn.execute(*page_query(listing, params, filters, sort, after, limit))
+    rows = await cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1], sort)
+    elif after is None:
+        estimated = len(rows)  # everything fit on the first page: exact
+    return Page([row[:-2] for row in rows], next_cursor, estimated)
+
+
+def page_headers(response: Response, page: Page):
+    """Next cursor and estimate as headers: the only place for them when the body is a bare array."""
+    if page.next:
+        response.headers["X-Next-Cursor"] = page.next
+    response.headers["X-Estimated-Total"] = str(page.estimated_total)
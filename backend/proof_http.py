@@ -0,0 +1,96 @@
+# backend/proof_http.py - HTTP caching and byte ranges for blob-store responses
+#
+# Blobs are content addressed, so the SHA-256 is a strong ETag for free:
+# If-None-Match needs no file access, and Range/If-Range map directly onto
+# blob_store.iter_blob. Only single ranges are served; a multi-range request
+# gets the full body, which RFC 9110 allows.
+import re
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+import blob_store
+
+# Content-addressed URLs never change meaning; per-complaint URLs can (the
+# proof pipeline swaps in a re-encoded blob), so those must revalidate.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_for(tag: str) -> str:
+    return f'"{tag}"'
+
+
+def etag_matches(request: Request, tag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag_for(tag) in tags
+
+
+def not_modified(tag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag_for(tag), "Cache-Control": cache_control})
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) for a single `bytes=` range, None to serve the whole
+    body. Raises 416 for a well-formed range that lies outside the blob.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None  # multi-range or garbage: ignore the header
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+async def blob_response(request: Request, digest: str, media_type: str,
+                        cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """Stream a blob with ETag, Cache-Control, 304 and Range handling."""
+    if etag_matches(request, digest):
+        return not_modified(digest, cache_control)
+
+    size = await run_in_threadpool(blob_store.blob_size, digest)
+    headers = {
+        "ETag": etag_for(digest),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag_for(digest):
+        byte_range = parse_range(request.headers.get("range"), size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        # Starlette iterates sync generators in a threadpool
+        return StreamingResponse(blob_store.iter_blob(digest), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(blob_store.iter_blob(digest, start, end), status_code=206,
+                             media_type=media_type, headers=headers)
@@ -0,0 +1,184 @@
+# backend/proof_pipeline.py - background re-encoding of complaint proof images
+#
+# Phone photos arrive at full resolution. After a complaint is stored, its proof
+# is decoded, capped to PROOF_MAX_DIMENSION and re-encoded as WebP (or JPEG) in
+# a process pool, so the CPU work never runs on the event loop or under the GIL
+# of the web worker. The complaint row then points at the smaller blob and keeps
+# the uploaded size in ProofOriginalSize; the original blob is deleted once no
+# complaint points at it.
+#
+#   python proof_pipeline.py      re-encode every proof not processed yet
+import os
+import io
+import sys
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+import blob_store
+from async_db import connection, open_pool, close_pool
+
+PROOF_MAX_DIMENSION = int(os.getenv("PROOF_MAX_DIMENSION", "1600"))
+PROOF_FORMAT = os.getenv("PROOF_FORMAT", "webp").lower()  # webp | jpeg
+PROOF_QUALITY = int(os.getenv("PROOF_QUALITY", "80"))
+PROOF_WORKERS = int(os.getenv("PROOF_WORKERS", "2"))
+
+BACKFILL_BATCH_SIZE = 100
+
+_FORMATS = {"webp": ("WEBP", "image/webp"), "jpeg": ("JPEG", "image/jpeg")}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+# ───────────────────────── ENCODING (worker processes) ──────────────────────────
+
+def compress_image(data: bytes, max_dimension: int = PROOF_MAX_DIMENSION,
+                   fmt: str = PROOF_FORMAT, quality: int = PROOF_QUALITY) -> Optional[Tuple[bytes, str]]:
+    """
+    Downscale and re-encode one image. Returns (bytes, mime), or None when the
+    input should be kept as is (not an image, animated, or already smaller).
+    """
+    pil_format, mime = _FORMATS[fmt]
+    try:
+        image = Image.open(io.BytesIO(data))
+        if getattr(image, "is_animated", False):
+            return None
+        image = ImageOps.exif_transpose(image)  # phones store rotation in EXIF
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        # Kept as is, and marked processed so the backfill doesn't retry it
+        return None
+
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    keep_alpha = pil_format == "WEBP" and image.has_transparency_data
+    if image.mode != ("RGBA" if keep_alpha else "RGB"):
+        image = image.convert("RGBA" if keep_alpha else "RGB")
+
+    out = io.BytesIO()
+    if pil_format == "JPEG":
+        image.save(out, pil_format, quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(out, pil_format, quality=quality, method=4)
+    encoded = out.getvalue()
+    if len(encoded) >= len(data):
+        return None
+    return encoded, mime
+
+
+# ───────────────────────── SCHEDULING ──────────────────────────
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PROOF_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+PROOF_REFERENCED_SQL = "SELECT 1 FROM Complaint WHERE ProofHash = %s LIMIT 1"
+
+
+async def _remove_if_unreferenced(digest: str, since: float):
+    """Delete a replaced proof blob unless another complaint (or a concurrent upload) uses it."""
+    loop = asyncio.get_running_loop()
+    tombstone = await loop.run_in_executor(None, blob_store.retire, digest, since)
+    if tombstone is None:
+        return
+    referenced = True
+    try:
+        async with connection() as conn:
+            cur = await conn.execute(PROOF_REFERENCED_SQL, (digest,))
+            referenced = await cur.fetchone() is not None
+    finally:
+        await loop.run_in_executor(None, blob_store.settle, digest, tombstone, referenced)
+
+
+async def compress_proof(cid: int):
+    """Re-encode the proof of one complaint. Safe to run twice or concurrently."""
+    started = time.time()
+    try:
+        async with connection() as conn:
+            cur = await conn.execute(
+                "SELECT ProofHash, ProofSize FROM Complaint WHERE CID = %s AND ProofOriginalSize IS NULL",
+                (cid,),
+            )
+            row = await cur.fetchone()
+        if not row or not row[0]:
+            return
+        proof_hash, proof_size = row
+
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(None, blob_store.read_bytes, proof_hash)
+        result = await loop.run_in_executor(get_executor(), compress_image, data)
+
+        new_hash, new_mime, new_size = proof_hash, None, len(data)
+        if result is not None:
+            encoded, new_mime = result
+            new_hash = await loop.run_in_executor(None, blob_store.put_bytes, encoded)
+            new_size = len(encoded)
+
+        async with connection() as conn:
+            # Only if nobody replaced the proof meanwhile
+            cur = await conn.execute("""
+                UPDATE Complaint
+                SET ProofHash = %s, ProofMime = COALESCE(%s, ProofMime),
+                    ProofSize = %s, ProofOriginalSize = %s
+                WHERE CID = %s AND ProofHash = %s AND ProofOriginalSize IS NULL
+            """, (new_hash, new_mime, new_size, proof_size or len(data), cid, proof_hash))
+            updated = cur.rowcount == 1
+            await conn.commit()
+
+        if result is not None and updated:
+            print(f"🗜️ Proof of complaint {cid}: {len(data):,} → {new_size:,} bytes")
+            if new_hash != proof_hash:
+                await _remove_if_unreferenced(proof_hash, started)
+
+    except blob_store.BlobNotFound:
+        print(f"⚠️ Missing proof blob for complaint {cid}")
+    except Exception as e:
+        # Background task: nobody is waiting on a response, log and move on
+        print(f"❌ Error compressing proof of complaint {cid}:", e)
+
+
+# ───────────────────────── BACKFILL CLI ──────────────────────────
+
+BACKFILL_SQL = """
+    SELECT CID FROM Complaint
+    WHERE CID > %s AND ProofHash IS NOT NULL AND ProofOriginalSize IS NULL
+    ORDER BY CID
+    LIMIT %s
+"""
+
+
+async def backfill() -> int:
+    await open_pool()
+    processed, last_cid = 0, 0
+    try:
+        while True:
+            async with connection() as conn:
+                cur = await conn.execute(BACKFILL_SQL, (last_cid, BACKFILL_BATCH_SIZE))
+                cids = [row[0] for row in await cur.fetchall()]
+            if not cids:
+                break
+            await asyncio.gather(*(compress_proof(cid) for cid in cids))
+            processed += len(cids)
+            last_cid = cids[-1]
+    finally:
+        shutdown_executor()
+        await close_pool()
+    print(f"✔ Processed {processed} proof(s)")
+    return processed
+
+
+if __name__ == "__main__":
+    if PROOF_FORMAT not in _FORMATS:
+        sys.exit(f"PROOF_FORMAT must be one of {', '.join(_FORMATS)}")
+    asyncio.run(backfill())
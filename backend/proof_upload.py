@@ -0,0 +1,187 @@
+# backend/proof_upload.py - streaming multipart parser for complaint proof uploads
+#
+# Starlette's request.form() buffers the whole body before the handler runs,
+# so size limits only apply afterwards. Here the request stream is fed to
+# python-multipart chunk by chunk: the proof file goes straight into a
+# blob_store.BlobWriter (temp file + running SHA-256) and limits are enforced
+# as bytes arrive. Worker memory stays at one network chunk per upload.
+import os
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from python_multipart.exceptions import MultipartParseError
+from starlette.concurrency import run_in_threadpool
+
+import blob_store
+
+PROOF_MAX_BYTES = int(os.getenv("PROOF_MAX_BYTES", str(10 * 1024 * 1024)))
+PROOF_ALLOWED_MIMES = {"image/png", "image/jpeg", "image/webp", "image/gif"}
+PROOF_FILE_FIELD = "proof_image"
+
+MAX_FIELD_BYTES = 64 * 1024
+MAX_FIELDS = 20
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ProofUpload:
+    """Text fields of the form plus the (uncommitted) proof blob, if one was sent."""
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.writer: Optional[blob_store.BlobWriter] = None
+        self.mime: Optional[str] = None
+
+    @property
+    def has_proof(self) -> bool:
+        return self.writer is not None and self.writer.size > 0
+
+    def discard(self):
+        if self.writer is not None:
+            self.writer.abort()
+
+
+class _ProofFormParser:
+    """python-multipart callbacks; file bytes are queued and written off the event loop."""
+
+    def __init__(self, upload: ProofUpload):
+        self.upload = upload
+        self.pending: list = []
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._name: Optional[str] = None
+        self._data = bytearray()
+        self._is_file = False
+
+    def on_part_begin(self):
+        self._headers, self._name, self._data, self._is_file = {}, None, bytearray(), False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name, self._header_value = b"", b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise HTTPException(status_code=400, detail="Multipart part without a name")
+        self._name = options[b"name"].decode("utf-8", "replace")
+
+        if b"filename" not in options:
+            if len(self.upload.fields) >= MAX_FIELDS:
+                raise HTTPException(status_code=400, detail="Too many form fields")
+            return
+
+        if self._name != PROOF_FILE_FIELD or self.upload.writer is not None:
+            raise HTTPException(status_code=400, detail=f"Only one file, '{PROOF_FILE_FIELD}', is accepted")
+        declared, _ = parse_options_header(self._headers.get(b"content-type", b""))
+        declared = declared.decode("latin-1").lower()
+        if declared and declared != "application/octet-stream" and declared not in PROOF_ALLOWED_MIMES:
+            raise HTTPException(status_code=415, detail=f"Unsupported proof type: {declared}")
+        self._is_file = True
+        self.upload.writer = blob_store.BlobWriter(max_size=PROOF_MAX_BYTES)
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._is_file:
+            self.pending.append(data[start:end])
+            return
+        if len(self._data) + (end - start) > MAX_FIELD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Form field '{self._name}' is too large")
+        self._data.extend(data[start:end])
+
+    def on_part_end(self):
+        if not self._is_file:
+            self.upload.fields[self._name] = self._data.decode("utf-8", "replace")
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Proof image exceeds {PROOF_MAX_BYTES / (1024 * 1024):g} MB")
+
+
+def _write_pending(upload: ProofUpload, chunks: list):
+    for chunk in chunks:
+        upload.writer.write(chunk)
+        if upload.mime is None and len(upload.writer.head) >= blob_store.BlobWriter.HEAD_SIZE:
+            _check_magic(upload)
+
+
+def _check_magic(upload: ProofUpload):
+    # The declared Content-Type is the client's word; the magic bytes decide
+    upload.mime = blob_store.sniff_mime(upload.writer.head, default=None)
+    if upload.mime not in PROOF_ALLOWED_MIMES:
+        raise HTTPException(status_code=415, detail="Proof must be a PNG, JPEG, WebP or GIF image")
+
+
+async def receive_proof_upload(request: Request) -> ProofUpload:
+    """
+    Parse a multipart/form-data complaint. Raises 413/415 as soon as the proof
+    breaks a limit. The caller must commit() or discard() the returned writer.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > PROOF_MAX_BYTES + MULTIPART_OVERHEAD:
+        raise _too_large()
+
+    upload = ProofUpload()
+    form = _ProofFormParser(upload)
+    parser = MultipartParser(params[b"boundary"], form.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if form.pending:
+                chunks, form.pending = form.pending, []
+                await run_in_threadpool(_write_pending, upload, chunks)
+        parser.finalize()
+        if upload.has_proof and upload.mime is None:
+            _check_magic(upload)  # files shorter than the sniffing window
+    except blob_store.BlobTooLarge:
+        upload.discard()
+        raise _too_large()
+    except MultipartParseError as e:
+        upload.discard()
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+    except BaseException:
+        upload.discard()
+        raise
+    return upload
+
+
+def decode_proof_data_url(value: str):
+    """
+    Legacy JSON path: decode a base64 proof with the same 413/415 limits as
+    the multipart upload. Returns (bytes, mime). Run it in the threadpool.
+    """
+    # Four base64 characters carry three bytes; refuse before decoding
+    if len(value) > (PROOF_MAX_BYTES // 3 + 1) * 4 + 256:
+        raise _too_large()
+    try:
+        data, _ = blob_store.decode_data_url(value)
+    except blob_store.InvalidProofData as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(data) > PROOF_MAX_BYTES:
+        raise _too_large()
+    mime = blob_store.sniff_mime(data, default=None)
+    if mime not in PROOF_ALLOWED_MIMES:
+        raise HTTPException(status_code=415, detail="Proof must be a PNG, JPEG, WebP or GIF image")
+    return data, mime
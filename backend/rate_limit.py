@@ -0,0 +1,180 @@
+# backend/rate_limit.py - in-memory token buckets for login and complaint routes
+#
+# A limited route takes one token from a per-IP bucket and one from a
+# per-identity bucket (SHID or e-mail), so neither one address trying many
+# accounts nor many addresses trying one account gets far. An empty bucket
+# means 429 with Retry-After.
+#
+# Buckets are spread over shards, each an LRU dict behind its own lock, so a
+# check is a hash, a lock and a little float math (a microsecond or two). A
+# bucket that has refilled to its burst behaves exactly like a missing one, so
+# those are dropped lazily when found at a shard's cold end, and every shard is
+# capped at max_keys / shards. Like cache.py, limits are per process.
+import os
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Only behind a proxy that sets X-Forwarded-For; otherwise clients could pick their own key
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+def parse_rate(spec: str) -> Tuple[float, float]:
+    """'10/minute' -> (tokens per second, burst). The burst is the whole allowance."""
+    count, _, period = spec.partition("/")
+    try:
+        tokens = float(count)
+    except ValueError:
+        tokens = math.nan
+    if period not in _PERIODS or not math.isfinite(tokens):
+        raise ValueError(f"Bad rate limit {spec!r}, expected N/second|minute|hour")
+    if tokens < 1:
+        # A burst below one token would refuse every request
+        raise ValueError(f"Bad rate limit {spec!r}, N must be at least 1")
+    return tokens / _PERIODS[period], tokens
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets", "allowed", "limited", "evictions")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()  # key -> [tokens, updated_at]
+        self.allowed = self.limited = self.evictions = 0
+
+
+class TokenBucketLimiter:
+    def __init__(self, name: str, rate: float, burst: float,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS, shards: int = RATE_LIMIT_SHARDS):
+        if rate <= 0:
+            raise ValueError(f"Rate limit {name!r} must refill at a positive rate")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.shard_size = max(1, max_keys // shards)
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """Take a token for key: 0.0 if allowed, otherwise seconds until one is available."""
+        if now is None:
+            now = time.monotonic()
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                shard.buckets.move_to_end(key)
+
+            if tokens < 1:
+                # A new key is at its full burst (only below 1 here): nothing to store
+                if bucket is not None:
+                    bucket[0], bucket[1] = tokens, now
+                shard.limited += 1
+                return (1 - tokens) / self.rate
+
+            if bucket is None:
+                shard.buckets[key] = [tokens - 1, now]
+                self._trim(shard, now)
+            else:
+                bucket[0], bucket[1] = tokens - 1, now
+            shard.allowed += 1
+            return 0.0
+
+    def _trim(self, shard: _Shard, now: float):
+        """Drop refilled buckets from the cold end, then LRU-evict past the cap."""
+        buckets = shard.buckets
+        for _ in range(2):
+            key, (tokens, updated_at) = next(iter(buckets.items()))
+            if tokens + (now - updated_at) * self.rate < self.burst:
+                break
+            del buckets[key]
+        while len(buckets) > self.shard_size:
+            buckets.popitem(last=False)
+            shard.evictions += 1
+
+    def reset(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        keys = allowed = limited = evictions = 0
+        for shard in self._shards:
+            with shard.lock:
+                keys += len(shard.buckets)
+                allowed += shard.allowed
+                limited += shard.limited
+                evictions += shard.evictions
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "keys": keys,
+            "max_keys": self.shard_size * len(self._shards),
+            "allowed": allowed,
+            "limited": limited,
+            "evictions": evictions,
+        }
+
+
+# ───────────────────────── ROUTE LIMITS ──────────────────────────
+
+login_by_ip = TokenBucketLimiter("login_ip", *parse_rate(os.getenv("RATE_LIMIT_LOGIN_IP", "30/minute")))
+login_by_identity = TokenBucketLimiter("login_identity", *parse_rate(os.getenv("RATE_LIMIT_LOGIN_IDENTITY", "10/minute")))
+complaint_by_ip = TokenBucketLimiter("complaint_ip", *parse_rate(os.getenv("RATE_LIMIT_COMPLAINT_IP", "60/minute")))
+complaint_by_identity = TokenBucketLimiter("complaint_identity", *parse_rate(os.getenv("RATE_LIMIT_COMPLAINT_IDENTITY", "10/minute")))
+
+_limiters = [login_by_ip, login_by_identity, complaint_by_ip, complaint_by_identity]
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",", 1)[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def enforce(limiter: TokenBucketLimiter, key: str):
+    """Charge one token or raise 429 with Retry-After."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    wait = limiter.acquire(key)
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+def limit_login(request: Request, role: str, identity: str):
+    """Before any DB or bcrypt work in a login route."""
+    enforce(login_by_ip, client_ip(request))
+    enforce(login_by_identity, f"{role}:{identity.strip().lower()}")
+
+
+def limit_complaint_ip(request: Request):
+    """First thing in a complaint route; for /complaint/upload that is before the upload is read."""
+    enforce(complaint_by_ip, client_ip(request))
+
+
+def limit_complaint_student(shid: str):
+    enforce(complaint_by_identity, shid.strip().lower())
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    return {l.name: l.stats() for l in _limiters}
@@ -0,0 +1,132 @@
+# backend/streaming.py - large result sets streamed from server-side cursors
+#
+# A named cursor keeps the result set in Postgres and hands it over
+# STREAM_BATCH_ROWS rows at a time. Each batch is encoded with orjson and sent
+# before the next is fetched, so memory is bounded by one batch whatever the
+# table size, and the first bytes go out after one batch instead of after the
+# whole query. Sections go out as NDJSON (one object per line) or as a chunked
+# JSON document. A slow client holds its pooled connection until it has read
+# the last row.
+import os
+from typing import AsyncIterator, Awaitable, Callable, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from async_db import connection
+from fast_json import dumps
+from pagination import Key, encode_cursor, keyset_after
+
+STREAM_BATCH_ROWS = int(os.getenv("STREAM_BATCH_ROWS", "2000"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class Section(NamedTuple):
+    """A streamable result set: `sql` is SELECT ... FROM ... with no WHERE or ORDER BY."""
+    sql: str
+    fields: Tuple[str, ...]  # output name of each selected column
+    order: str               # sort column; may be NULL or repeat
+    id_order: str            # unique tie-breaker
+    key: Tuple[int, int]     # positions of order and id_order in the row
+    descending: bool = False
+
+
+def wants_ndjson(request: Request, fmt: Optional[str]) -> bool:
+    if fmt:
+        return fmt == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def section_query(section: Section, after: Optional[Key] = None, limit: Optional[int] = None) -> Tuple[str, tuple]:
+    sql, params = section.sql, ()
+    if after is not None:
+        condition, params = keyset_after(section.order, section.id_order, section.descending, after)
+        sql += f" WHERE {condition}"
+    direction = " DESC" if section.descending else ""
+    sql += f" ORDER BY {section.order}{direction}, {section.id_order}{direction}"
+    if limit:
+        sql += " LIMIT %s"
+        params += (limit,)
+    return sql, params
+
+
+async def _batches(conn, name: str, sql: str, params: tuple) -> AsyncIterator[list]:
+    async with conn.cursor(name=name) as cur:
+        await cur.execute(sql, params)
+        while True:
+            rows = await cur.fetchmany(STREAM_BATCH_ROWS)
+            if not rows:
+                return
+            yield rows
+
+
+def _encode(section: Section, rows: list) -> bytes:
+    """A batch as comma-separated JSON objects: one orjson call, not one per row."""
+    return dumps([dict(zip(section.fields, row)) for row in rows])[1:-1]
+
+
+async def _stream_section(section: Section, name: str, after: Optional[Key],
+                          limit: Optional[int], ndjson: bool) -> AsyncIterator[bytes]:
+    sql, params = section_query(section, after, limit)
+    count, last = 0, None
+    if not ndjson:
+        yield b'{"items":['
+    try:
+        async with connection() as conn:
+            async for rows in _batches(conn, name, sql, params):
+                if ndjson:
+                    yield b"".join(dumps(dict(zip(section.fields, row))) + b"\n" for row in rows)
+                else:
+                    yield (b"," if count else b"") + _encode(section, rows)
+                count += len(rows)
+                last = rows[-1]
+    except Exception as e:
+        # Headers are already out; all we can do is cut the body short
+        print(f"❌ Streaming {name} failed after {count} rows:", e)
+        raise
+
+    next_cursor = None
+    if limit and count == limit:
+        next_cursor = encode_cursor(last[section.key[0]], last[section.key[1]])
+    if ndjson:
+        if next_cursor:
+            yield dumps({"next": next_cursor}) + b"\n"
+    else:
+        yield b'],"next":' + dumps(next_cursor) + b"}"
+
+
+def section_response(section: Section, name: str, ndjson: bool,
+                     after: Optional[Key] = None, limit: Optional[int] = None) -> StreamingResponse:
+    """
+    One section, or one page of it when `limit` is set. JSON is
+    {"items": [...], "next": cursor or null}; NDJSON is one row per line,
+    plus a last {"next": cursor} line when the page was full.
+    """
+    return StreamingResponse(_stream_section(section, name, after, limit, ndjson),
+                             media_type=NDJSON_MEDIA_TYPE if ndjson else "application/json")
+
+
+async def _stream_document(head: Callable[..., Awaitable[dict]],
+                           sections: List[Tuple[str, Section]]) -> AsyncIterator[bytes]:
+    async with connection() as conn:
+        # One snapshot for the head and every section, like a single query
+        await conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield dumps(await head(conn))[:-1]
+        for name, section in sections:
+            yield b',"' + name.encode() + b'":['
+            first = True
+            async for rows in _batches(conn, f"stream_{name}", *section_query(section)):
+                yield (b"" if first else b",") + _encode(section, rows)
+                first = False
+            yield b"]"
+        yield b"}"
+
+
+def document_response(head: Callable[..., Awaitable[dict]],
+                      sections: List[Tuple[str, Section]]) -> StreamingResponse:
+    """
+    One JSON object: the keys of head(conn) followed by every section as a
+    list, all read from the same snapshot.
+    """
+    return StreamingResponse(_stream_document(head, sections), media_type="application/json")
@@ -0,0 +1,308 @@
+# backend/student_import.py - bulk student onboarding from CSV
+#
+#   python student_import.py students.csv              import, creating logins
+#   python student_import.py students.csv --dry-run    validate and report only
+#   python student_import.py students.csv --reset-passwords --workers 8
+#
+# CSV header: shid, name, hid required; phone, mail, dob (YYYY-MM-DD) and
+# password optional. Rows are COPYed into a temp table and checked as a set
+# (missing fields, duplicate SHIDs, unknown HIDs, bad dates, over-long
+# values); any problem rejects the whole file. Existing SHIDs are updated.
+# A login (UserAuth) is created for every row with a password whose SHID has
+# none yet, or reset for all of them with --reset-passwords.
+#
+# Hashing happens between two short transactions, on a process pool of its
+# own (hashing.hash_many), so no connection is held while bcrypt runs: the
+# first pass validates and finds which passwords need hashing, the second
+# stages rows and hashes again, re-validates and upserts Student and UserAuth
+# in one transaction.
+import io
+import re
+import csv
+import sys
+import time
+import asyncio
+import argparse
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from async_db import connection, open_pool, close_pool
+from hashing import hasher, hash_many, HASH_WORKERS
+
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(20 * 1024 * 1024)))
+IMPORT_HASH_WORKERS = int(os.getenv("IMPORT_HASH_WORKERS", str(HASH_WORKERS)))
+IMPORT_MAX_ERRORS = 100
+
+# Concurrent imports would both create a login for a new SHID
+STUDENT_IMPORT_LOCK_KEY = 7_420_002
+
+COLUMNS = ["shid", "name", "phone", "mail", "dob", "hid", "password"]
+REQUIRED = {"shid", "name", "hid"}
+DOB_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+STAGE_SQL = """
+    CREATE TEMP TABLE StudentImport (
+        Line INT PRIMARY KEY, SHID TEXT, Name TEXT, Phone TEXT, Mail TEXT,
+        DOB TEXT, HID TEXT, Password TEXT,
+        DOBValid BOOLEAN  -- checked while parsing: no safe text-to-date cast before PG 16
+    ) ON COMMIT DROP
+"""
+
+# (problem, query returning (line, shid)) - each a single pass over the file
+CHECKS = [
+    ("missing shid, name or hid", """
+        SELECT Line, SHID FROM StudentImport WHERE SHID = '' OR Name = '' OR HID = ''
+    """),
+    ("duplicate shid in file", """
+        SELECT Line, SHID FROM (
+            SELECT Line, SHID, COUNT(*) OVER (PARTITION BY SHID) AS copies FROM StudentImport
+        ) d WHERE copies > 1 AND SHID <> ''
+    """),
+    ("hid is not a number", "SELECT Line, SHID FROM StudentImport WHERE HID <> '' AND HID !~ '^[0-9]{1,9}$'"),
+    ("unknown hid", """
+        SELECT Line, SHID FROM StudentImport i
+        WHERE HID ~ '^[0-9]{1,9}$' AND NOT EXISTS (SELECT 1 FROM Hostel h WHERE h.HID = i.HID::INT)
+    """),
+    ("dob is not a YYYY-MM-DD date", "SELECT Line, SHID FROM StudentImport WHERE NOT DOBValid"),
+    ("value too long", """
+        SELECT Line, SHID FROM StudentImport
+        WHERE length(SHID) > 50 OR length(Name) > 100 OR length(Phone) > 20 OR length(Mail) > 100
+    """),
+]
+
+PLAN_SQL = """
+    SELECT COUNT(*),
+           COUNT(*) FILTER (WHERE s.SID IS NULL),
+           COUNT(*) FILTER (WHERE i.Password = '')
+    FROM StudentImport i
+    LEFT JOIN Student s ON s.SHID = i.SHID
+"""
+
+TO_HASH_SQL = """
+    SELECT i.Line, i.Password FROM StudentImport i
+    WHERE i.Password <> ''
+      AND (%s OR NOT EXISTS (SELECT 1 FROM UserAuth u WHERE u.SHID = i.SHID))
+    ORDER BY i.Line
+"""
+
+UPSERT_STUDENTS_SQL = """
+    WITH upserted AS (
+        INSERT INTO Student (SHID, Name, Phone, Mail, DOB, HID)
+        SELECT SHID, Name, NULLIF(Phone, ''), NULLIF(Mail, ''), NULLIF(DOB, '')::DATE, HID::INT
+        FROM StudentImport
+        ORDER BY Line
+        ON CONFLICT (SHID) DO UPDATE
+        SET Name = EXCLUDED.Name,
+            Phone = COALESCE(EXCLUDED.Phone, Student.Phone),
+            Mail = COALESCE(EXCLUDED.Mail, Student.Mail),
+            DOB = COALESCE(EXCLUDED.DOB, Student.DOB),
+            HID = EXCLUDED.HID
+        RETURNING SHID, xmax = 0 AS inserted
+    )
+    SELECT COUNT(*) FILTER (WHERE inserted),
+           COALESCE(array_agg(SHID) FILTER (WHERE NOT inserted), '{}')
+    FROM upserted
+"""
+
+CREATE_LOGINS_SQL = """
+    INSERT INTO UserAuth (SHID, PSWD)
+    SELECT i.SHID, h.Hash
+    FROM StudentImport i
+    JOIN StudentImportHash h ON h.Line = i.Line
+    WHERE NOT EXISTS (SELECT 1 FROM UserAuth u WHERE u.SHID = i.SHID)
+"""
+
+RESET_LOGINS_SQL = """
+    UPDATE UserAuth u SET PSWD = h.Hash
+    FROM StudentImport i
+    JOIN StudentImportHash h ON h.Line = i.Line
+    WHERE u.SHID = i.SHID
+"""
+
+
+class ImportRejected(Exception):
+    def __init__(self, message: str, errors: List[Dict[str, object]] = ()):
+        super().__init__(message)
+        self.errors = list(errors)
+
+
+def _valid_dob(dob: str) -> bool:
+    if not dob:
+        return True
+    if not DOB_PATTERN.fullmatch(dob):
+        return False
+    try:
+        datetime.strptime(dob, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def parse_csv(text: str) -> List[Tuple]:
+    """(line, shid, name, phone, mail, dob, hid, password, dob valid) per data row, values stripped."""
+    reader = csv.reader(io.StringIO(text))
+    header = [h.strip().lower() for h in next(reader, [])]
+    unknown = [h for h in header if h not in COLUMNS]
+    if unknown or not REQUIRED <= set(header):
+        raise ImportRejected(f"Header must include {sorted(REQUIRED)} and only {COLUMNS}; got {header}")
+    positions = [header.index(c) if c in header else None for c in COLUMNS]
+
+    rows = []
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        if len(values) != len(header):
+            raise ImportRejected(f"Line {reader.line_num}: expected {len(header)} fields, got {len(values)}")
+        fields = [values[p].strip() if p is not None else "" for p in positions]
+        rows.append((reader.line_num, *fields, _valid_dob(fields[COLUMNS.index("dob")])))
+    if not rows:
+        raise ImportRejected("No rows to import")
+    return rows
+
+
+async def _stage(conn, rows: List[Tuple]):
+    await conn.execute(STAGE_SQL)
+    async with conn.cursor().copy(
+        "COPY StudentImport (Line, SHID, Name, Phone, Mail, DOB, HID, Password, DOBValid) FROM STDIN"
+    ) as copy:
+        for row in rows:
+            await copy.write_row(row)
+
+
+async def _validate(conn):
+    errors = []
+    for problem, sql in CHECKS:
+        cur = await conn.execute(sql + " ORDER BY 1 LIMIT %s", (IMPORT_MAX_ERRORS,))
+        errors += [{"line": line, "shid": shid, "error": problem} for line, shid in await cur.fetchall()]
+    if errors:
+        errors.sort(key=lambda e: e["line"])
+        raise ImportRejected(f"{len(errors)} problem(s) found, nothing was imported", errors[:IMPORT_MAX_ERRORS])
+
+
+def _progress_printer(started: float) -> Callable[[int, int], None]:
+    step = {"next": 0.1}
+
+    def progress(done: int, total: int):
+        if done >= total * step["next"] or done == total:
+            rate = done / max(time.perf_counter() - started, 1e-6)
+            print(f"🔐 Hashed {done:,}/{total:,} passwords ({rate:,.0f}/s)")
+            step["next"] = done / total + 0.1
+    return progress
+
+
+async def import_students(text: str, reset_passwords: bool = False, dry_run: bool = False,
+                          workers: int = IMPORT_HASH_WORKERS) -> Tuple[Dict[str, object], List[str]]:
+    """
+    Import a CSV document. Returns (report, every SHID written) so callers
+    can drop cached identities, including "no such student" entries for the
+    new ones. Raises ImportRejected. Hashing takes about one bcrypt per
+    password per worker, so files of more than a few hundred new logins
+    belong on the CLI, not in an HTTP request.
+    """
+    rows = parse_csv(text)
+    started = time.perf_counter()
+
+    # Pass 1: validate and find out what needs hashing, then let go of the connection
+    async with connection() as conn:
+        await _stage(conn, rows)
+        await _validate(conn)
+        cur = await conn.execute(PLAN_SQL)
+        total, new_students, without_password = await cur.fetchone()
+        cur = await conn.execute(TO_HASH_SQL, (reset_passwords,))
+        to_hash = await cur.fetchall()
+        await conn.rollback()
+    validated = time.perf_counter()
+
+    report = {
+        "rows": total,
+        "new_students": new_students,
+        "existing_students": total - new_students,
+        "without_password": without_password,
+        "passwords_to_hash": len(to_hash),
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        report["validate_ms"] = round((validated - started) * 1000, 1)
+        return report, []
+
+    hashes = await run_in_threadpool(hash_many, [p for _, p in to_hash], hasher.cost, workers,
+                                     progress=_progress_printer(time.perf_counter()))
+    hashed = time.perf_counter()
+
+    # Pass 2: stage again and write everything in one transaction
+    async with connection() as conn:
+        await conn.execute("SELECT pg_advisory_xact_lock(%s)", (STUDENT_IMPORT_LOCK_KEY,))
+        await _stage(conn, rows)
+        await _validate(conn)  # a hostel may have been deleted meanwhile
+        await conn.execute("CREATE TEMP TABLE StudentImportHash (Line INT PRIMARY KEY, Hash TEXT) ON COMMIT DROP")
+        async with conn.cursor().copy("COPY StudentImportHash (Line, Hash) FROM STDIN") as copy:
+            for (line, _), hashed_password in zip(to_hash, hashes):
+                await copy.write_row((line, hashed_password))
+
+        cur = await conn.execute(UPSERT_STUDENTS_SQL)
+        inserted, updated_shids = await cur.fetchone()
+        passwords_reset = 0
+        if reset_passwords:  # before creating logins, so new ones aren't counted as resets
+            cur = await conn.execute(RESET_LOGINS_SQL)
+            passwords_reset = cur.rowcount
+        cur = await conn.execute(CREATE_LOGINS_SQL)
+        logins_created = cur.rowcount
+        await conn.commit()
+    written = time.perf_counter()
+
+    hash_seconds = hashed - validated
+    report.update({
+        "inserted": inserted,
+        "updated": len(updated_shids),
+        "logins_created": logins_created,
+        "passwords_reset": passwords_reset,
+        "hash_workers": workers,
+        "bcrypt_rounds": hasher.cost,
+        "validate_ms": round((validated - started) * 1000, 1),
+        "hash_ms": round(hash_seconds * 1000, 1),
+        "write_ms": round((written - hashed) * 1000, 1),
+        "hashes_per_second": round(len(to_hash) / hash_seconds, 1) if to_hash else None,
+        "rows_per_second": round(total / (written - started), 1),
+    })
+    return report, [row[1] for row in rows]
+
+
+# ───────────────────────── CLI ──────────────────────────
+
+async def _run(path: str, reset_passwords: bool, dry_run: bool, workers: int) -> Dict[str, object]:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        text = f.read()
+    await open_pool()
+    hasher.start()  # settles the bcrypt cost, as the app's lifespan does
+    try:
+        report, _ = await import_students(text, reset_passwords, dry_run, workers)
+    finally:
+        await close_pool()
+        hasher.shutdown()
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Bulk-import students (and their logins) from a CSV file.")
+    parser.add_argument("csv", help="header: shid,name,hid[,phone,mail,dob,password]")
+    parser.add_argument("--reset-passwords", action="store_true", help="also replace existing logins' passwords")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+    parser.add_argument("--workers", type=int, default=IMPORT_HASH_WORKERS, help="hashing processes")
+    args = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(_run(args.csv, args.reset_passwords, args.dry_run, args.workers))
+    except ImportRejected as e:
+        print(f"❌ {e}")
+        for error in e.errors:
+            print(f"   line {error['line']}: {error['shid'] or '-'}: {error['error']}")
+        sys.exit(1)
+    for key, value in report.items():
+        print(f"{key:>20}: {value}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,274 @@
+# backend/synthetic_data.py - deterministic, COPY-based benchmark dataset generator
+#
+#   python synthetic_data.py --hostels 300 --students 500000 --complaints 10000000 --seed 42
+#
+# Rows are generated lazily and streamed into Postgres with one COPY per table,
+# so memory stays flat regardless of scale. IDs are assigned client-side (after
+# the current MAX of each table), which lets Student and Complaint rows reference
+# their parents without round trips; sequences are moved past them at the end.
+import io
+import sys
+import time
+import random
+import argparse
+from bisect import bisect
+from itertools import accumulate
+from datetime import timedelta, date
+from typing import Iterator, List
+
+import bcrypt
+from PIL import Image
+
+import blob_store
+from db import connect
+
+FIRST_NAMES = [
+    "Khan", "Amol", "Affan", "Afnan", "Anmol", "Santosh", "Anil", "Sameer",
+    "Rohit", "Vishal", "Yash", "Pavan", "Raj", "Arjun", "Deepak",
+    "Nitin", "Sagar", "Sumit", "Prakash", "Naveen", "Darshan", "Harish",
+    "Rahul", "Abhishek", "Girish", "Mahesh", "Neeraj", "Shivam", "Vinay",
+    "Lokesh",
+]
+SURNAMES = ["Patil", "Khan", "Desai", "Kulkarni", "Joshi", "Pai", "Lingam", "Shetty", "Naik", "Hegde"]
+LOCATIONS = [
+    "Narayanpura, College Road", "K. C. Park", "Karnatak Arts College Campus",
+    "College of Agriculture Campus", "Vidyagiri", "Saptapur", "Malmaddi",
+]
+COMPLAINT_TYPES = [
+    # (type, relative frequency)
+    ("WiFi Problem", 30), ("Water Leakage", 18), ("Electricity Issue", 16),
+    ("Cleanliness", 20), ("Furniture Broken", 10), ("Mess Food Quality", 6),
+]
+DEFAULT_PASSWORD = b"1"
+JPEG_BYTES_PER_PIXEL = 0.33  # what photo() encodes to at quality 85, like a phone camera
+
+
+# ───────────────────────── COPY STREAMING ──────────────────────────
+
+class RowStream(io.TextIOBase):
+    """Read-only text stream over an iterator of tab-separated COPY lines."""
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = ""
+        self.rows = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+                self.rows += 1
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def copy_rows(cur, table: str, columns: List[str], lines: Iterator[str]) -> int:
+    """Stream rows into `table` with COPY FROM STDIN and report throughput."""
+    stream = RowStream(lines)
+    started = time.perf_counter()
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream, size=1 << 16)
+    elapsed = time.perf_counter() - started
+    print(f"✔ {table:<10} {stream.rows:>11,} rows in {elapsed:7.1f}s ({stream.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return stream.rows
+
+
+# ───────────────────────── ROW GENERATORS ──────────────────────────
+
+def hostel_lines(rng: random.Random, first_hid: int, count: int, rooms_per_hostel: int) -> Iterator[str]:
+    for hid in range(first_hid, first_hid + count):
+        yield f"{hid}\tHostel {hid}\t{rng.choice(LOCATIONS)}\t{rooms_per_hostel}\n"
+
+
+def warden_lines(rng: random.Random, first_hid: int, count: int) -> Iterator[str]:
+    for hid in range(first_hid, first_hid + count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}"
+        yield f"{name}\twarden{hid}@hostel.test\t98{rng.randint(10000000, 99999999)}\twarden@{hid}\t{hid}\n"
+
+
+def room_lines(rng: random.Random, first_hid: int, count: int, rooms_per_hostel: int) -> Iterator[str]:
+    for hid in range(first_hid, first_hid + count):
+        for r in range(1, rooms_per_hostel + 1):
+            yield f"R{hid}-{r:03d}\t{rng.choice((2, 3, 4))}\t{hid}\n"
+
+
+def student_lines(rng: random.Random, first_sid: int, count: int, first_hid: int, hostels: int) -> Iterator[str]:
+    dob_start = date(2000, 1, 1)
+    for sid in range(first_sid, first_sid + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+        hid = first_hid + (sid - first_sid) % hostels
+        dob = dob_start + timedelta(days=rng.randint(0, 6 * 365))
+        shid = f"{first[:3].upper()}{hid}ID{sid:07d}"
+        yield (f"{sid}\t{first} {last}\t97{rng.randint(10000000, 99999999)}\t"
+               f"{(first + last).lower()}{sid}@student.test\t{dob.isoformat()}\t{hid}\t{shid}\n")
+
+
+def userauth_lines(rng: random.Random, first_sid: int, count: int, first_hid: int, hostels: int, password_hash: str) -> Iterator[str]:
+    # Re-derive the SHIDs with the same RNG sequence the Student stream used
+    for line in student_lines(rng, first_sid, count, first_hid, hostels):
+        yield f"{line.rsplit(chr(9), 1)[1].rstrip()}\t{password_hash}\n"
+
+
+def photo(rng: random.Random, size: int) -> bytes:
+    """A 4:3 JPEG of roughly `size` bytes: smooth colour plus sensor-like noise."""
+    width = max(64, int((size / JPEG_BYTES_PER_PIXEL * 4 / 3) ** 0.5)) // 4 * 4
+    height = width * 3 // 4
+    coarse = Image.frombytes("L", (width // 4, height // 4), rng.randbytes(width * height // 16))
+    gradient = Image.linear_gradient("L").resize((width, height))
+    scene = Image.merge("RGB", (gradient, coarse.resize((width, height), Image.BILINEAR),
+                                gradient.transpose(Image.FLIP_TOP_BOTTOM)))
+    grain = Image.frombytes("L", (width, height), rng.randbytes(width * height)).convert("RGB")
+    buf = io.BytesIO()
+    Image.blend(scene, grain, 0.05).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def make_proofs(rng: random.Random, proof_kb: float, variants: int = 64) -> List[str]:
+    """
+    A small pool of camera-sized JPEG proofs with log-normal sizes around
+    proof_kb, written to the blob store once and reused across rows. Returns
+    the ProofHash/ProofMime/ProofSize COPY fields for each. ProofOriginalSize
+    is left NULL, as for fresh uploads, so proof_pipeline.py has real images
+    to re-encode.
+    """
+    proofs = []
+    for _ in range(variants):
+        blob = photo(rng, int(rng.lognormvariate(0, 0.6) * proof_kb * 1024))
+        proofs.append(f"{blob_store.put_bytes(blob)}\timage/jpeg\t{len(blob)}")
+    return proofs
+
+
+def complaint_lines(rng: random.Random, count: int, first_sid: int, students: int,
+                    end: date, days: int, proof_ratio: float, proofs: List[str]) -> Iterator[str]:
+    """
+    Complaints skewed the way production traffic is:
+    - a minority of students file most complaints (quadratic skew on SID)
+    - volume grows towards `end`, peaks on weekday mornings
+    - old complaints are mostly resolved, recent ones mostly pending
+    """
+    types = [t for t, _ in COMPLAINT_TYPES]
+    type_cum = list(accumulate(w for _, w in COMPLAINT_TYPES))
+    hour_cum = list(accumulate([1, 1, 1, 1, 1, 2, 6, 12, 14, 10, 6, 4, 3, 3, 3, 3, 4, 5, 6, 6, 5, 4, 2, 1]))
+    # Date formatting is the expensive part of a row, so do it once per day
+    day_info = [
+        (d.isoformat(), d.strftime("%d %b"), d.weekday())
+        for d in (end - timedelta(days=age) for age in range(days + 7))
+    ]
+    random_ = rng.random
+
+    for _ in range(count):
+        sid = first_sid + int(students * random_() ** 2)
+        age = int(days * random_() ** 1.5)  # more recent complaints than old ones
+        if day_info[age][2] >= 5 and random_() < 0.4:
+            age += day_info[age][2] - 4  # thinner weekends: shift to the Friday before
+        day, label, _ = day_info[age]
+        hour = bisect(hour_cum, random_() * hour_cum[-1])
+        seconds = int(random_() * 3600)
+
+        roll = random_()
+        resolved_share = min(0.95, 0.15 + age / 30)
+        if roll < 0.04:
+            status, withdrawn, withdraw_count = "Withdrawn", "t", 1
+        elif roll < 0.04 + resolved_share * 0.96:
+            status, withdrawn, withdraw_count = "Resolved", "f", 0
+        else:
+            status, withdrawn, withdraw_count = "Pending", "f", 0
+
+        type_ = types[bisect(type_cum, random_() * type_cum[-1])]
+        proof = proofs[int(random_() * len(proofs))] if random_() < proof_ratio else "\\N\t\\N\t\\N"
+        yield (f"{sid}\t{type_}\t{day} {hour:02d}:{seconds // 60:02d}:{seconds % 60:02d}\t{status}\t"
+               f"{type_} in room, reported {label}.\t{proof}\t{withdraw_count}\t{withdrawn}\n")
+
+
+# ───────────────────────── DRIVER ──────────────────────────
+
+def _next_id(cur, table: str, column: str) -> int:
+    cur.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")
+    return cur.fetchone()[0]
+
+
+def _sync_sequence(cur, table: str, column: str):
+    cur.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX({column}), 1)) FROM {table}",
+        (table.lower(), column.lower()),
+    )
+
+
+def generate(conn, hostels: int, students: int, complaints: int, seed: int,
+             end: date, days: int, rooms_per_hostel: int, proof_ratio: float, proof_kb: float) -> dict:
+    """Generate the whole dataset in one transaction. Same arguments, same rows."""
+    started = time.perf_counter()
+    # One salt, one hash: bcrypt per student would dominate the run time
+    password_hash = bcrypt.hashpw(DEFAULT_PASSWORD, bcrypt.gensalt()).decode()
+    counts = {}
+
+    with conn.cursor() as cur:
+        first_hid = _next_id(cur, "Hostel", "HID")
+        first_sid = _next_id(cur, "Student", "SID")
+
+        counts["hostels"] = copy_rows(cur, "Hostel", ["HID", "Name", "Location", "NumberOfRooms"],
+                                      hostel_lines(random.Random(f"{seed}:hostel"), first_hid, hostels, rooms_per_hostel))
+        counts["wardens"] = copy_rows(cur, "Warden", ["Name", "Mail", "Phone", "Password", "HID"],
+                                      warden_lines(random.Random(f"{seed}:warden"), first_hid, hostels))
+        counts["rooms"] = copy_rows(cur, "Room", ["RoomNumber", "Capacity", "HID"],
+                                    room_lines(random.Random(f"{seed}:room"), first_hid, hostels, rooms_per_hostel))
+        counts["students"] = copy_rows(cur, "Student", ["SID", "Name", "Phone", "Mail", "DOB", "HID", "SHID"],
+                                       student_lines(random.Random(f"{seed}:student"), first_sid, students, first_hid, hostels))
+        counts["userauth"] = copy_rows(cur, "UserAuth", ["SHID", "PSWD"],
+                                       userauth_lines(random.Random(f"{seed}:student"), first_sid, students, first_hid, hostels, password_hash))
+
+        proofs = make_proofs(random.Random(f"{seed}:proof"), proof_kb)
+        counts["complaints"] = copy_rows(
+            cur, "Complaint",
+            ["SID", "Type", "Created_at", "Status", "Description",
+             "ProofHash", "ProofMime", "ProofSize", "WithdrawCount", "IsWithdrawn"],
+            complaint_lines(random.Random(f"{seed}:complaint"), complaints, first_sid, students,
+                            end, days, proof_ratio, proofs),
+        )
+
+        for table, column in (("Hostel", "HID"), ("Student", "SID")):
+            _sync_sequence(cur, table, column)
+
+    conn.commit()
+
+    # ANALYZE so the planner sees the new volumes straight away
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        for table in ("Hostel", "Warden", "Room", "Student", "UserAuth", "Complaint"):
+            cur.execute(f"ANALYZE {table}")
+    conn.autocommit = False
+
+    print(f"✔ Dataset generated in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic hostel dataset for load testing.")
+    parser.add_argument("--hostels", type=int, default=300)
+    parser.add_argument("--students", type=int, default=500_000)
+    parser.add_argument("--complaints", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date.today(),
+                        help="newest complaint date (YYYY-MM-DD); fix it for byte-identical runs")
+    parser.add_argument("--days", type=int, default=365, help="complaint history length")
+    parser.add_argument("--rooms-per-hostel", type=int, default=120)
+    parser.add_argument("--proof-ratio", type=float, default=0.6, help="share of complaints with a proof image")
+    parser.add_argument("--proof-kb", type=float, default=2048.0, help="median proof size in KiB (phone photos are 1-4 MiB)")
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        generate(conn, args.hostels, args.students, args.complaints, args.seed, args.end_date, args.days,
+                 args.rooms_per_hostel, args.proof_ratio, args.proof_kb)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
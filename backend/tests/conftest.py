@@ -0,0 +1,7 @@
+# backend/tests/conftest.py - run tests against the flat backend modules
+#
+#   cd backend && python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+# backend/tests/test_compression.py - Accept-Encoding negotiation
+#
+#   python -m pytest tests/test_compression.py
+import pytest
+
+import compression
+from compression import negotiate
+
+needs_brotli = pytest.mark.skipif(compression.brotli is None, reason="brotli not installed")
+
+
+@needs_brotli
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("br;q=1.0, gzip;q=1.0", "br"),         # br wins ties
+    ("gzip;q=1.0, br;q=0.8", "gzip"),
+    ("GZIP, BR", "br"),                     # codings are case-insensitive
+    (" br ; q=0.5 , gzip ; q=0.4", "br"),
+    ("*", "br"),
+    ("*;q=0.5, gzip;q=0.9", "gzip"),
+    ("br;q=0, *", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*;q=0", None),
+    ("br;q=oops, gzip", "gzip"),            # an unreadable q counts as refused
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "identity", "deflate", "compress;q=1"])
+def test_nothing_we_can_send(header):
+    assert negotiate(header) is None
+
+
+def test_gzip_only_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate("br, gzip;q=0.1") == "gzip"
+    assert negotiate("br") is None
+    assert negotiate("*") == "gzip"
@@ -0,0 +1,142 @@
+# backend/tests/test_email_outbox.py - outbox worker against a stand-in SMTP server
+#
+#   pip install pytest aiosmtpd
+#   python -m pytest tests/test_email_outbox.py
+#
+# Needs the database from .env with the migrations applied. Only rows
+# addressed to @outbox.test are claimed, so other queued mail is left alone.
+import socket
+import asyncio
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+import db
+import async_db
+import email_outbox
+
+DOMAIN = "outbox.test"
+
+
+class Inbox:
+    """aiosmtpd handler: accepts mail, except 451 for busy@ and 550 for nobody@."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("nobody@"):
+            return "550 5.1.1 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if any(rcpt.startswith("busy@") for rcpt in envelope.rcpt_tos):
+            return "451 4.3.0 Try again later"
+        self.messages.append(envelope)
+        return "250 Message accepted"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def inbox(monkeypatch):
+    try:
+        db.connect().close()
+    except Exception as e:
+        pytest.skip(f"database not reachable: {e}")
+
+    handler = Inbox()
+    port = _free_port()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setenv("EMAIL_HOST", "127.0.0.1")
+    monkeypatch.setenv("EMAIL_PORT", str(port))
+    monkeypatch.setenv("EMAIL_SENDER", f"hostel@{DOMAIN}")
+    monkeypatch.delenv("EMAIL_PASSWORD", raising=False)
+    monkeypatch.setattr(email_outbox, "EMAIL_USE_TLS", False)
+    monkeypatch.setattr(email_outbox, "CLAIM_SQL", email_outbox.CLAIM_SQL.replace(
+        "WHERE Status = 'pending'", f"WHERE Status = 'pending' AND Recipient LIKE '%%@{DOMAIN}'"))
+    _clear()
+    yield handler
+    controller.stop()
+    _clear()
+
+
+def _clear():
+    with db.connect() as conn, conn.cursor() as cur:
+        cur.execute("DELETE FROM EmailOutbox WHERE Recipient LIKE %s", (f"%@{DOMAIN}",))
+
+
+def _queue(*recipients: str):
+    with db.connect() as conn, conn.cursor() as cur:
+        for recipient in recipients:
+            cur.execute("INSERT INTO EmailOutbox (Recipient, Subject, Body) VALUES (%s, 'Test', 'Hello')",
+                        (f"{recipient}@{DOMAIN}",))
+
+
+def _rows():
+    with db.connect() as conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT split_part(Recipient, '@', 1), Status, Attempts,
+                   Status = 'pending' AND NextAttemptAt <= NOW() AS due
+            FROM EmailOutbox WHERE Recipient LIKE %s ORDER BY Recipient
+        """, (f"%@{DOMAIN}",))
+        return cur.fetchall()
+
+
+def _run(worker: email_outbox.OutboxWorker, batches: int = 1):
+    async def go():
+        await async_db.open_pool()
+        try:
+            return [await worker.run_once() for _ in range(batches)]
+        finally:
+            await worker.stop()
+            await async_db.close_pool()
+    return asyncio.run(go())
+
+
+def test_delivers_over_one_session(inbox):
+    _queue("alice", "bob", "carol")
+    worker = email_outbox.OutboxWorker()
+
+    assert _run(worker, batches=2) == [3, 0]
+    assert sorted(e.rcpt_tos[0] for e in inbox.messages) == [f"{r}@{DOMAIN}" for r in ("alice", "bob", "carol")]
+    assert [(r, s) for r, s, _, _ in _rows()] == [("alice", "sent"), ("bob", "sent"), ("carol", "sent")]
+    assert worker.stats()["smtp_connects"] == 1
+
+
+def test_retries_temporary_failures(inbox):
+    _queue("busy", "alice")
+    worker = email_outbox.OutboxWorker()
+
+    _run(worker)
+    assert _rows() == [("alice", "sent", 1, False), ("busy", "pending", 1, False)]
+    assert worker.retried == 1 and worker.failed == 0
+
+
+def test_gives_up_on_permanent_failures_and_after_max_attempts(inbox, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 1)
+    _queue("nobody", "busy")
+    worker = email_outbox.OutboxWorker()
+
+    _run(worker)
+    assert [(r, s, a) for r, s, a, _ in _rows()] == [("busy", "failed", 1), ("nobody", "failed", 1)]
+    assert worker.failed == 2 and inbox.messages == []
+
+
+def test_hands_back_what_the_lease_has_no_time_for(inbox, monkeypatch):
+    monkeypatch.setattr(email_outbox, "EMAIL_LEASE_SECONDS", 60)
+    monkeypatch.setattr(email_outbox, "EMAIL_MESSAGE_WORST_CASE", 90)
+    _queue("alice", "bob", "carol")
+    worker = email_outbox.OutboxWorker()
+
+    _run(worker)
+    # The first message is always tried; the other two are due again, unclaimed
+    assert sorted(row[1:] for row in _rows()) == [("pending", 0, True), ("pending", 0, True), ("sent", 1, False)]
+    assert len(inbox.messages) == 1
@@ -0,0 +1,48 @@
+# backend/tests/test_proof_http.py - Range header parsing for blob responses
+#
+#   python -m pytest tests/test_proof_http.py
+import pytest
+from fastapi import HTTPException
+
+from proof_http import parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=0-0", (0, 0)),
+    ("bytes=100-199", (100, 199)),
+    ("bytes=900-", (900, 999)),          # open-ended
+    ("bytes=900-5000", (900, 999)),      # end clamped to the blob
+    ("bytes=-100", (900, 999)),          # suffix: the last 100 bytes
+    ("bytes=-5000", (0, 999)),           # suffix longer than the blob
+    ("  bytes=10-20  ", (10, 20)),
+])
+def test_single_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None, "",
+    "bytes=-",                # neither end
+    "bytes=0-10,20-30",       # multi-range: served whole
+    "bytes=a-b",
+    "items=0-10",
+    "bytes=0-10 extra",
+])
+def test_ignored_headers_serve_the_whole_body(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),    # starts past the end
+    ("bytes=1000-1005", 1000),
+    ("bytes=20-10", 1000),    # end before start
+    ("bytes=-0", 1000),       # empty suffix
+    ("bytes=0-", 0),          # nothing to serve in an empty blob
+    ("bytes=-5", 0),
+])
+def test_unsatisfiable_range_is_416(header, size):
+    with pytest.raises(HTTPException) as e:
+        parse_range(header, size)
+    assert e.value.status_code == 416
+    assert e.value.headers == {"Content-Range": f"bytes */{size}"}
@@ -0,0 +1,92 @@
+# backend/tests/test_rate_limit.py - token buckets and rate limit specs
+#
+#   python -m pytest tests/test_rate_limit.py
+import pytest
+
+from rate_limit import TokenBucketLimiter, parse_rate
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("10/minute", (10 / 60, 10.0)),
+    ("1/second", (1.0, 1.0)),
+    ("3600/hour", (1.0, 3600.0)),
+    ("2.5/second", (2.5, 2.5)),
+])
+def test_parse_rate(spec, expected):
+    assert parse_rate(spec) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("spec", [
+    "10", "10/day", "/minute", "ten/minute", "nan/minute", "inf/minute", "10/Minute",
+])
+def test_parse_rate_rejects_malformed_specs(spec):
+    with pytest.raises(ValueError, match="expected N/second"):
+        parse_rate(spec)
+
+
+@pytest.mark.parametrize("spec", ["0/minute", "0.5/minute", "-3/second"])
+def test_parse_rate_rejects_counts_below_one(spec):
+    with pytest.raises(ValueError, match="at least 1"):
+        parse_rate(spec)
+
+
+def test_limiter_needs_a_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucketLimiter("t", 0, 5)
+
+
+def test_burst_then_refill():
+    limiter = TokenBucketLimiter("t", *parse_rate("3/minute"))
+    assert [limiter.acquire("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a", now=0.0) == pytest.approx(20.0)
+    assert limiter.acquire("a", now=10.0) == pytest.approx(10.0)
+    assert limiter.acquire("a", now=20.0) == 0.0
+    assert limiter.acquire("a", now=20.0) == pytest.approx(20.0)
+    stats = limiter.stats()
+    assert (stats["allowed"], stats["limited"]) == (4, 3)
+
+
+def test_refill_is_capped_at_the_burst():
+    limiter = TokenBucketLimiter("t", 1.0, 2)
+    limiter.acquire("a", now=0.0)
+    assert [limiter.acquire("a", now=1000.0) for _ in range(3)] == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_keys_are_independent():
+    limiter = TokenBucketLimiter("t", 1.0, 1)
+    assert limiter.acquire("a", now=0.0) == 0.0
+    assert limiter.acquire("a", now=0.0) > 0
+    assert limiter.acquire("b", now=0.0) == 0.0
+
+
+def test_burst_below_one_limits_new_keys_without_storing_them():
+    limiter = TokenBucketLimiter("t", 1 / 120, 0.5)
+    assert limiter.acquire("a", now=0.0) == pytest.approx(60.0)
+    assert limiter.acquire("a", now=1.0) == pytest.approx(60.0)
+    assert limiter.stats()["keys"] == 0
+
+
+def test_refilled_buckets_are_dropped():
+    limiter = TokenBucketLimiter("t", 1.0, 1, shards=1)
+    limiter.acquire("a", now=0.0)
+    limiter.acquire("b", now=0.5)  # "a" is still refilling
+    assert limiter.stats()["keys"] == 2
+    limiter.acquire("c", now=10.0)  # "a" and "b" are full again
+    assert limiter.stats()["keys"] == 1
+
+
+def test_lru_eviction_past_max_keys():
+    limiter = TokenBucketLimiter("t", 1.0, 1, max_keys=2, shards=1)
+    for i, key in enumerate("abc"):
+        limiter.acquire(key, now=i * 0.1)
+    stats = limiter.stats()
+    assert (stats["keys"], stats["evictions"]) == (2, 1)
+    # "a" was evicted, so it starts over with a full bucket
+    assert limiter.acquire("a", now=0.3) == 0.0
+
+
+def test_reset():
+    limiter = TokenBucketLimiter("t", 1.0, 1)
+    limiter.acquire("a", now=0.0)
+    limiter.reset()
+    assert limiter.acquire("a", now=0.0) == 0.0
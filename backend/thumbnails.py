@@ -0,0 +1,159 @@
+# backend/thumbnails.py - lazily generated, disk-cached proof thumbnails
+#
+# List views and the proof modal only need a preview. Thumbnails are made on
+# first request (in the proof pipeline's process pool), written to
+# THUMBNAIL_DIR as <cid>-<proof sha256>-<size>.webp and evicted least recently
+# used once the directory grows past THUMBNAIL_CACHE_BYTES. Keying on the proof
+# hash means a re-encoded or replaced proof never serves a stale thumbnail.
+import io
+import os
+import asyncio
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+import blob_store
+import proof_pipeline
+
+THUMBNAIL_DIR = os.getenv(
+    "THUMBNAIL_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnails"),
+)
+THUMBNAIL_CACHE_BYTES = int(os.getenv("THUMBNAIL_CACHE_BYTES", str(256 * 1024 * 1024)))
+THUMBNAIL_SIZES = (160, 320, 640)
+DEFAULT_THUMBNAIL_SIZE = 320
+THUMBNAIL_MIME = "image/webp"
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    """Fit the image into size x size and encode as WebP. Runs in a worker process."""
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    image.thumbnail((size, size), Image.LANCZOS)
+    image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=75, method=4)
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """
+    Size-bounded LRU over files in one directory. The recency order lives in
+    memory and is rebuilt from file mtimes on first use, so it survives
+    restarts approximately. Methods do blocking file I/O.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: Optional[OrderedDict] = None  # name -> size, oldest first
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(found))
+        self._total = sum(self._entries.values())
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            self._load()
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # keeps the order across restarts
+            return data
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(name, 0)
+            return None
+
+    def put(self, name: str, data: bytes):
+        with self._lock:
+            self._load()
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".thumb-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(self.directory, name))
+
+        with self._lock:
+            self._total += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                oldest, size = self._entries.popitem(last=False)
+                self._total -= size
+                try:
+                    os.unlink(os.path.join(self.directory, oldest))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load()
+            return {"entries": len(self._entries), "bytes": self._total, "max_bytes": self.max_bytes}
+
+
+cache = ThumbnailCache(THUMBNAIL_DIR, THUMBNAIL_CACHE_BYTES)
+
+# Concurrent requests for the same missing thumbnail share one generation. It
+# runs as its own task and requests await it through asyncio.shield, so a
+# client that disconnects doesn't cancel it for the others.
+_in_flight: Dict[str, asyncio.Task] = {}
+
+
+async def _generate(cid: int, proof_hash: str, size: int, name: str) -> bytes:
+    try:
+        original = await run_in_threadpool(blob_store.read_bytes, proof_hash)
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(
+                proof_pipeline.get_executor(), make_thumbnail, original, size
+            )
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            raise ThumbnailError(f"Proof of complaint {cid} is not a readable image: {e}")
+        await run_in_threadpool(cache.put, name, data)
+        return data
+    finally:
+        del _in_flight[name]
+
+
+def _retrieve(task: asyncio.Task):
+    # Every waiter may have gone; don't log "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+async def get_thumbnail(cid: int, proof_hash: str, size: int = DEFAULT_THUMBNAIL_SIZE) -> bytes:
+    """
+    Cached thumbnail bytes (WebP). Raises blob_store.BlobNotFound if the proof
+    is gone, ThumbnailError if it isn't an image Pillow can read (or is too
+    large to decode safely).
+    """
+    name = f"{cid}-{proof_hash}-{size}.webp"
+    data = await run_in_threadpool(cache.get, name)
+    if data is not None:
+        return data
+
+    task = _in_flight.get(name)
+    if task is None:
+        task = asyncio.create_task(_generate(cid, proof_hash, size, name))
+        task.add_done_callback(_retrieve)
+        _in_flight[name] = task
+    return await asyncio.shield(task)
@@ -1,10 +1,20 @@
-from fastapi import APIRouter, HTTPException, Request, Response, Depends
+from fastapi import APIRouter, HTTPException, Request, Response, BackgroundTasks
 from pydantic import BaseModel
-import bcrypt
 import os
 from datetime import datetime, timedelta
+from typing import Optional
 from dotenv import load_dotenv
-from db import get_db_connection
+from async_db import connection
+import blob_store
+import thumbnails
+import proof_http
+import data_version
+import complaint_counters
+from pagination import Filter, Listing, Sort, fetch_page, page_headers
+import rate_limit
+from fast_json import ORJSONResponse, FastJSONRoute
+from cache import dashboard_cache
+from hashing import hasher, HashingOverloaded, InvalidPassword, overloaded_error, invalid_password_error
 from auth import (
     create_access_token, create_refresh_token, verify_jwt_token,
     set_auth_cookies, clear_auth_cookies, log_auth_debug,
@@ -13,7 +23,7 @@ from auth import (
 
 load_dotenv()
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse, route_class=FastJSONRoute)
 
 # -------------------- SCHEMAS --------------------
 class WardenSignup(BaseModel):
@@ -29,42 +39,41 @@ class WardenLogin(BaseModel):
 
 # -------------------- SIGNUP --------------------
 @router.post("/auth/warden/signup")
-def warden_signup(details: WardenSignup):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT * FROM Warden WHERE Mail = %s", (details.mail,))
-    if cur.fetchone():
-        raise HTTPException(status_code=400, detail="Warden with this email already exists")
-
-    hashed_pw = bcrypt.hashpw(details.password.encode(), bcrypt.gensalt()).decode()
-
-    cur.execute("""
-        INSERT INTO Warden (Name, Mail, Phone, Password, HID)
-        VALUES (%s, %s, %s, %s, %s)
-    """, (details.name, details.mail, details.phone, hashed_pw, details.hid))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+async def warden_signup(details: WardenSignup):
+    # Hash without holding a pooled connection
+    try:
+        hashed_pw = await hasher.hash_password(details.password)
+    except HashingOverloaded:
+        raise overloaded_error()
+    except InvalidPassword as e:
+        raise invalid_password_error(e)
+
+    async with connection() as conn:
+        cur = await conn.execute("SELECT 1 FROM Warden WHERE Mail = %s", (details.mail,))
+        if await cur.fetchone():
+            raise HTTPException(status_code=400, detail="Warden with this email already exists")
+
+        await conn.execute("""
+            INSERT INTO Warden (Name, Mail, Phone, Password, HID)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (details.name, details.mail, details.phone, hashed_pw, details.hid))
+        await conn.commit()
 
     return {"status": "success", "message": "Warden registered successfully"}
 
 # -------------------- LOGIN --------------------
+WARDEN_LOGIN_SQL = "SELECT WID, Name, Phone, HID, Password FROM Warden WHERE Mail = %s"
+
+
 @router.post("/auth/warden/login")
-def warden_login(credentials: WardenLogin, request: Request, response: Response):
+async def warden_login(credentials: WardenLogin, request: Request, response: Response,
+                       background_tasks: BackgroundTasks):
     log_auth_debug("Warden login attempt started", request)
+    rate_limit.limit_login(request, UserRole.WARDEN, credentials.mail)
     
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT WID, Name, Phone, HID, Password FROM Warden 
-        WHERE Mail = %s
-    """, (credentials.mail,))
-    warden = cur.fetchone()
-    cur.close()
-    conn.close()
+    async with connection() as conn:
+        cur = await conn.execute(WARDEN_LOGIN_SQL, (credentials.mail,))
+        warden = await cur.fetchone()
 
     if not warden:
         log_auth_debug("No warden found with this email")
@@ -73,11 +82,18 @@ def warden_login(credentials: WardenLogin, request: Request, response: Response)
     wid, name, phone, hid, stored_password = warden
     log_auth_debug(f"Found warden: {name}")
 
-    # Check password (assuming plaintext for now, but should be hashed)
-    if credentials.password != stored_password:
+    try:
+        password_ok = await hasher.verify_password(credentials.password, stored_password, UserRole.WARDEN)
+    except HashingOverloaded:
+        raise overloaded_error()
+    if not password_ok:
         log_auth_debug("Password mismatch")
         raise HTTPException(status_code=401, detail="❌ Incorrect password")
 
+    # Plaintext or below the current cost: upgrade now that we know the password
+    if hasher.needs_rehash(stored_password):
+        background_tasks.add_task(hasher.rehash, UserRole.WARDEN, wid, credentials.password, stored_password)
+
     log_auth_debug("Password match! Creating JWT tokens")
 
     # Create JWT tokens with warden data
@@ -167,32 +183,41 @@ def get_warden_profile(request: Request):
     return {"warden": warden_data}
 
 # -------------------- COMPLAINTS LIST --------------------
+WARDEN_COMPLAINTS = Listing(
+    "c.CID, c.Type, c.Description, c.Status, c.Created_at, s.Name, s.SHID",
+    "Complaint c JOIN Student s ON c.SID = s.SID", "c.CID",
+    {"created_at": Sort("c.Created_at"), "cid": Sort("c.CID", nullable=False)},
+    "-created_at",
+    filters={"status": Filter("c.Status = %s"), "type": Filter("c.Type = %s"), "shid": Filter("s.SHID = %s")},
+    where="s.HID = %s",
+    default_limit=20,
+)
+
+
 @router.get("/warden/complaints")
-def get_warden_complaints(request: Request):
+async def get_warden_complaints(request: Request, response: Response, cursor: Optional[str] = None,
+                                limit: Optional[int] = None, sort: Optional[str] = None):
     # ✅ Get hostel ID for this warden
     warden_data = get_current_warden(request)
     hostel_id = warden_data["hid"]
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-        # ✅ Fetch complaints of students from this hostel
-    cur.execute("""
-        SELECT 
-            c.CID, c.Type, c.Description, c.Status, c.Created_at,
-            s.Name AS StudentName, s.SHID
-        FROM Complaint c
-        JOIN Student s ON c.SID = s.SID
-        WHERE s.HID = %s
-        ORDER BY c.Created_at DESC
-        LIMIT 20
-    """, (hostel_id,))
+    async with connection() as conn:
+        # ✅ 304 while nothing in the hostel has changed (per page: the query is part of the tag)
+        version, = await data_version.versions(conn, (data_version.HOSTEL, hostel_id))
+        unchanged = data_version.conditional(
+            request, response,
+            data_version.make_tag("warden-complaints", hostel_id, version, request.url.query))
+        if unchanged is not None:
+            return unchanged
 
-    complaints_data = cur.fetchall()
+        # ✅ One page of complaints of students from this hostel, newest first
+        page = await fetch_page(conn, WARDEN_COMPLAINTS, request, (hostel_id,),
+                                cursor=cursor, limit=limit, sort=sort)
+    page_headers(response, page)
 
     # ✅ Convert tuples to dictionary format and handle datetime
     complaints = []
-    for c in complaints_data:
+    for c in page.rows:
         complaint = {
             "cid": c[0],
             "type": c[1], 
@@ -204,95 +229,161 @@ def get_warden_complaints(request: Request):
         }
         complaints.append(complaint)
 
-    cur.close()
-    conn.close()
+    return {"complaints": complaints, "next": page.next, "estimated_total": page.estimated_total}
+
+
+# Proofs of complaints in the warden's hostel, by complaint and by blob hash
+WARDEN_PROOF_SQL = """
+    SELECT c.ProofHash, c.ProofMime, c.ProofImage
+    FROM Complaint c
+    JOIN Student s ON c.SID = s.SID
+    WHERE c.CID = %s AND s.HID = %s
+"""
 
-    return {"complaints": complaints}
+WARDEN_PROOF_BY_HASH_SQL = """
+    SELECT c.ProofMime
+    FROM Complaint c
+    JOIN Student s ON c.SID = s.SID
+    WHERE c.ProofHash = %s AND s.HID = %s
+    LIMIT 1
+"""
 
 
 @router.get("/warden/complaint/{cid}/proof")
-def get_complaint_proof(cid: int, request: Request):
+async def get_complaint_proof(cid: int, request: Request):
+    warden_data = get_current_warden(request)
+    async with connection() as conn:
+        cur = await conn.execute(WARDEN_PROOF_SQL, (cid, warden_data["hid"]))
+
+        complaint = await cur.fetchone()
+
+    if not complaint or not (complaint[0] or complaint[2]):
+        raise HTTPException(status_code=404, detail="No proof found")
+
+    proof_hash, proof_mime, proof_image = complaint
+    if proof_hash:
+        try:
+            response = await proof_http.blob_response(
+                request, proof_hash, proof_mime or blob_store.DEFAULT_PROOF_MIME,
+            )
+        except blob_store.BlobNotFound:
+            raise HTTPException(status_code=404, detail="No proof found")
+        # Where the same bytes can be cached for good
+        response.headers["Content-Location"] = f"/warden/proof/{proof_hash}"
+        return response
+
+    # Row not yet moved by migration 0004
+    try:
+        data, mime = blob_store.decode_data_url(proof_image)
+    except blob_store.InvalidProofData:
+        raise HTTPException(status_code=404, detail="No proof found")
+    return Response(content=data, media_type=mime)
+
+
+@router.get("/warden/proof/{proof_hash}")
+async def get_proof_by_hash(proof_hash: str, request: Request):
+    """Content-addressed proof: the URL can't change meaning, so it is cached as immutable."""
     warden_data = get_current_warden(request)
-    conn = get_db_connection()
-    cur = conn.cursor()
+    if proof_http.etag_matches(request, proof_hash):
+        # The client already holds exactly these bytes, nothing to authorize
+        return proof_http.not_modified(proof_hash, proof_http.IMMUTABLE_CACHE_CONTROL)
+
+    async with connection() as conn:
+        cur = await conn.execute(WARDEN_PROOF_BY_HASH_SQL, (proof_hash, warden_data["hid"]))
+        complaint = await cur.fetchone()
 
-    cur.execute("""
-        SELECT ProofImage
-        FROM Complaint c
-        JOIN Student s ON c.SID = s.SID
-        WHERE c.CID = %s AND s.HID = %s
-    """, (cid, warden_data["hid"]))
+    if not complaint:
+        raise HTTPException(status_code=404, detail="No proof found")
+
+    try:
+        return await proof_http.blob_response(
+            request, proof_hash, complaint[0] or blob_store.DEFAULT_PROOF_MIME,
+            proof_http.IMMUTABLE_CACHE_CONTROL,
+        )
+    except blob_store.BlobNotFound:
+        raise HTTPException(status_code=404, detail="No proof found")
 
-    complaint = cur.fetchone()
-    cur.close()
-    conn.close()
 
-    if not complaint or not complaint[0]:  # complaint[0] is ProofImage
+@router.get("/warden/complaint/{cid}/proof/thumbnail")
+async def get_complaint_proof_thumbnail(cid: int, request: Request, size: int = thumbnails.DEFAULT_THUMBNAIL_SIZE):
+    warden_data = get_current_warden(request)
+    if size not in thumbnails.THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {thumbnails.THUMBNAIL_SIZES}")
+
+    async with connection() as conn:
+        cur = await conn.execute("""
+            SELECT c.ProofHash
+            FROM Complaint c
+            JOIN Student s ON c.SID = s.SID
+            WHERE c.CID = %s AND s.HID = %s
+        """, (cid, warden_data["hid"]))
+        complaint = await cur.fetchone()
+
+    if not complaint or not complaint[0]:
         raise HTTPException(status_code=404, detail="No proof found")
 
-    return {"proofImage": complaint[0]}
+    tag = f"{complaint[0]}-{size}"
+    if proof_http.etag_matches(request, tag):
+        return proof_http.not_modified(tag, proof_http.REVALIDATE_CACHE_CONTROL)
+
+    try:
+        data = await thumbnails.get_thumbnail(cid, complaint[0], size)
+    except blob_store.BlobNotFound:
+        raise HTTPException(status_code=404, detail="No proof found")
+    except thumbnails.ThumbnailError as e:
+        print("⚠️", e)
+        raise HTTPException(status_code=422, detail="Proof cannot be previewed")
+    return Response(content=data, media_type=thumbnails.THUMBNAIL_MIME,
+                    headers={"ETag": proof_http.etag_for(tag), "Cache-Control": proof_http.REVALIDATE_CACHE_CONTROL})
 
 
 @router.patch("/warden/complaint/{cid}/status")
-def update_complaint_status(cid: int, data: dict, request: Request):
+async def update_complaint_status(cid: int, data: dict, request: Request):
     # ✅ Check JWT authentication through dependency
     warden_data = get_current_warden(request)
     new_status = data.get("status")
     if new_status not in ["Pending", "Resolved"]:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    conn = get_db_connection()
-    cur = conn.cursor()
+    async with connection() as conn:
+        async with conn.cursor() as cur:
+            # ✅ Ensure complaint belongs to same hostel
+            await cur.execute("""
+                SELECT c.CID, s.SHID FROM Complaint c
+                JOIN Student s ON c.SID = s.SID
+                WHERE c.CID = %s AND s.HID = %s
+            """, (cid, warden_data["hid"]))
+            complaint = await cur.fetchone()
 
-    # ✅ Ensure complaint belongs to same hostel
-    cur.execute("""
-        SELECT c.CID FROM Complaint c
-        JOIN Student s ON c.SID = s.SID
-        WHERE c.CID = %s AND s.HID = %s
-    """, (cid, warden_data["hid"]))
-    complaint = cur.fetchone()
+            if not complaint:
+                raise HTTPException(status_code=404, detail="Complaint not found or not authorized")
 
-    if not complaint:
-        cur.close()
-        conn.close()
-        raise HTTPException(status_code=404, detail="Complaint not found or not authorized")
-
-    # ✅ Update status
-    cur.execute("UPDATE Complaint SET Status = %s WHERE CID = %s", (new_status, cid))
-    conn.commit()
-
-    cur.close()
-    conn.close()
+            # ✅ Update status
+            await cur.execute("UPDATE Complaint SET Status = %s WHERE CID = %s", (new_status, cid))
+            await conn.commit()
+    dashboard_cache.invalidate(complaint[1])
 
     return {"message": "Status updated successfully", "cid": cid, "new_status": new_status}
 
 
 @router.get("/warden/complaint-stats")
-def get_complaint_stats(request: Request):
+async def get_complaint_stats(request: Request, response: Response):
     warden_data = get_current_warden(request)
     hid = warden_data["hid"]
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT 
-            COUNT(*) FILTER (WHERE Status = 'Pending') AS pending,
-            COUNT(*) FILTER (WHERE Status = 'Resolved') AS resolved,
-            COUNT(*) FILTER (WHERE Status = 'Rejected') AS rejected,
-            COUNT(*) AS total
-        FROM Complaint
-        WHERE SID IN (
-            SELECT SID FROM Student WHERE HID = %s
-        )
-    """, (hid,))
-    result = cur.fetchone()
-    cur.close()
-    conn.close()
+    async with connection() as conn:
+        version, = await data_version.versions(conn, (data_version.HOSTEL, hid))
+        unchanged = data_version.conditional(
+            request, response, data_version.make_tag("warden-stats", hid, version))
+        if unchanged is not None:
+            return unchanged
+
+        # ✅ Maintained by triggers; a few rows per hostel, no complaint scan
+        counts = await complaint_counters.hostel_status_counts(conn, hid)
 
     return {
-        "pending": result[0],
-        "resolved": result[1],
-        "rejected": result[2],
-        "total": result[3]
+        "pending": counts.get("Pending", 0),
+        "resolved": counts.get("Resolved", 0),
+        "rejected": counts.get("Rejected", 0),
+        "total": sum(counts.values())
     }
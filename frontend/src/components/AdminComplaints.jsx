@@ -5,6 +5,7 @@
 ------------------------------------------------------------------*/
 import React, { useEffect, useMemo, useRef, useState } from "react";
 import { adminAxios } from "../utils/axiosConfig";
+import { fetchAllWithAxios } from "../utils/pagination";
 import {
   FaChevronLeft,
   FaChevronRight,
@@ -52,15 +53,15 @@ const AdminComplaints = () => {
   const fetchAll = async () => {
     try {
       setLoading(true);
-      const [{ data: s }, { data: o }, { data: c }] = await Promise.all([
+      const [{ data: s }, o, c] = await Promise.all([
         adminAxios.get("/admin/complaints/summary"),
-        adminAxios.get("/admin/complaints/overdue"),
-        adminAxios.get("/admin/complaints"),
+        fetchAllWithAxios(adminAxios, "/admin/complaints/overdue", "overdue_complaints"),
+        fetchAllWithAxios(adminAxios, "/admin/complaints", "complaints"),
       ]);
       // Handle both direct array and wrapped object response
       setSummary(Array.isArray(s) ? s : (s.summary || []));
-      setOverdue(Array.isArray(o) ? o : (o.overdue || []));
-      setComplaints(Array.isArray(c) ? c : (c.complaints || []));
+      setOverdue(o);
+      setComplaints(c);
     } catch (err) {
       console.error('Error loading complaints:', err);
       setError("Failed to load complaints.");
@@ -3,6 +3,7 @@
 ------------------------------------------------------------------*/
 import React, { useEffect, useMemo, useState } from "react";
 import { adminAxios } from "../utils/axiosConfig";
+import { fetchAllWithAxios } from "../utils/pagination";
 import {
   FaEdit,
   FaSave,
@@ -35,8 +36,7 @@ const AdminUsers = () => {
   useEffect(() => {
     (async () => {
       try {
-        const { data } = await adminAxios.get("/admin/students");
-        setStudents(data.students || []);
+        setStudents(await fetchAllWithAxios(adminAxios, "/admin/students"));
       } catch (err) {
         console.error('Error loading students:', err);
         setError("Failed to load students.");
@@ -6,6 +6,7 @@
 ------------------------------------------------------------------*/
 import React, { useEffect, useMemo, useState } from "react";
 import { adminAxios } from "../utils/axiosConfig";
+import { fetchAllWithAxios } from "../utils/pagination";
 import {
   FaEdit,
   FaSave,
@@ -51,12 +52,11 @@ const AdminWardens = () => {
   useEffect(() => {
     (async () => {
       try {
-        const [{ data: wData }, { data: aData }] = await Promise.all([
-          adminAxios.get("/admin/wardens"),
+        const [wData, { data: aData }] = await Promise.all([
+          fetchAllWithAxios(adminAxios, "/admin/wardens"),
           adminAxios.get("/admin/analytics"),
         ]);
-        // Handle both direct array and wrapped object response
-        setWardens(Array.isArray(wData) ? wData : (wData.wardens || []));
+        setWardens(wData);
         setHostels(Array.isArray(aData) ? [] : (aData.hostels || []));
       } catch (err) {
         console.error('Error loading wardens:', err);
@@ -1,9 +1,26 @@
 import React, { useState } from "react";
 import { FaCheckCircle, FaClock, FaTimesCircle, FaImage } from "react-icons/fa";
+import { userAxios } from "../utils/axiosConfig";
 
 const ComplaintsTab = ({ complaints, handleWithdraw }) => {
   const [selectedImage, setSelectedImage] = useState(null);
 
+  // The listing only carries proof metadata; the image is loaded on demand
+  const openProof = async (comp) => {
+    try {
+      const res = await userAxios.get(comp.proof_url, { responseType: "blob" });
+      setSelectedImage(URL.createObjectURL(res.data));
+    } catch (err) {
+      console.error("Error fetching proof image:", err);
+      alert("Failed to load proof image");
+    }
+  };
+
+  const closeProof = () => {
+    URL.revokeObjectURL(selectedImage);
+    setSelectedImage(null);
+  };
+
   return (
     <div className="bg-slate-800/90 border border-indigo-500/40 p-6 rounded-lg shadow-md">
       <h3 className="text-2xl font-semibold text-indigo-400 mb-6">
@@ -44,9 +61,9 @@ const ComplaintsTab = ({ complaints, handleWithdraw }) => {
             </p>
 
             {/* Proof Image */}
-            {comp.proof_image && (
+            {comp.has_proof && (
               <button
-                onClick={() => setSelectedImage(comp.proof_image)}
+                onClick={() => openProof(comp)}
                 className="flex items-center gap-2 text-indigo-400 text-sm hover:underline"
               >
                 <FaImage /> View Proof
@@ -76,7 +93,7 @@ const ComplaintsTab = ({ complaints, handleWithdraw }) => {
       {selectedImage && (
         <div
           className="fixed inset-0 bg-black/80 flex items-center justify-center z-50"
-          onClick={() => setSelectedImage(null)}
+          onClick={closeProof}
         >
           <img
             src={selectedImage}
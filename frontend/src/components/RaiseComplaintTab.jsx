@@ -33,22 +33,23 @@ const RaiseComplaintTab = ({ setActiveTab, fetchData }) => {
             return;
           }
 
-          const toBase64 = (file) =>
-            new Promise((resolve, reject) => {
-              const reader = new FileReader();
-              reader.readAsDataURL(file);
-              reader.onload = () => resolve(reader.result.split(",")[1]);
-              reader.onerror = (error) => reject(error);
-            });
+          const formData = new FormData();
+          formData.append("shid", shid);
+          formData.append("type", type);
+          formData.append("description", description);
+          formData.append("proof_image", imageFile);
 
           try {
-            const proof_image = await toBase64(imageFile);
-            const res = await fetch(`${API_BASE_URL}/complaint/add`, {
+            // Sent as multipart so the image is streamed, not base64-encoded
+            const res = await fetch(`${API_BASE_URL}/complaint/upload`, {
               method: "POST",
-              headers: { "Content-Type": "application/json" },
-              body: JSON.stringify({ shid, type, description, proof_image }),
+              body: formData,
             });
             const result = await res.json();
+            if (!res.ok) {
+              alert(result.detail || "Error submitting complaint.");
+              return;
+            }
             alert(result.message || "Complaint submitted.");
             e.target.reset();
             setPreviewImage(null);
@@ -6,6 +6,7 @@ import StudentInfoTab from "../components/StudentInfoTab";
 import ComplaintsTab from "../components/ComplaintsTab";
 import RaiseComplaintTab from "../components/RaiseComplaintTab";
 import FeedbacksTab from "../components/FeedbacksTab";
+import { fetchAllPages } from "../utils/pagination";
 
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL;
@@ -26,16 +27,21 @@ const StudentDashboard = () => {
       })
       .catch(console.error);
 
-    fetch(`${API_BASE_URL}/fetch_complaint/${shid}`)
-      .then((res) => res.json())
-      .then((resData) => {
+    fetchAllPages(
+      (params) =>
+        fetch(`${API_BASE_URL}/fetch_complaint/${shid}?${new URLSearchParams(params)}`)
+          .then((res) => res.json())
+          .then((data) => ({ data })),
+      "complaints"
+    )
+      .then((complaints) => {
         setData((prev) => ({
           ...prev,
           complaints: {
-            total: resData.complaints.length,
-            pending: resData.complaints.filter((c) => c.status === "Pending").length,
-            resolved: resData.complaints.filter((c) => c.status === "Resolved").length,
-            recent: resData.complaints,
+            total: complaints.length,
+            pending: complaints.filter((c) => c.status === "Pending").length,
+            resolved: complaints.filter((c) => c.status === "Resolved").length,
+            recent: complaints,
           },
         }));
       })
@@ -7,6 +7,7 @@ import ComplaintTable from "./ComplaintTable";
 import ProofModal from "./ProofModal";
 import ComplaintChart from "./ComplaintChart";
 import { wardenAxios, clearWardenTokens } from "../../utils/axiosConfig";
+import { fetchAllWithAxios } from "../../utils/pagination";
 
 const WardenDashboard = () => {
   const [sidebarOpen, setSidebarOpen] = useState(false);
@@ -23,8 +24,7 @@ const WardenDashboard = () => {
         const profileRes = await wardenAxios.get("/auth/warden/profile");
         setWarden(profileRes.data.warden);
 
-        const complaintsRes = await wardenAxios.get("/warden/complaints");
-        setComplaints(complaintsRes.data.complaints);
+        setComplaints(await fetchAllWithAxios(wardenAxios, "/warden/complaints", "complaints"));
       } catch (err) {
         console.error("❌ Fetch error:", err);
       } finally {
@@ -62,15 +62,18 @@ const WardenDashboard = () => {
 
   const handleProofImage = async (cid) => {
     try {
-      const res = await wardenAxios.get(`/warden/complaint/${cid}/proof`);
-      const data = res.data;
-      if (data.proofImage) {
-        setProofImage(`data:image/png;base64,${data.proofImage}`);
-        setShowModal(true);
-      } else {
+      // The modal only needs a preview, not the full upload
+      const res = await wardenAxios.get(`/warden/complaint/${cid}/proof/thumbnail?size=640`, {
+        responseType: "blob",
+      });
+      if (proofImage) URL.revokeObjectURL(proofImage);
+      setProofImage(URL.createObjectURL(res.data));
+      setShowModal(true);
+    } catch (err) {
+      if (err.response?.status === 404) {
         alert("No proof image available");
+        return;
       }
-    } catch (err) {
       console.error("Error fetching proof image:", err);
       alert("Failed to load proof image");
     }
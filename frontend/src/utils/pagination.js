@@ -0,0 +1,30 @@
+// src/utils/pagination.js - follow the API's keyset cursors to the last page
+//
+// List endpoints return one page at a time. Object bodies carry the cursor
+// for the next page in `next`; bare-array bodies (admin students/wardens)
+// carry it in the X-Next-Cursor header. It is absent on the last page.
+
+export const PAGE_LIMIT = 1000; // the server's PAGE_MAX_LIMIT
+
+const nextCursor = (data, headers) =>
+  (Array.isArray(data) ? headers?.["x-next-cursor"] : data?.next) || null;
+
+// getPage(params) must resolve to { data, headers } (an axios response works)
+export async function fetchAllPages(getPage, key, params = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const { data, headers } = await getPage({
+      ...params,
+      limit: PAGE_LIMIT,
+      ...(cursor ? { cursor } : {}),
+    });
+    items.push(...(Array.isArray(data) ? data : data?.[key] || []));
+    cursor = nextCursor(data, headers);
+  } while (cursor);
+  return items;
+}
+
+// Every row of an axios list endpoint
+export const fetchAllWithAxios = (client, path, key, params = {}) =>
+  fetchAllPages((query) => client.get(path, { params: query }), key, params);